@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import metrics
+from app.core.loop_watchdog import loop_watchdog
+
+metrics_router = APIRouter()
+
+# 事件循环阻塞报告只依赖watchdog，与METRICS_ENABLED无关，单独挂载
+event_loop_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus文本格式的运行指标"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@event_loop_router.get("/metrics/event-loop", include_in_schema=False)
+async def get_event_loop_report(limit: int = 20):
+    """事件循环阻塞报告：按累计阻塞时长排序的阻塞位置及其调用栈"""
+    return loop_watchdog.report(limit)
\ No newline at end of file
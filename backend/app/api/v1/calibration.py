@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
+import asyncio
+import logging
+import numpy as np
 
 from app.core.database import get_db
+from app.core.joint_limits import OFFSET_ADVISORY_LIMIT, OFFSET_HARD_LIMIT
 from app.models.robot import Robot
 from app.services.calibration_service import calibration_service
 from app.services.ssh_service import ssh_service
 from app.services.calibration_file_service import calibration_file_service
+from app.services.calibration_archive_service import calibration_archive_service
+from app.services.joint_table import JointTable
+from app.services.joint_command_publisher import joint_command_publisher, PUBLISH_TOPIC
+from app.services.joint_jog_service import joint_jog_service
 from app.services.zero_point_calibration_service import zero_point_calibration_service, ZeroPointStep
+from app.services.batch_calibration_orchestrator import batch_calibration_orchestrator
+from app.services.calibration_timeline import calibration_timelines
 from app.schemas.calibration import (
     CalibrationStartRequest,
     CalibrationResponse,
@@ -17,7 +27,15 @@ from app.schemas.calibration import (
     ZeroPointToolConfirmRequest,
     ZeroPointConfigConfirmRequest,
     ZeroPointSessionResponse,
+    ZeroPointBatchStartRequest,
+    ZeroPointBatchResponse,
     CalibrationFileInfoResponse,
+    CalibrationFilesOverviewResponse,
+    BackupFileInfoResponse,
+    CalibrationVersionResponse,
+    CalibrationVersionContentResponse,
+    CalibrationVersionDiffResponse,
+    CalibrationRollbackResponse,
     JointDataUpdateRequest,
     CalibrationFileReadResponse,
     HeadHandCalibrationStartRequest,
@@ -30,6 +48,7 @@ from app.schemas.calibration import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/{robot_id}/calibrations")
@@ -788,8 +807,181 @@ async def go_to_calibration_step(
         )
 
 
+# ==================== 批量零点标定 API ====================
+
+@router.post("/zero-point-calibration/batches", response_model=ZeroPointBatchResponse)
+async def start_zero_point_calibration_batch(
+    request: ZeroPointBatchStartRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    开始批量零点标定
+    
+    调用前操作员需已在所有工位完成工装安装，每台机器人的4个步骤由服务端自动推进，
+    进度通过WebSocket的 batch_calibration_progress 消息推送。
+    """
+    if not request.tools_confirmed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请先确认所有工位的工装已安装（tools_confirmed）"
+        )
+    
+    # 请求中可以是设备id或SN，统一解析为设备id后再交给编排器
+    robot_ids = []
+    missing = []
+    for robot_id in request.robot_ids:
+        robot = db.query(Robot).filter(Robot.id == robot_id).first()
+        if not robot:
+            robot = db.query(Robot).filter(Robot.sn_number == robot_id).first()
+        if not robot:
+            missing.append(robot_id)
+        else:
+            robot_ids.append(robot.id)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"设备不存在: {', '.join(missing)}"
+        )
+    
+    try:
+        batch = await batch_calibration_orchestrator.start_batch(
+            robot_ids=robot_ids,
+            tools_confirmed_by=request.confirmed_by,
+            calibration_type=request.calibration_type,
+            max_concurrency=request.max_concurrency
+        )
+        return batch.to_dict()
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/zero-point-calibration/batches", response_model=List[ZeroPointBatchResponse])
+async def list_zero_point_calibration_batches():
+    """获取批量零点标定列表（按创建时间倒序）"""
+    return [batch.to_dict() for batch in batch_calibration_orchestrator.list_batches()]
+
+
+@router.get("/zero-point-calibration/batches/{batch_id}", response_model=ZeroPointBatchResponse)
+async def get_zero_point_calibration_batch(batch_id: str):
+    """获取批量零点标定状态"""
+    batch = batch_calibration_orchestrator.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="批量标定不存在"
+        )
+    return batch.to_dict()
+
+
+@router.delete("/zero-point-calibration/batches/{batch_id}", response_model=ZeroPointBatchResponse)
+async def cancel_zero_point_calibration_batch(batch_id: str):
+    """取消批量零点标定"""
+    batch = batch_calibration_orchestrator.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="批量标定不存在"
+        )
+    
+    try:
+        batch = await batch_calibration_orchestrator.cancel_batch(batch_id)
+        return batch.to_dict()
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+# ==================== 标定时间线 API ====================
+
+@router.get("/calibration-timelines/sessions")
+async def list_calibration_timelines(kind: Optional[str] = None, robot_id: Optional[str] = None):
+    """获取标定会话时间线概要（按开始时间倒序），kind: zero_point / head_hand"""
+    return [timeline.summary() for timeline in calibration_timelines.list(kind, robot_id)]
+
+
+@router.get("/calibration-timelines/sessions/{session_id}")
+async def get_calibration_timeline(session_id: str):
+    """获取标定会话时间线（Chrome Trace Event格式，可用chrome://tracing或Perfetto打开）"""
+    timeline = calibration_timelines.get(session_id)
+    if not timeline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="标定时间线不存在"
+        )
+    return timeline.to_trace()
+
+
+@router.get("/calibration-timelines/stats")
+async def get_calibration_timeline_stats(kind: Optional[str] = None, session_status: Optional[str] = None):
+    """汇总已结束会话的各阶段耗时分布（p50/p90/p99及占总用时比例）"""
+    return calibration_timelines.stats(kind, session_status)
+
+
 # ==================== 标定文件管理 API ====================
 
+@router.get("/{robot_id}/calibration-files/info", response_model=CalibrationFilesOverviewResponse)
+async def get_all_calibration_files_info(
+    robot_id: str,
+    db: Session = Depends(get_db)
+):
+    """一次性获取全部标定文件及备份信息"""
+    try:
+        overview = await calibration_file_service.get_all_files_info(robot_id)
+        
+        return CalibrationFilesOverviewResponse(
+            robot_id=robot_id,
+            files=[
+                CalibrationFileInfoResponse(**vars(info))
+                for info in overview["files"].values()
+            ],
+            head_cali_backups=[
+                BackupFileInfoResponse(**vars(backup))
+                for backup in overview["head_cali_backups"]
+            ],
+            backups=[
+                BackupFileInfoResponse(**vars(backup))
+                for backup in overview["backups"]
+            ]
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取标定文件信息时发生错误: {str(e)}"
+        )
+
+
+@router.get("/{robot_id}/calibration-files/{file_type}/info", response_model=CalibrationFileInfoResponse)
+async def get_calibration_file_info(
+    robot_id: str,
+    file_type: str,  # arms_zero 或 legs_offset
+    db: Session = Depends(get_db)
+):
+    """获取单个标定文件信息"""
+    if file_type not in ["arms_zero", "legs_offset"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持的文件类型"
+        )
+    
+    try:
+        info = await calibration_file_service.get_file_info(robot_id, file_type)
+        return CalibrationFileInfoResponse(**vars(info))
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取标定文件信息时发生错误: {str(e)}"
+        )
+
+
 @router.get("/{robot_id}/calibration-files/{file_type}/data")
 async def read_calibration_file_data(
     robot_id: str,
@@ -861,21 +1053,7 @@ async def update_calibration_file_data(
     
     try:
         # 手动验证参数范围（补充Pydantic验证）
-        warnings = []
-        errors = []
-        
-        for joint in request.joint_data:
-            if abs(joint.offset) > 0.05:
-                if abs(joint.offset) > 0.1:
-                    errors.append(
-                        f"关节 {joint.name} 的偏移值 {joint.offset:.4f} "
-                        f"超过安全范围(±0.1)，可能导致机器人损坏"
-                    )
-                else:
-                    warnings.append(
-                        f"关节 {joint.name} 的偏移值 {joint.offset:.4f} "
-                        f"超过建议范围(±0.05)，请谨慎操作"
-                    )
+        warnings, errors = JointTable.from_joint_data(request.joint_data).offset_limit_messages()
         
         # 如果有严重错误，直接拒绝
         if errors:
@@ -922,6 +1100,90 @@ async def update_calibration_file_data(
         )
 
 
+@router.get("/{robot_id}/calibration-files/{file_type}/versions", response_model=List[CalibrationVersionResponse])
+def list_calibration_file_versions(
+    robot_id: str,
+    file_type: str  # arms_zero 或 legs_offset
+):
+    """获取标定文件的归档版本列表（同步查询，在线程池中执行）"""
+    if file_type not in ["arms_zero", "legs_offset"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持的文件类型"
+        )
+    
+    return calibration_archive_service.list_versions(robot_id, file_type)
+
+
+@router.get("/{robot_id}/calibration-files/{file_type}/versions/{version_id}", response_model=CalibrationVersionContentResponse)
+def get_calibration_file_version(
+    robot_id: str,
+    file_type: str,
+    version_id: str
+):
+    """获取指定归档版本的文件内容"""
+    try:
+        return calibration_archive_service.get_version(robot_id, file_type, version_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.get("/{robot_id}/calibration-files/{file_type}/diff", response_model=CalibrationVersionDiffResponse)
+def diff_calibration_file_versions(
+    robot_id: str,
+    file_type: str,
+    from_version: str,
+    to_version: Optional[str] = None
+):
+    """比较两个归档版本，未指定to_version时与最新版本比较"""
+    try:
+        return calibration_archive_service.diff_versions(robot_id, file_type, from_version, to_version)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.post("/{robot_id}/calibration-files/{file_type}/versions/{version_id}/rollback", response_model=CalibrationRollbackResponse)
+async def rollback_calibration_file(
+    robot_id: str,
+    file_type: str,
+    version_id: str,
+    db: Session = Depends(get_db)
+):
+    """将机器人上的标定文件回滚到指定归档版本"""
+    robot = db.query(Robot).filter(Robot.id == robot_id).first()
+    if not robot:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="机器人不存在"
+        )
+    
+    if not ssh_service.is_connected(robot_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="机器人未连接"
+        )
+    
+    try:
+        result = await calibration_archive_service.rollback(robot_id, file_type, version_id)
+        return CalibrationRollbackResponse(message="标定文件已回滚", **result)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"回滚标定文件时发生错误: {str(e)}"
+        )
+
+
 # ==================== 头手标定 API ====================
 
 @router.get("/{robot_id}/calibration-config-check")
@@ -1205,18 +1467,18 @@ EOF
         # 执行自动化脚本 - 模拟器模式下直接运行模拟脚本
         if hasattr(ssh_service, 'use_simulator') and ssh_service.use_simulator:
             # 模拟器模式：使用模拟器的头手标定脚本
-            script_id = ssh_service.simulator.start_calibration_script("head_hand")
+            script_id = ssh_service.simulator_for(robot_id).start_calibration_script("head_hand")
             
             # 监控脚本输出
-            import asyncio
-            while ssh_service.simulator.is_script_running(script_id):
-                output = ssh_service.simulator.get_script_output(script_id)
+            from app.simulator.sim_clock import simulator_clock
+            while ssh_service.simulator_for(robot_id).is_script_running(script_id):
+                output = ssh_service.simulator_for(robot_id).get_script_output(script_id)
                 if output:
                     output_callback(output)
-                await asyncio.sleep(0.5)
+                await simulator_clock.sleep(0.5)
             
             # 获取脚本的实际执行结果
-            success = ssh_service.simulator.get_script_result(script_id)
+            success = ssh_service.simulator_for(robot_id).get_script_result(script_id)
             if success:
                 stdout = "Head-hand calibration simulation completed successfully"
                 stderr = ""
@@ -1336,20 +1598,25 @@ async def debug_joints(
             joint_names.append(joint_name)
             positions.append(float(joint_position))
         
-        # 构建ROS命令
-        # 格式化名称列表和位置列表
-        names_str = ", ".join([f"'{name}'" for name in joint_names])
-        positions_str = ", ".join([str(pos) for pos in positions])
-        
-        # 构建完整的rostopic pub命令
-        command = f"""rostopic pub -1 /kuavo_arm_traj sensor_msgs/JointState "header: {{seq: 0, stamp: {{secs: 0, nsecs: 0}}, frame_id: ''}}
+        # 优先通过常驻发布通道发送（无需每次启动ROS节点）
+        targets = dict(zip(joint_names, positions))
+        command = f"[常驻发布] {PUBLISH_TOPIC} {targets}"
+        published = await joint_command_publisher.publish(robot_id, targets)
+        success = bool(published)
+        stderr = "" if published is not False else "常驻发布通道未确认发布（目标可能已发送，未重发）"
+        
+        if published is None:
+            # 常驻发布通道不可用时退回rostopic pub（已写入通道但未确认时不重发，避免重复执行）
+            names_str = ", ".join([f"'{name}'" for name in joint_names])
+            positions_str = ", ".join([str(pos) for pos in positions])
+            
+            command = f"""rostopic pub -1 /kuavo_arm_traj sensor_msgs/JointState "header: {{seq: 0, stamp: {{secs: 0, nsecs: 0}}, frame_id: ''}}
 name: [{names_str}]
 position: [{positions_str}]
 velocity: []
 effort: []" """
-        
-        # 执行命令
-        success, stdout, stderr = await ssh_service.execute_command(robot_id, command)
+            
+            success, stdout, stderr = await ssh_service.execute_command(robot_id, command)
         
         if success:
             # 广播日志消息
@@ -1394,4 +1661,93 @@ effort: []" """
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"执行关节调试时发生错误: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+async def _run_joint_jog(websocket: WebSocket, session):
+    """运行调节会话的发布循环，出错时通知客户端并关闭连接"""
+    try:
+        await joint_jog_service.run(session, websocket.send_json)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        try:
+            await websocket.send_json({"type": "jog_error", "message": f"关节调节已中止: {str(e)}"})
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except Exception:
+            pass
+
+
+@router.websocket("/{robot_id}/joint-jog")
+async def joint_jog(websocket: WebSocket, robot_id: str):
+    """
+    关节连续调节（WebSocket）
+    
+    客户端先发送start消息指定关节，随后持续发送target消息；服务端按固定频率
+    发布最新目标，每个周期执行安全限制，并回传关节状态流中的实测位置。
+    """
+    await websocket.accept()
+    
+    if not ssh_service.is_connected(robot_id):
+        await websocket.send_json({"type": "jog_error", "message": "机器人未连接"})
+        await websocket.close()
+        return
+    
+    session = None
+    tick_task = None
+    
+    try:
+        while True:
+            data = await websocket.receive_json()
+            message_type = data.get("type")
+            
+            if message_type == "start":
+                if session:
+                    await websocket.send_json({"type": "jog_error", "message": "调节会话已开始"})
+                    continue
+                try:
+                    session = await joint_jog_service.start(robot_id, data.get("joints", []), data.get("rate"))
+                except Exception as e:
+                    await websocket.send_json({"type": "jog_error", "message": str(e)})
+                    continue
+                
+                tick_task = asyncio.create_task(_run_joint_jog(websocket, session))
+                await websocket.send_json({
+                    "type": "jog_started",
+                    "data": {
+                        "robot_id": robot_id,
+                        "rate": session.rate,
+                        "references": {
+                            name: (None if np.isnan(value) else float(value))
+                            for name, value in zip(session.names, session.references)
+                        },
+                        "reference_sources": session.reference_sources,
+                        "limits": {"advisory": OFFSET_ADVISORY_LIMIT, "hard": OFFSET_HARD_LIMIT}
+                    }
+                })
+            
+            elif message_type == "target":
+                if not session:
+                    await websocket.send_json({"type": "jog_error", "message": "请先发送start消息"})
+                    continue
+                unknown = session.set_targets(data.get("positions", {}))
+                if unknown:
+                    await websocket.send_json({"type": "jog_error", "message": f"未知关节: {unknown}"})
+            
+            elif message_type == "stop":
+                break
+    
+    except WebSocketDisconnect:
+        logger.info(f"关节调节连接已断开: {robot_id}")
+    except Exception as e:
+        logger.error(f"关节调节错误: {str(e)}")
+    finally:
+        if tick_task:
+            tick_task.cancel()
+        summary = joint_jog_service.stop(robot_id) if session else None
+        if summary:
+            try:
+                await websocket.send_json({"type": "jog_stopped", "data": summary})
+                await websocket.close()
+            except Exception:
+                pass
\ No newline at end of file
@@ -4,11 +4,15 @@ import json
 import logging
 import asyncio
 
+from app.core.metrics import metrics
 from app.schemas.robot import RobotConnectionStatus
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+WS_SEND_SECONDS = metrics.histogram("kuavo_ws_send_seconds", "WebSocket消息发送耗时", ["type"])
+WS_SEND_FAILURES = metrics.counter("kuavo_ws_send_failures_total", "WebSocket消息发送失败数", ["type"])
+
 
 class ConnectionManager:
     """WebSocket连接管理器"""
@@ -45,8 +49,10 @@ class ConnectionManager:
                         "type": message_type,
                         "data": data
                     }
-                await self.active_connections[client_id].send_json(message)
+                with WS_SEND_SECONDS.time(timing="ws", type=message.get("type")):
+                    await self.active_connections[client_id].send_json(message)
             except Exception as e:
+                WS_SEND_FAILURES.inc(type=message.get("type") if message else None)
                 logger.error(f"发送消息失败: {str(e)}")
                 self.disconnect(client_id)
     
@@ -55,8 +61,10 @@ class ConnectionManager:
         disconnected_clients = []
         for client_id, connection in self.active_connections.items():
             try:
-                await connection.send_json(message)
+                with WS_SEND_SECONDS.time(timing="ws", type=message.get("type")):
+                    await connection.send_json(message)
             except Exception as e:
+                WS_SEND_FAILURES.inc(type=message.get("type"))
                 logger.error(f"广播消息失败: {str(e)}")
                 disconnected_clients.append(client_id)
         
@@ -95,12 +103,17 @@ class ConnectionManager:
 # 创建全局连接管理器
 connection_manager = ConnectionManager()
 
+metrics.gauge("kuavo_ws_connections", "WebSocket连接数", lambda: len(connection_manager.active_connections))
+
 
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """WebSocket端点"""
     await connection_manager.connect(websocket, client_id)
     
+    # 关节状态流转发任务: robot_id -> task
+    joint_state_tasks: Dict[str, asyncio.Task] = {}
+    
     try:
         # 发送欢迎消息
         await connection_manager.send_message(client_id, message={
@@ -123,6 +136,33 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         
         heartbeat_task = asyncio.create_task(heartbeat())
         
+        async def forward_joint_states(robot_id: str):
+            from app.services.joint_state_streamer import joint_state_streamer
+            
+            queue = await joint_state_streamer.subscribe(robot_id)
+            if queue is None:
+                await connection_manager.send_message(client_id, message={
+                    "type": "joint_states_error",
+                    "robot_id": robot_id,
+                    "message": "关节状态流不可用"
+                })
+                return
+            
+            try:
+                while True:
+                    frame = await queue.get()
+                    await connection_manager.send_message(client_id, message={
+                        "type": "joint_states",
+                        "data": {
+                            "robot_id": robot_id,
+                            "seq": frame.seq,
+                            "stamp": frame.stamp,
+                            "positions": frame.positions
+                        }
+                    })
+            finally:
+                joint_state_streamer.unsubscribe(robot_id, queue)
+        
         # 接收消息
         while True:
             data = await websocket.receive_json()
@@ -146,6 +186,16 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                         "robot_id": robot_id
                     })
             
+            elif data.get("type") == "subscribe_joint_states":
+                robot_id = data.get("robot_id")
+                if robot_id and robot_id not in joint_state_tasks:
+                    joint_state_tasks[robot_id] = asyncio.create_task(forward_joint_states(robot_id))
+            
+            elif data.get("type") == "unsubscribe_joint_states":
+                task = joint_state_tasks.pop(data.get("robot_id"), None)
+                if task:
+                    task.cancel()
+            
             elif data.get("type") == "ping":
                 await connection_manager.send_message(client_id, message={
                     "type": "pong",
@@ -158,6 +208,8 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         logger.error(f"WebSocket错误: {str(e)}")
     finally:
         heartbeat_task.cancel()
+        for task in joint_state_tasks.values():
+            task.cancel()
         connection_manager.disconnect(client_id)
 
 
@@ -19,10 +19,40 @@ class Settings(BaseSettings):
     # WebSocket配置
     WS_HEARTBEAT_INTERVAL: int = 30
     
+    # 运行指标（/metrics 和 Server-Timing 响应头），关闭后热点路径不再计时
+    METRICS_ENABLED: bool = True
+    
+    # 事件循环阻塞监测：心跳间隔和判定为阻塞的延迟阈值（秒），超过阈值时抓取事件循环线程的调用栈
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL: float = 0.1
+    LOOP_WATCHDOG_THRESHOLD: float = 0.25
+    
     # 标定脚本路径
     CALIBRATION_SCRIPT_ZERO_POINT: str = "roslaunch humanoid_controllers load_kuavo_real.launch cali:=true"
     CALIBRATION_SCRIPT_HEAD_HAND: str = "/root/kuavo_ws/src/kuavo-ros-opensource/scripts/joint_cali/One_button_start.sh"
     
+    # 标定文件归档保留策略（每台机器人每种文件）
+    CALIBRATION_ARCHIVE_MAX_VERSIONS: int = 50
+    CALIBRATION_ARCHIVE_MAX_AGE_DAYS: int = 180
+    
+    # 批量零点标定默认并发数（同时进行标定的工位数）
+    ZERO_POINT_BATCH_CONCURRENCY: int = 4
+    # 批量零点标定单步超时（秒）：一键标零步骤单独设置，其余步骤共用
+    ZERO_POINT_BATCH_STEP_TIMEOUT: float = 120.0
+    ZERO_POINT_BATCH_CALIBRATION_TIMEOUT: float = 900.0
+    
+    # 零点标定会话日志缓冲上限（超出后丢弃最旧的行）
+    ZERO_POINT_LOG_MAX_LINES: int = 5000
+    ZERO_POINT_LOG_MAX_BYTES: int = 1024 * 1024
+    
+    # 模拟器虚拟时钟：倍速、手动步进模式、随机种子（固定种子使模拟结果可复现）
+    SIMULATOR_SPEED: float = 1.0
+    SIMULATOR_MANUAL_CLOCK: bool = False
+    SIMULATOR_SEED: Optional[int] = None
+    
+    # 模拟器网络条件预设：ideal / lan / wifi / congested_wifi / flaky
+    SIMULATOR_NETWORK_PROFILE: str = "ideal"
+    
     class Config:
         env_file = ".env"
 
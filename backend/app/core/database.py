@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from .config import settings
+from .metrics import metrics, record_timing
 
 # 创建数据库引擎
 engine = create_engine(
@@ -10,6 +13,27 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # SQLite特有的配置
 )
 
+DB_QUERY_SECONDS = metrics.histogram("kuavo_db_query_seconds", "SQL语句执行耗时", ["operation"])
+DB_SESSION_SECONDS = metrics.histogram("kuavo_db_session_seconds", "请求占用数据库会话的时长")
+metrics.gauge("kuavo_db_pool_checked_out", "已借出的数据库连接数", lambda: engine.pool.checkedout())
+
+if metrics.enabled:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_SECONDS.observe(elapsed, operation=statement.lstrip().split(None, 1)[0].upper())
+        record_timing("db", elapsed)
+    
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # 执行失败的语句不会触发after_cursor_execute
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -20,14 +44,17 @@ Base = declarative_base()
 def get_db():
     """依赖注入函数，用于获取数据库会话"""
     db = SessionLocal()
+    start = time.perf_counter()
     try:
         yield db
     finally:
         db.close()
+        DB_SESSION_SECONDS.observe(time.perf_counter() - start)
 
 
 def init_db():
     """初始化数据库，创建所有表"""
     from app.models.robot import Robot  # 导入所有模型
-    from app.models.calibration import CalibrationSession
+    from app.models.calibration import CalibrationSession, CalibrationSessionState
+    from app.models.calibration_archive import CalibrationBlob, CalibrationSnapshot
     Base.metadata.create_all(bind=engine)
\ No newline at end of file
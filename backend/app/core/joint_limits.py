@@ -0,0 +1,47 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# 关节参数限制（弧度）
+OFFSET_ADVISORY_LIMIT = 0.05   # 偏移值建议范围，超过给出警告
+OFFSET_HARD_LIMIT = 0.1        # 偏移值强制限制，超过拒绝保存
+ZERO_POSITION_LIMIT = 10.0     # 零点值异常阈值
+OFFSET_SANITY_LIMIT = 5.0      # 偏移值异常阈值
+POSITION_DEVIATION_LIMIT = 3.0 # 当前位置与零点差异阈值
+
+
+def offset_limit_masks(offset: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    偏移值范围检查
+    
+    Returns:
+        (warning_mask, error_mask): 超过建议范围和超过强制限制的掩码
+    """
+    magnitude = np.abs(np.asarray(offset, dtype=np.float64))
+    error_mask = magnitude > OFFSET_HARD_LIMIT
+    warning_mask = (magnitude > OFFSET_ADVISORY_LIMIT) & ~error_mask
+    return warning_mask, error_mask
+
+
+def offset_limit_messages(
+    names: Sequence[str],
+    offset: Sequence[float],
+    warning_mask: Optional[np.ndarray] = None,
+    error_mask: Optional[np.ndarray] = None
+) -> Tuple[List[str], List[str]]:
+    """生成偏移值超限的警告和错误信息（可传入已计算好的掩码）"""
+    offset = np.asarray(offset, dtype=np.float64)
+    if warning_mask is None or error_mask is None:
+        warning_mask, error_mask = offset_limit_masks(offset)
+    warnings = [
+        f"关节 {names[row]} 的偏移值 {offset[row]:.4f} "
+        f"超过建议范围(±{OFFSET_ADVISORY_LIMIT})，请谨慎操作"
+        for row in np.flatnonzero(warning_mask)
+    ]
+    errors = [
+        f"关节 {names[row]} 的偏移值 {offset[row]:.4f} "
+        f"超过安全范围(±{OFFSET_HARD_LIMIT})，可能导致机器人损坏"
+        for row in np.flatnonzero(error_mask)
+    ]
+    return warnings, errors
\ No newline at end of file
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# 后端源码根目录（用于在调用栈中定位阻塞点所在的业务代码）
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MAX_OFFENDERS = 50          # 保留的阻塞位置数量（按累计阻塞时长淘汰）
+EXPORTED_OFFENDERS = 10     # /metrics 中导出的阻塞位置数量
+STACK_DEPTH = 30            # 保存的调用栈帧数
+
+LOOP_LAG_SECONDS = metrics.histogram(
+    "kuavo_event_loop_lag_seconds", "事件循环调度延迟（心跳实际间隔与预期间隔之差）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = metrics.counter("kuavo_event_loop_stalls_total", "事件循环阻塞次数（延迟超过阈值）")
+
+
+def _is_backend_frame(filename: str) -> bool:
+    return (
+        filename.startswith(BACKEND_ROOT)
+        and "site-packages" not in filename
+        and os.path.abspath(filename) != os.path.abspath(__file__)
+    )
+
+
+def _format_frame(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if filename.startswith(BACKEND_ROOT):
+        filename = os.path.relpath(filename, BACKEND_ROOT)
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopWatchdog:
+    """
+    事件循环阻塞监测
+    
+    事件循环上的心跳任务按固定间隔醒来，实际间隔与预期之差即调度延迟；
+    独立的监视线程发现心跳超过阈值未更新时，说明事件循环线程正被同步调用
+    占用，此时通过 sys._current_frames() 抓取该线程的调用栈。阻塞按调用栈
+    中最内层的后端代码位置归类（即哪一行业务代码发起了阻塞调用），累计次数
+    和时长，最严重的位置通过 /metrics 和 /metrics/event-loop 导出。
+    """
+    
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+        
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._pending: Optional[Dict[str, Any]] = None   # 监视线程抓到、心跳尚未恢复的阻塞
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+    
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+    
+    def start(self):
+        """在事件循环中启动（由应用lifespan调用）"""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watcher = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watcher.start()
+        logger.info(f"事件循环阻塞监测已启动（心跳 {self.interval}s，阈值 {self.threshold}s）")
+    
+    async def stop(self):
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+    
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            previous, self._last_beat = self._last_beat, now
+            lag = max(0.0, now - previous - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag, previous)
+    
+    def _watch(self):
+        poll = min(self.interval, self.threshold / 2)
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold:
+                continue
+            with self._lock:
+                if self._pending is not None and self._pending["beat"] == beat:
+                    # 同一次阻塞只抓取一次调用栈，持续时间随监视更新
+                    self._pending["duration"] = stalled
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+            del frame
+            if self._last_beat != beat:
+                # 抓取期间事件循环已恢复
+                continue
+            with self._lock:
+                self._pending = {"beat": beat, "duration": stalled, "stack": stack}
+    
+    def _record_stall(self, lag: float, beat: float):
+        """心跳恢复后记录一次阻塞（运行在事件循环上），beat为阻塞前的最后一次心跳"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if pending is not None and pending["beat"] != beat:
+                # 监视线程抓取时事件循环已恢复，调用栈不属于这次阻塞
+                pending = None
+            self.stalls += 1
+            self.max_lag = max(self.max_lag, lag)
+            if pending is None:
+                # 阻塞时间短于监视线程的轮询间隔，未抓到调用栈
+                location, blocking_call, stack = "unknown", None, []
+            else:
+                stack = pending["stack"]
+                backend_frames = [frame for frame in stack if _is_backend_frame(frame.filename)]
+                location = _format_frame(backend_frames[-1]) if backend_frames else _format_frame(stack[-1])
+                blocking_call = _format_frame(stack[-1])
+            
+            offender = self.offenders.get(location)
+            if offender is None:
+                offender = self.offenders[location] = {
+                    "location": location, "count": 0, "total_seconds": 0.0, "max_seconds": 0.0
+                }
+            offender["count"] += 1
+            offender["total_seconds"] += lag
+            offender["max_seconds"] = max(offender["max_seconds"], lag)
+            offender["last_seen"] = datetime.now().isoformat()
+            if stack:
+                offender["blocking_call"] = blocking_call
+                offender["stack"] = [_format_frame(frame) for frame in stack]
+            self._trim_offenders()
+        LOOP_STALLS.inc()
+        logger.warning(f"事件循环阻塞 {lag:.3f}s: {location}")
+    
+    def _trim_offenders(self):
+        if len(self.offenders) <= MAX_OFFENDERS:
+            return
+        ranked = sorted(self.offenders.values(), key=lambda item: item["total_seconds"], reverse=True)
+        self.offenders = {item["location"]: item for item in ranked[:MAX_OFFENDERS]}
+    
+    def worst_offenders(self, limit: int = EXPORTED_OFFENDERS) -> List[Dict[str, Any]]:
+        """按累计阻塞时长排序的阻塞位置"""
+        with self._lock:
+            ranked = sorted(self.offenders.values(), key=lambda item: item["total_seconds"], reverse=True)
+            return [dict(item, total_seconds=round(item["total_seconds"], 3),
+                         max_seconds=round(item["max_seconds"], 3)) for item in ranked[:limit]]
+    
+    def report(self, limit: int = MAX_OFFENDERS) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending
+            current = None
+            if pending is not None:
+                current = {
+                    "duration": round(pending["duration"], 3),
+                    "stack": [_format_frame(frame) for frame in pending["stack"]]
+                }
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "stalls": self.stalls,
+            "max_lag": round(self.max_lag, 3),
+            "current_stall": current,
+            "offenders": self.worst_offenders(limit)
+        }
+    
+    def reset(self):
+        with self._lock:
+            self.stalls = 0
+            self.max_lag = 0.0
+            self.offenders = {}
+
+
+# 全局事件循环阻塞监测实例
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL,
+    threshold=settings.LOOP_WATCHDOG_THRESHOLD
+)
+
+metrics.gauge("kuavo_event_loop_max_lag_seconds", "事件循环最大调度延迟", lambda: loop_watchdog.max_lag)
+metrics.gauge(
+    "kuavo_event_loop_blocked_seconds", "各阻塞位置的累计阻塞时长（最严重的若干个）",
+    lambda: {(item["location"],): item["total_seconds"] for item in loop_watchdog.worst_offenders()},
+    ["location"]
+)
\ No newline at end of file
@@ -0,0 +1,286 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import settings
+
+
+# 默认的耗时分桶（秒），覆盖亚毫秒级的解析到数秒的SSH往返
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 当前请求的分项耗时: 名称 -> [累计秒数, 次数]（由ServerTimingMiddleware在每个请求开始时设置）
+_request_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(name: str, seconds: float):
+    """把一段耗时计入当前请求的Server-Timing（不在请求中时忽略）"""
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    entry = timings.get(name)
+    if entry is None:
+        timings[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+
+def _route_template(scope) -> str:
+    """
+    请求匹配到的路由模板（如 /api/v1/robots/{robot_id}/status），用作指标标签
+    
+    嵌套路由下 scope["route"].path 只是相对所在路由器的路径，这里按实际请求
+    路径补回前缀；未匹配到路由的请求统一记为 unmatched，避免标签数量失控。
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    try:
+        rendered = template.format(**{key: str(value) for key, value in scope.get("path_params", {}).items()})
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope.get("path", "")
+    if path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """指标基类：按标签值分组保存数据"""
+    type = ""
+    
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+    
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def _label_text(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(f'{extra[0]}="{extra[1]}"')
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self._samples()
+    
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增计数器"""
+    type = "counter"
+    
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {value}" for key, value in items]
+
+
+class _Timer:
+    """计时上下文：结束时记入直方图，并可计入当前请求的Server-Timing"""
+    __slots__ = ("histogram", "labels", "timing", "start")
+    
+    def __init__(self, histogram: "Histogram", labels: Dict[str, object], timing: Optional[str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.timing = timing
+        self.start = 0.0
+    
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(elapsed, **self.labels)
+        if self.timing:
+            record_timing(self.timing, elapsed)
+
+
+class _NoopTimer:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class Histogram(_Metric):
+    """耗时直方图（固定分桶）"""
+    type = "histogram"
+    
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, seconds: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各分桶计数（最后一项为+Inf）, 总和, 总数]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += seconds
+            state[2] += 1
+    
+    def time(self, timing: Optional[str] = None, **labels):
+        """计时上下文，timing指定时同时计入当前请求的Server-Timing"""
+        if not self.registry.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, labels, timing)
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._label_text(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {total}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """瞬时值，在导出时调用回调获取（回调返回数值，或 标签值元组 -> 数值）"""
+    type = "gauge"
+    
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str,
+                 callback: Callable[[], object], labels: Sequence[str] = ()):
+        super().__init__(registry, name, help, labels)
+        self.callback = callback
+    
+    def _samples(self) -> List[str]:
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [f"{self.name}{self._label_text(tuple(map(str, key)))} {item}" for key, item in value.items()]
+        return [f"{self.name} {value}"]
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+    
+    热点路径上的计数和计时在关闭时直接返回（计时返回共享的空上下文），
+    开销只有一次属性判断。/metrics 按Prometheus文本格式导出全部指标。
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # 同名指标只注册一次（模块重复导入时复用已有实例）
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labels))
+    
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help, labels, buckets))
+    
+    def gauge(self, name: str, help: str, callback: Callable[[], object], labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help, callback, labels))
+    
+    def render(self) -> str:
+        with self._lock:
+            metrics: Iterable[_Metric] = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "kuavo_http_request_seconds", "HTTP请求处理耗时", ["method", "route", "status"]
+)
+
+
+class ServerTimingMiddleware:
+    """
+    请求耗时中间件（ASGI）
+    
+    为每个HTTP请求收集SSH/数据库/WebSocket发送/解析等分项耗时，写入响应的
+    Server-Timing头（浏览器开发者工具的Timing面板可直接查看），并记录请求
+    耗时直方图。
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        timings: Dict[str, List[float]] = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = [500]
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                total = time.perf_counter() - start
+                entries = [
+                    f'{name};dur={seconds * 1000:.2f};desc="{int(count)}x"'
+                    for name, (seconds, count) in timings.items()
+                ]
+                entries.append(f"app;dur={total * 1000:.2f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, method=scope["method"], route=_route_template(scope), status=status[0]
+            )
\ No newline at end of file
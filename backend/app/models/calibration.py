@@ -33,4 +33,15 @@ class CalibrationSession(Base):
             "error_message": self.error_message,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None
-        }
\ No newline at end of file
+        }
+
+
+class CalibrationSessionState(Base):
+    """进行中标定会话的状态快照（后端重启后据此恢复会话）"""
+    __tablename__ = "calibration_session_states"
+    
+    session_id = Column(String, primary_key=True)
+    service = Column(String, nullable=False)  # zero_point, calibration
+    robot_id = Column(String, nullable=False, index=True)
+    state = Column(Text, nullable=False)  # JSON快照
+    updated_at = Column(DateTime(timezone=True))
\ No newline at end of file
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+import uuid
+
+
+class CalibrationBlob(Base):
+    """标定文件内容（按sha256去重存储）"""
+    __tablename__ = "calibration_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    content = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CalibrationSnapshot(Base):
+    """标定文件版本快照"""
+    __tablename__ = "calibration_snapshots"
+    __table_args__ = (
+        Index("ix_calibration_snapshots_sn_type", "robot_sn", "file_type", "created_at"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    robot_sn = Column(String, nullable=False)  # 按机器人SN归档，机器人重新添加后历史仍可追溯
+    robot_id = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)  # arms_zero, legs_offset
+    blob_sha256 = Column(String(64), ForeignKey("calibration_blobs.sha256"), nullable=False)
+    source = Column(String, default="read")  # read, write, rollback
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "robot_sn": self.robot_sn,
+            "robot_id": self.robot_id,
+            "file_type": self.file_type,
+            "sha256": self.blob_sha256,
+            "source": self.source,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
\ No newline at end of file
@@ -3,6 +3,8 @@ from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 
+from app.core.joint_limits import offset_limit_messages
+
 
 # === 原有的标定Schemas ===
 class CalibrationStartRequest(BaseModel):
@@ -93,6 +95,57 @@ class ZeroPointSessionResponse(BaseModel):
     joint_data: List[JointDataSchema] = []
 
 
+class ZeroPointBatchStartRequest(BaseModel):
+    """批量零点标定开始请求"""
+    robot_ids: List[str] = Field(..., min_length=1, description="参与标定的机器人ID列表")
+    tools_confirmed: bool = Field(
+        default=False,
+        description="操作员确认已在所有工位检查工装安装（必须为true）"
+    )
+    confirmed_by: str = Field(..., min_length=1, description="确认工装的操作员")
+    calibration_type: str = Field(
+        default="full_body", 
+        description="标定类型: full_body, arms_only, legs_only"
+    )
+    max_concurrency: Optional[int] = Field(
+        default=None, 
+        ge=1, 
+        description="同时标定的机器人数量，默认使用 ZERO_POINT_BATCH_CONCURRENCY"
+    )
+
+
+class ZeroPointBatchRobotResponse(BaseModel):
+    """批量标定中单台机器人的状态"""
+    robot_id: str
+    state: str = Field(..., description="queued, confirm_tools, read_config, initialize_zero, save_zero, completed, failed, cancelled")
+    session_id: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration: Optional[float] = None
+    error_message: Optional[str] = None
+    warnings: List[str] = []
+
+
+class ZeroPointBatchResponse(BaseModel):
+    """批量零点标定状态响应"""
+    batch_id: str
+    calibration_type: str
+    status: str = Field(..., description="running, completed, partial, failed, cancelled")
+    max_concurrency: int
+    tools_confirmed_by: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    total: int
+    finished: int
+    progress: float
+    counts: Dict[str, int]
+    robots: List[ZeroPointBatchRobotResponse]
+    validation: Dict[str, Dict[str, List[str]]] = Field(
+        default_factory=dict, 
+        description="关节数据检查结果 {robot_id: {warnings, errors}}：成功的机器人在批次结束后检查，偏移超限的机器人在保存前检查"
+    )
+
+
 # === 标定文件管理Schemas ===
 class CalibrationFileInfoResponse(BaseModel):
     """标定文件信息响应"""
@@ -104,6 +157,55 @@ class CalibrationFileInfoResponse(BaseModel):
     file_size: int
 
 
+class BackupFileInfoResponse(BaseModel):
+    """备份文件信息"""
+    file_path: str
+    file_name: str
+    last_modified: datetime
+    file_size: int
+
+
+class CalibrationFilesOverviewResponse(BaseModel):
+    """全部标定文件信息响应"""
+    robot_id: str
+    files: List[CalibrationFileInfoResponse] = Field(..., description="arms_zero.yaml 与 offset.csv 的文件信息")
+    head_cali_backups: List[BackupFileInfoResponse] = Field(default_factory=list, description="头手标定生成的备份文件")
+    backups: List[BackupFileInfoResponse] = Field(default_factory=list, description="backup目录中的备份文件，按时间倒序")
+
+
+class CalibrationVersionResponse(BaseModel):
+    """标定文件归档版本"""
+    id: str
+    robot_sn: str
+    robot_id: str
+    file_type: str
+    sha256: str
+    source: str = Field(..., description="版本来源: read, write, rollback")
+    size: int
+    created_at: Optional[datetime]
+
+
+class CalibrationVersionContentResponse(CalibrationVersionResponse):
+    """标定文件归档版本（含内容）"""
+    content: str
+
+
+class CalibrationVersionDiffResponse(BaseModel):
+    """标定文件版本差异"""
+    from_version: str
+    to_version: str
+    identical: bool
+    diff: str = Field(..., description="unified diff格式的差异内容")
+
+
+class CalibrationRollbackResponse(BaseModel):
+    """标定文件回滚结果"""
+    message: str
+    version_id: str
+    file_type: str
+    sha256: str
+
+
 class JointDataUpdateRequest(BaseModel):
     """关节数据更新请求"""
     joint_data: List[JointDataSchema]
@@ -111,24 +213,11 @@ class JointDataUpdateRequest(BaseModel):
     @validator('joint_data')
     def validate_joint_data_changes(cls, joint_data_list):
         """验证关节数据修改范围"""
-        warnings = []
-        errors = []
-        
-        for joint_data in joint_data_list:
-            # 检查偏移值是否超过建议范围
-            if abs(joint_data.offset) > 0.05:
-                if abs(joint_data.offset) > 0.1:
-                    # 超过0.1认为是危险操作
-                    errors.append(
-                        f"关节 {joint_data.name} 的偏移值 {joint_data.offset:.4f} "
-                        f"超过安全范围(±0.1)，可能导致机器人损坏"
-                    )
-                else:
-                    # 超过0.05给出警告
-                    warnings.append(
-                        f"关节 {joint_data.name} 的偏移值 {joint_data.offset:.4f} "
-                        f"超过建议范围(±0.05)，请谨慎操作"
-                    )
+        # 整列向量化检查：超过0.05给出警告，超过0.1认为是危险操作
+        warnings, errors = offset_limit_messages(
+            [joint_data.name for joint_data in joint_data_list],
+            [joint_data.offset for joint_data in joint_data_list]
+        )
         
         # 如果有严重错误，抛出验证异常
         if errors:
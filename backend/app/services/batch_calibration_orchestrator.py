@@ -0,0 +1,364 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional, Any
+
+from app.core.config import settings
+from app.api.websocket import connection_manager
+from app.services.ssh_service import ssh_service
+from app.services.calibration_file_service import calibration_file_service
+from app.services.zero_point_calibration_service import (
+    zero_point_calibration_service,
+    ZeroPointStep,
+    ZeroPointStatus
+)
+
+logger = logging.getLogger(__name__)
+
+
+MAX_BATCH_CONCURRENCY = 32   # 并发上限（防止配置过大压垮SSH与事件循环）
+MAX_FINISHED_BATCHES = 20    # 保留的已结束批次数量
+
+
+class BatchRobotState(Enum):
+    """批量标定中单台机器人的状态"""
+    QUEUED = "queued"                    # 等待空闲标定工位
+    CONFIRM_TOOLS = "confirm_tools"      # 步骤1: 确认工装（批量启动请求中由操作员统一确认）
+    READ_CONFIG = "read_config"          # 步骤2: 读取当前配置
+    INITIALIZE_ZERO = "initialize_zero"  # 步骤3: 执行一键标零
+    SAVE_ZERO = "save_zero"              # 步骤4: 保存零点数据
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_ROBOT_STATES = (BatchRobotState.COMPLETED, BatchRobotState.FAILED, BatchRobotState.CANCELLED)
+
+
+class BatchStatus(Enum):
+    """批量标定状态"""
+    RUNNING = "running"
+    COMPLETED = "completed"              # 全部成功
+    PARTIAL = "partial"                  # 部分失败
+    FAILED = "failed"                    # 全部失败
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class BatchRobotRun:
+    """单台机器人的标定状态机"""
+    robot_id: str
+    state: BatchRobotState = BatchRobotState.QUEUED
+    session_id: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+    joint_data: List[Any] = field(default_factory=list)  # 保存的标定结果（会话结束后会被清理，这里留存一份）
+    task: Optional[asyncio.Task] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at:
+            duration = round(((self.finished_at or datetime.now()) - self.started_at).total_seconds(), 3)
+        return {
+            "robot_id": self.robot_id,
+            "state": self.state.value,
+            "session_id": self.session_id,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration": duration,
+            "error_message": self.error_message,
+            "warnings": self.warnings
+        }
+
+
+@dataclass
+class CalibrationBatch:
+    """批量零点标定"""
+    batch_id: str
+    calibration_type: str
+    max_concurrency: int
+    robots: Dict[str, BatchRobotRun]
+    tools_confirmed_by: str
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    status: BatchStatus = BatchStatus.RUNNING
+    validation: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+    cancel_requested: bool = False
+    task: Optional[asyncio.Task] = None
+    
+    def counts(self) -> Dict[str, int]:
+        counts = {state.value: 0 for state in BatchRobotState}
+        for run in self.robots.values():
+            counts[run.state.value] += 1
+        return counts
+    
+    def to_dict(self) -> Dict[str, Any]:
+        finished = sum(1 for run in self.robots.values() if run.state in FINISHED_ROBOT_STATES)
+        return {
+            "batch_id": self.batch_id,
+            "calibration_type": self.calibration_type,
+            "status": self.status.value,
+            "max_concurrency": self.max_concurrency,
+            "tools_confirmed_by": self.tools_confirmed_by,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "total": len(self.robots),
+            "finished": finished,
+            "progress": round(finished / len(self.robots), 3) if self.robots else 1.0,
+            "counts": self.counts(),
+            "robots": [run.to_dict() for run in self.robots.values()],
+            "validation": self.validation
+        }
+
+
+class BatchCalibrationOrchestrator:
+    """
+    多机器人并行零点标定编排服务
+    
+    每台机器人按零点标定的4个步骤独立推进（各自一个状态机），并发数由
+    信号量限制，等于可同时工作的标定工位数。每个步骤有超时限制，超时的
+    机器人判为失败并清理其标定进程，不占用工位。整体进度通过WebSocket广播
+    batch_calibration_progress消息。
+    """
+    
+    def __init__(self):
+        self.batches: Dict[str, CalibrationBatch] = {}
+    
+    async def start_batch(
+        self,
+        robot_ids: List[str],
+        tools_confirmed_by: str,
+        calibration_type: str = "full_body",
+        max_concurrency: Optional[int] = None
+    ) -> CalibrationBatch:
+        """
+        开始批量零点标定
+        
+        Args:
+            robot_ids: 参与标定的机器人ID
+            tools_confirmed_by: 已在所有工位检查工装安装的操作员（批量流程中代替逐台的工装确认）
+            calibration_type: 标定类型
+            max_concurrency: 并发数，默认使用 ZERO_POINT_BATCH_CONCURRENCY
+        """
+        robot_ids = list(dict.fromkeys(robot_ids))
+        if not robot_ids:
+            raise Exception("请提供要标定的机器人列表")
+        
+        if not tools_confirmed_by or not tools_confirmed_by.strip():
+            raise Exception("请由操作员确认所有工位的工装已安装")
+        
+        if calibration_type not in zero_point_calibration_service.tool_confirmations:
+            raise Exception(f"不支持的标定类型: {calibration_type}")
+        
+        # 同一台机器人不能同时出现在两个进行中的批次里
+        busy = [
+            robot_id for batch in self.batches.values() if batch.status == BatchStatus.RUNNING
+            for robot_id in robot_ids
+            if robot_id in batch.robots and batch.robots[robot_id].state not in FINISHED_ROBOT_STATES
+        ]
+        if busy:
+            raise Exception(f"以下机器人已在进行中的批量标定里: {', '.join(busy)}")
+        
+        concurrency = max_concurrency or settings.ZERO_POINT_BATCH_CONCURRENCY
+        concurrency = max(1, min(int(concurrency), MAX_BATCH_CONCURRENCY, len(robot_ids)))
+        
+        batch = CalibrationBatch(
+            batch_id=f"zero_point_batch_{uuid.uuid4().hex[:12]}",
+            calibration_type=calibration_type,
+            max_concurrency=concurrency,
+            robots={robot_id: BatchRobotRun(robot_id=robot_id) for robot_id in robot_ids},
+            tools_confirmed_by=tools_confirmed_by.strip()
+        )
+        self._cleanup_finished_batches()
+        self.batches[batch.batch_id] = batch
+        
+        logger.info(
+            f"批量零点标定 {batch.batch_id} 开始: {len(robot_ids)} 台机器人，并发 {concurrency}，"
+            f"工装由 {batch.tools_confirmed_by} 确认: {', '.join(robot_ids)}"
+        )
+        batch.task = asyncio.create_task(self._run_batch(batch))
+        await self._broadcast_progress(batch)
+        
+        return batch
+    
+    def get_batch(self, batch_id: str) -> Optional[CalibrationBatch]:
+        return self.batches.get(batch_id)
+    
+    def list_batches(self) -> List[CalibrationBatch]:
+        return sorted(self.batches.values(), key=lambda batch: batch.created_at, reverse=True)
+    
+    async def cancel_batch(self, batch_id: str) -> CalibrationBatch:
+        """取消批量标定（未开始的机器人不再启动，进行中的会话被取消）"""
+        batch = self.batches.get(batch_id)
+        if not batch:
+            raise Exception("批量标定不存在")
+        
+        if batch.status != BatchStatus.RUNNING:
+            return batch
+        
+        batch.cancel_requested = True
+        for run in batch.robots.values():
+            if run.task and not run.task.done():
+                run.task.cancel()
+        if batch.task:
+            await asyncio.gather(batch.task, return_exceptions=True)
+        
+        logger.info(f"批量零点标定 {batch.batch_id} 已取消")
+        return batch
+    
+    async def _run_batch(self, batch: CalibrationBatch):
+        semaphore = asyncio.Semaphore(batch.max_concurrency)
+        
+        for run in batch.robots.values():
+            run.task = asyncio.create_task(self._run_robot(batch, run, semaphore))
+        await asyncio.gather(*(run.task for run in batch.robots.values()), return_exceptions=True)
+        
+        # 所有完成的机器人一次性做偏移范围检查，作为批次的验收报告
+        # （超限的机器人在保存前已判为失败，其检查结果已写入validation）
+        completed = {
+            run.robot_id: run.joint_data for run in batch.robots.values()
+            if run.state == BatchRobotState.COMPLETED
+        }
+        if completed:
+            batch.validation.update(calibration_file_service.validate_joint_data_batch(completed))
+        
+        counts = batch.counts()
+        if counts[BatchRobotState.CANCELLED.value]:
+            batch.status = BatchStatus.CANCELLED
+        elif counts[BatchRobotState.COMPLETED.value] == len(batch.robots):
+            batch.status = BatchStatus.COMPLETED
+        elif counts[BatchRobotState.COMPLETED.value]:
+            batch.status = BatchStatus.PARTIAL
+        else:
+            batch.status = BatchStatus.FAILED
+        batch.finished_at = datetime.now()
+        
+        logger.info(f"批量零点标定 {batch.batch_id} 结束: {batch.status.value} {counts}")
+        await self._broadcast_progress(batch)
+    
+    async def _run_robot(self, batch: CalibrationBatch, run: BatchRobotRun, semaphore: asyncio.Semaphore):
+        """单台机器人的4步状态机"""
+        try:
+            async with semaphore:
+                if batch.cancel_requested:
+                    raise asyncio.CancelledError()
+                run.started_at = datetime.now()
+                
+                # 步骤1：启动会话并确认工装（操作员已在批量启动请求中确认）
+                await self._set_state(batch, run, BatchRobotState.CONFIRM_TOOLS)
+                session = await self._run_step(
+                    run,
+                    zero_point_calibration_service.start_zero_point_calibration(
+                        robot_id=run.robot_id,
+                        calibration_type=batch.calibration_type
+                    )
+                )
+                run.session_id = session.session_id
+                
+                # 确认最后一个工装时服务会自动读取配置（步骤2）并进入步骤3
+                await self._set_state(batch, run, BatchRobotState.READ_CONFIG)
+                await self._run_step(run, self._confirm_tools(batch, session))
+                self._check_session(session, ZeroPointStep.INITIALIZE_ZERO)
+                run.warnings = list(session.warnings)
+                
+                # 步骤3：一键标零
+                await self._set_state(batch, run, BatchRobotState.INITIALIZE_ZERO)
+                await self._run_step(
+                    run,
+                    zero_point_calibration_service.execute_calibration_command(
+                        session.session_id, batch.calibration_type
+                    ),
+                    timeout=settings.ZERO_POINT_BATCH_CALIBRATION_TIMEOUT
+                )
+                self._check_session(session, ZeroPointStep.REMOVE_TOOLS)
+                
+                # 步骤4：保存前检查偏移值，超过强制限制的不写入机器人
+                await self._set_state(batch, run, BatchRobotState.SAVE_ZERO)
+                warnings, errors = zero_point_calibration_service.joint_table_to_save(session).offset_limit_messages()
+                if errors:
+                    batch.validation[run.robot_id] = {"warnings": warnings, "errors": errors}
+                    raise Exception(f"偏移值超过安全范围，未保存零点数据: {'; '.join(errors)}")
+                
+                await self._run_step(run, zero_point_calibration_service.save_zero_point_data(session.session_id))
+                run.joint_data = list(session.current_joint_data)
+                
+                run.finished_at = datetime.now()
+                await self._set_state(batch, run, BatchRobotState.COMPLETED)
+        
+        except asyncio.CancelledError:
+            if run.session_id:
+                try:
+                    await zero_point_calibration_service.cancel_calibration(run.session_id)
+                except Exception as e:
+                    logger.warning(f"取消零点标定会话失败 {run.session_id}: {str(e)}")
+            run.finished_at = datetime.now()
+            await self._set_state(batch, run, BatchRobotState.CANCELLED)
+        
+        except asyncio.TimeoutError:
+            run.error_message = f"步骤 {run.state.value} 超时"
+            logger.error(f"批量标定 {batch.batch_id} 中机器人 {run.robot_id} {run.error_message}，清理标定进程")
+            await self._cleanup_timed_out_robot(run)
+            run.finished_at = datetime.now()
+            await self._set_state(batch, run, BatchRobotState.FAILED)
+        
+        except Exception as e:
+            logger.error(f"批量标定 {batch.batch_id} 中机器人 {run.robot_id} 失败: {str(e)}")
+            run.error_message = str(e)
+            run.finished_at = datetime.now()
+            await self._set_state(batch, run, BatchRobotState.FAILED)
+    
+    @staticmethod
+    async def _run_step(run: BatchRobotRun, step, timeout: Optional[float] = None):
+        """执行单个步骤，超过时限抛出asyncio.TimeoutError（默认 ZERO_POINT_BATCH_STEP_TIMEOUT）"""
+        return await asyncio.wait_for(step, timeout or settings.ZERO_POINT_BATCH_STEP_TIMEOUT)
+    
+    @staticmethod
+    async def _confirm_tools(batch: CalibrationBatch, session):
+        tool_count = len(session.step_progress.get("tool_confirmations", []))
+        logger.info(f"会话 {session.session_id} 的 {tool_count} 项工装由 {batch.tools_confirmed_by} 在批量启动时确认")
+        for tool_index in range(tool_count):
+            await zero_point_calibration_service.confirm_tool(session.session_id, tool_index)
+    
+    async def _cleanup_timed_out_robot(self, run: BatchRobotRun):
+        """超时后结束会话并清理机器人上残留的标定进程"""
+        if run.session_id:
+            await zero_point_calibration_service.fail_session(run.session_id, run.error_message)
+        try:
+            await ssh_service.cleanup_calibration_processes(run.robot_id)
+        except Exception as e:
+            logger.warning(f"清理超时机器人 {run.robot_id} 的标定进程失败: {str(e)}")
+    
+    @staticmethod
+    def _check_session(session, expected_step: ZeroPointStep):
+        """确认会话已推进到预期步骤，否则以会话的错误信息失败"""
+        if session.status in (ZeroPointStatus.FAILED, ZeroPointStatus.CANCELLED):
+            raise Exception(session.error_message or f"零点标定会话{session.status.value}")
+        if session.current_step != expected_step:
+            raise Exception(f"零点标定未进入预期步骤 {expected_step.value}（当前: {session.current_step.value}）")
+    
+    async def _set_state(self, batch: CalibrationBatch, run: BatchRobotRun, state: BatchRobotState):
+        run.state = state
+        await self._broadcast_progress(batch, run)
+    
+    async def _broadcast_progress(self, batch: CalibrationBatch, changed: Optional[BatchRobotRun] = None):
+        """广播批次整体进度（附带本次状态变化的机器人）"""
+        data = batch.to_dict()
+        data["changed_robot"] = changed.to_dict() if changed else None
+        await connection_manager.broadcast({
+            "type": "batch_calibration_progress",
+            "data": data
+        })
+    
+    def _cleanup_finished_batches(self):
+        finished = [batch for batch in self.list_batches() if batch.status != BatchStatus.RUNNING]
+        for batch in finished[MAX_FINISHED_BATCHES:]:
+            del self.batches[batch.batch_id]
+
+
+# 全局批量标定编排实例
+batch_calibration_orchestrator = BatchCalibrationOrchestrator()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import asyncio
+import difflib
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.robot import Robot
+from app.models.calibration_archive import CalibrationBlob, CalibrationSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class CalibrationArchiveService:
+    """
+    标定文件版本归档服务
+    
+    在服务端按机器人SN保存arms_zero.yaml / offset.csv的每个版本。文件内容
+    按sha256去重存储，与最新版本相同的内容不会产生新快照。
+    """
+    
+    def __init__(self):
+        self.file_types = ("arms_zero", "legs_offset")
+    
+    async def archive(self, robot_id: str, file_type: str, content: str, source: str = "read") -> Optional[Dict[str, Any]]:
+        """
+        归档一个文件版本（在线程池中写数据库）
+        
+        归档失败只记录日志，不影响标定文件的读写流程。
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(
+                None, self.record_snapshot, robot_id, file_type, content, source
+            )
+        except Exception as e:
+            logger.warning(f"归档标定文件失败: {robot_id} {file_type} - {str(e)}")
+            return None
+    
+    def record_snapshot(self, robot_id: str, file_type: str, content: str, source: str = "read") -> Optional[Dict[str, Any]]:
+        """
+        记录文件快照
+        
+        Returns:
+            新快照信息；内容与最新版本相同时返回None
+        """
+        if file_type not in self.file_types:
+            raise ValueError(f"不支持的文件类型: {file_type}")
+        
+        sha256 = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        
+        db = SessionLocal()
+        try:
+            robot_sn = self._resolve_robot_sn(db, robot_id)
+            
+            latest = self._latest_snapshot(db, robot_sn, file_type)
+            if latest and latest.blob_sha256 == sha256:
+                return None
+            
+            if db.get(CalibrationBlob, sha256) is None:
+                db.add(CalibrationBlob(
+                    sha256=sha256,
+                    content=content,
+                    size=len(content.encode('utf-8')),
+                    created_at=datetime.now()
+                ))
+            
+            snapshot = CalibrationSnapshot(
+                robot_sn=robot_sn,
+                robot_id=robot_id,
+                file_type=file_type,
+                blob_sha256=sha256,
+                source=source,
+                created_at=datetime.now()
+            )
+            db.add(snapshot)
+            db.flush()
+            
+            self._apply_retention(db, robot_sn, file_type)
+            db.commit()
+            
+            logger.info(f"已归档标定文件版本: {robot_sn} {file_type} ({sha256[:12]}, {source})")
+            return snapshot.to_dict()
+        
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def list_versions(self, robot_id: str, file_type: str) -> List[Dict[str, Any]]:
+        """列出文件的全部归档版本（按时间倒序）"""
+        db = SessionLocal()
+        try:
+            robot_sn = self._resolve_robot_sn(db, robot_id)
+            rows = (
+                db.query(CalibrationSnapshot, CalibrationBlob.size)
+                .join(CalibrationBlob, CalibrationBlob.sha256 == CalibrationSnapshot.blob_sha256)
+                .filter(
+                    CalibrationSnapshot.robot_sn == robot_sn,
+                    CalibrationSnapshot.file_type == file_type
+                )
+                .order_by(CalibrationSnapshot.created_at.desc())
+                .all()
+            )
+            return [dict(snapshot.to_dict(), size=size) for snapshot, size in rows]
+        finally:
+            db.close()
+    
+    def get_version(self, robot_id: str, file_type: str, version_id: str) -> Dict[str, Any]:
+        """获取指定版本的内容"""
+        db = SessionLocal()
+        try:
+            snapshot = self._get_snapshot(db, robot_id, file_type, version_id)
+            blob = db.get(CalibrationBlob, snapshot.blob_sha256)
+            return dict(snapshot.to_dict(), size=blob.size, content=blob.content)
+        finally:
+            db.close()
+    
+    def diff_versions(
+        self,
+        robot_id: str,
+        file_type: str,
+        from_version: str,
+        to_version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        比较两个版本
+        
+        Args:
+            to_version: 目标版本，为空时与最新版本比较
+        """
+        db = SessionLocal()
+        try:
+            from_snapshot = self._get_snapshot(db, robot_id, file_type, from_version)
+            if to_version:
+                to_snapshot = self._get_snapshot(db, robot_id, file_type, to_version)
+            else:
+                to_snapshot = self._latest_snapshot(db, from_snapshot.robot_sn, file_type)
+            
+            if from_snapshot.blob_sha256 == to_snapshot.blob_sha256:
+                diff_lines = []
+            else:
+                from_content = db.get(CalibrationBlob, from_snapshot.blob_sha256).content
+                to_content = db.get(CalibrationBlob, to_snapshot.blob_sha256).content
+                diff_lines = list(difflib.unified_diff(
+                    from_content.splitlines(),
+                    to_content.splitlines(),
+                    fromfile=from_snapshot.id,
+                    tofile=to_snapshot.id,
+                    lineterm=""
+                ))
+            
+            return {
+                "from_version": from_snapshot.id,
+                "to_version": to_snapshot.id,
+                "identical": not diff_lines,
+                "diff": "\n".join(diff_lines)
+            }
+        finally:
+            db.close()
+    
+    async def rollback(self, robot_id: str, file_type: str, version_id: str) -> Dict[str, Any]:
+        """将机器人上的文件回滚到指定版本（一次原子写入）"""
+        from app.services.calibration_file_service import calibration_file_service
+        
+        loop = asyncio.get_event_loop()
+        version = await loop.run_in_executor(
+            None, self.get_version, robot_id, file_type, version_id
+        )
+        
+        sha256 = await calibration_file_service.write_raw_content(
+            robot_id, file_type, version["content"], source="rollback"
+        )
+        
+        return {
+            "version_id": version_id,
+            "sha256": sha256,
+            "file_type": file_type
+        }
+    
+    def _resolve_robot_sn(self, db: Session, robot_id: str) -> str:
+        """获取机器人SN，未记录SN时退回使用robot_id"""
+        robot = db.query(Robot).filter(Robot.id == robot_id).first()
+        if robot and (robot.robot_sn or robot.sn_number):
+            return robot.robot_sn or robot.sn_number
+        return robot_id
+    
+    def _latest_snapshot(self, db: Session, robot_sn: str, file_type: str) -> Optional[CalibrationSnapshot]:
+        return (
+            db.query(CalibrationSnapshot)
+            .filter(
+                CalibrationSnapshot.robot_sn == robot_sn,
+                CalibrationSnapshot.file_type == file_type
+            )
+            .order_by(CalibrationSnapshot.created_at.desc())
+            .first()
+        )
+    
+    def _get_snapshot(self, db: Session, robot_id: str, file_type: str, version_id: str) -> CalibrationSnapshot:
+        robot_sn = self._resolve_robot_sn(db, robot_id)
+        snapshot = (
+            db.query(CalibrationSnapshot)
+            .filter(
+                CalibrationSnapshot.id == version_id,
+                CalibrationSnapshot.robot_sn == robot_sn,
+                CalibrationSnapshot.file_type == file_type
+            )
+            .first()
+        )
+        if not snapshot:
+            raise ValueError(f"版本不存在: {version_id}")
+        return snapshot
+    
+    def _apply_retention(self, db: Session, robot_sn: str, file_type: str):
+        """按保留策略清理旧版本，最新版本始终保留；清理后删除无引用的内容"""
+        snapshots = (
+            db.query(CalibrationSnapshot)
+            .filter(
+                CalibrationSnapshot.robot_sn == robot_sn,
+                CalibrationSnapshot.file_type == file_type
+            )
+            .order_by(CalibrationSnapshot.created_at.desc())
+            .all()
+        )
+        
+        cutoff = datetime.now() - timedelta(days=settings.CALIBRATION_ARCHIVE_MAX_AGE_DAYS)
+        expired = [
+            snapshot for index, snapshot in enumerate(snapshots)
+            if index > 0 and (
+                index >= settings.CALIBRATION_ARCHIVE_MAX_VERSIONS
+                or (snapshot.created_at and snapshot.created_at < cutoff)
+            )
+        ]
+        if not expired:
+            return
+        
+        candidate_blobs = {snapshot.blob_sha256 for snapshot in expired}
+        for snapshot in expired:
+            db.delete(snapshot)
+        db.flush()
+        
+        referenced = {
+            sha for (sha,) in db.query(CalibrationSnapshot.blob_sha256)
+            .filter(CalibrationSnapshot.blob_sha256.in_(candidate_blobs))
+            .distinct()
+        }
+        for sha in candidate_blobs - referenced:
+            db.query(CalibrationBlob).filter(CalibrationBlob.sha256 == sha).delete()
+        
+        logger.info(f"已清理 {len(expired)} 个过期标定文件版本: {robot_sn} {file_type}")
+
+
+# 全局标定归档服务实例
+calibration_archive_service = CalibrationArchiveService()
\ No newline at end of file
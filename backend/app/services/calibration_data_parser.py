@@ -3,8 +3,14 @@ import logging
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass
 
+from app.core.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+PARSER_SECONDS = metrics.histogram("kuavo_parser_seconds", "标定输出解析耗时", ["function"])
+PARSER_LINES = metrics.counter("kuavo_parser_lines_total", "解析的标定输出行数", ["function"])
+PARSER_POSITIONS = metrics.counter("kuavo_parser_positions_total", "解析出的Slave位置数据条数")
+
 
 @dataclass
 class SlavePositionData:
@@ -63,6 +69,12 @@ class CalibrationDataParser:
         Returns:
             解析出的Slave位置数据列表
         """
+        with PARSER_SECONDS.time(timing="parse", function="parse_slave_positions"):
+            positions = self._parse_slave_positions(output_text)
+        PARSER_POSITIONS.inc(len(positions))
+        return positions
+    
+    def _parse_slave_positions(self, output_text: str) -> List[SlavePositionData]:
         positions = []
         
         if not output_text:
@@ -70,6 +82,7 @@ class CalibrationDataParser:
         
         # 按行分割文本
         lines = output_text.split('\n')
+        PARSER_LINES.inc(len(lines), function="parse_slave_positions")
         
         for line_num, line in enumerate(lines, 1):
             line = line.strip()
@@ -115,6 +128,10 @@ class CalibrationDataParser:
         Returns:
             标定总结信息字典
         """
+        with PARSER_SECONDS.time(function="parse_calibration_summary"):
+            return self._parse_calibration_summary(output_text)
+    
+    def _parse_calibration_summary(self, output_text: str) -> Dict[str, Any]:
         summary = {
             "total_slaves": 0,
             "successful_readings": 0,
@@ -169,42 +186,65 @@ class CalibrationDataParser:
         Args:
             positions: Slave位置数据列表
             
+        Returns:
+            (is_valid, validation_messages): 验证结果和消息列表
+        """
+        if not positions:
+            return False, ["未检测到任何Slave位置数据"]
+        
+        # 检查重复数据
+        duplicates = set()
+        seen_slaves = set()
+        for pos in positions:
+            if pos.slave_id in seen_slaves:
+                duplicates.add(pos.slave_id)
+            seen_slaves.add(pos.slave_id)
+        
+        # 检查位置值的合理性
+        unreasonable_positions = [
+            f"Slave {pos.slave_id}: {pos.position}" for pos in positions if self.is_unreasonable_position(pos.position)
+        ]
+        
+        return self.validate_position_stats(seen_slaves, duplicates, unreasonable_positions, len(positions))
+    
+    @staticmethod
+    def is_unreasonable_position(position: float) -> bool:
+        # 一般关节位置在-π到π之间，10弧度约572度，明显超出关节范围
+        return abs(position) > 10.0
+    
+    def validate_position_stats(
+        self,
+        slave_ids: set,
+        duplicates: set,
+        unreasonable_positions: List[str],
+        position_count: int
+    ) -> Tuple[bool, List[str]]:
+        """
+        根据位置数据的统计量验证完整性和合理性（可由增量统计直接调用）
+        
+        Args:
+            slave_ids: 出现过的Slave ID
+            duplicates: 重复出现的Slave ID
+            unreasonable_positions: 异常位置值描述
+            position_count: 位置数据条数
+        
         Returns:
             (is_valid, validation_messages): 验证结果和消息列表
         """
         messages = []
         is_valid = True
         
-        if not positions:
+        if not slave_ids:
             return False, ["未检测到任何Slave位置数据"]
         
         # 检查数据完整性
-        slave_ids = [pos.slave_id for pos in positions]
-        expected_slaves = set(range(1, max(slave_ids) + 1))
-        actual_slaves = set(slave_ids)
-        
-        missing_slaves = expected_slaves - actual_slaves
+        missing_slaves = set(range(1, max(slave_ids) + 1)) - set(slave_ids)
         if missing_slaves:
             messages.append(f"缺失Slave数据: {sorted(missing_slaves)}")
             is_valid = False
         
-        # 检查重复数据
-        duplicates = []
-        seen_slaves = set()
-        for pos in positions:
-            if pos.slave_id in seen_slaves:
-                duplicates.append(pos.slave_id)
-            seen_slaves.add(pos.slave_id)
-        
         if duplicates:
-            messages.append(f"发现重复的Slave数据: {sorted(set(duplicates))}")
-        
-        # 检查位置值的合理性
-        unreasonable_positions = []
-        for pos in positions:
-            # 检查位置值是否在合理范围内（一般关节位置在-π到π之间）
-            if abs(pos.position) > 10.0:  # 10弧度约572度，明显超出关节范围
-                unreasonable_positions.append(f"Slave {pos.slave_id}: {pos.position}")
+            messages.append(f"发现重复的Slave数据: {sorted(duplicates)}")
         
         if unreasonable_positions:
             messages.append(f"检测到异常位置值: {unreasonable_positions}")
@@ -212,7 +252,7 @@ class CalibrationDataParser:
         
         # 如果没有问题
         if is_valid and not messages:
-            messages.append(f"成功解析 {len(positions)} 个Slave位置数据，数据完整且合理")
+            messages.append(f"成功解析 {position_count} 个Slave位置数据，数据完整且合理")
         
         return is_valid, messages
     
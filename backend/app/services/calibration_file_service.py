@@ -2,16 +2,25 @@ import os
 import yaml
 import csv
 import asyncio
+import copy
+import hashlib
+import shlex
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable
 from dataclasses import dataclass
 from datetime import datetime
 import json
 
 from app.services.ssh_service import ssh_service
+from app.services.calibration_archive_service import calibration_archive_service
+from app.services.joint_table import JointTable, validate_offset_batch
+from app.services.joint_state_streamer import joint_state_streamer, parse_joint_state_positions
 
 logger = logging.getLogger(__name__)
 
+# 原子写入脚本标记，便于在远程进程列表和模拟器中识别
+ATOMIC_WRITE_MARKER = "# kuavo-atomic-write"
+
 
 @dataclass
 class JointData:
@@ -35,6 +44,23 @@ class CalibrationFileInfo:
     file_size: int
 
 
+@dataclass
+class BackupFileInfo:
+    """配置目录中的单个文件条目（备份文件等）"""
+    file_path: str
+    file_name: str
+    last_modified: datetime
+    file_size: int
+
+
+@dataclass
+class CachedCalibrationFile:
+    """已解析的标定文件缓存项"""
+    signature: str  # 远程文件的 mtime|size|inode
+    sha256: str
+    joint_data: List[JointData]
+
+
 class CalibrationFileService:
     """标定文件管理服务"""
     
@@ -44,6 +70,9 @@ class CalibrationFileService:
         self.legs_offset_path = "/home/lab/.config/lejuconfig/offset.csv"
         self.config_dir = "/home/lab/.config/lejuconfig"
         
+        # 标定文件解析结果缓存: (robot_id, file_path) -> CachedCalibrationFile
+        self._file_cache: Dict[Tuple[str, str], CachedCalibrationFile] = {}
+        
         # 关节名称映射
         self.arm_joint_names = {
             1: "左臂01", 2: "左臂02", 3: "左臂03", 4: "左臂04", 5: "左臂05", 6: "左臂06",
@@ -59,79 +88,94 @@ class CalibrationFileService:
     
     async def get_file_info(self, robot_id: str, file_type: str) -> CalibrationFileInfo:
         """获取标定文件信息"""
-        if file_type == "arms_zero":
-            file_path = self.arms_zero_path
-        elif file_type == "legs_offset":
-            file_path = self.legs_offset_path
-        else:
+        if file_type not in ("arms_zero", "legs_offset"):
             raise ValueError(f"不支持的文件类型: {file_type}")
         
-        # 检查文件是否存在
-        success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, f"test -f {file_path} && echo 'exists' || echo 'not_exists'"
-        )
-        
-        exists = success and "exists" in stdout
+        overview = await self.get_all_files_info(robot_id)
+        return overview["files"][file_type]
+    
+    async def get_all_files_info(self, robot_id: str) -> Dict[str, Any]:
+        """
+        一次性获取全部标定文件信息
         
-        if not exists:
-            return CalibrationFileInfo(
-                file_path=file_path,
-                file_type=file_type,
-                exists=False,
-                last_modified=None,
-                backup_count=0,
-                file_size=0
-            )
+        通过一条stat命令扫描arms_zero.yaml、offset.csv、头手标定备份以及
+        backup目录，标定页面只需一次远程往返即可完成加载。
         
-        # 获取文件信息
+        Returns:
+            {"files": {file_type: CalibrationFileInfo}, "head_cali_backups": [...], "backups": [...]}
+        """
+        backup_dir = f"{self.config_dir}/backup"
+        targets = " ".join([
+            shlex.quote(self.arms_zero_path),
+            shlex.quote(self.legs_offset_path),
+            f"{shlex.quote(self.config_dir)}/*head_cali*",
+            f"{shlex.quote(backup_dir)}/*",
+        ])
+        # 不存在的文件或未匹配的通配符只会在stderr中报错，不影响其余条目
         success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, f"stat -c '%Y %s' {file_path}"
+            robot_id, f"stat -c '%n|%Y|%s' {targets} 2>/dev/null; true"
         )
         
-        last_modified = None
-        file_size = 0
-        
-        if success and stdout.strip():
-            parts = stdout.strip().split()
-            if len(parts) >= 2:
-                try:
-                    timestamp = int(parts[0])
-                    last_modified = datetime.fromtimestamp(timestamp)
-                    file_size = int(parts[1])
-                except ValueError:
-                    pass
+        if not success:
+            # 与逐个文件查询时一致：远程命令失败时按文件不存在返回，不让整个接口失败
+            logger.warning(f"获取标定文件信息失败 {robot_id}: {stderr}")
+            stdout = ""
+        
+        entries: Dict[str, BackupFileInfo] = {}
+        for line in stdout.splitlines():
+            parts = line.strip().rsplit("|", 2)
+            if len(parts) != 3:
+                continue
+            try:
+                entries[parts[0]] = BackupFileInfo(
+                    file_path=parts[0],
+                    file_name=os.path.basename(parts[0]),
+                    last_modified=datetime.fromtimestamp(int(parts[1])),
+                    file_size=int(parts[2])
+                )
+            except ValueError:
+                continue
         
-        # 获取备份文件数量
-        backup_dir = f"{self.config_dir}/backup"
-        success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, f"ls {backup_dir}/{os.path.basename(file_path)}.* 2>/dev/null | wc -l"
+        backups = sorted(
+            (entry for path, entry in entries.items() if path.startswith(f"{backup_dir}/")),
+            key=lambda entry: entry.last_modified,
+            reverse=True
         )
+        head_cali_backups = [
+            entry for path, entry in entries.items()
+            if os.path.dirname(path) == self.config_dir and "head_cali" in entry.file_name
+        ]
+        
+        files = {}
+        for file_type, file_path in (("arms_zero", self.arms_zero_path), ("legs_offset", self.legs_offset_path)):
+            entry = entries.get(file_path)
+            prefix = f"{os.path.basename(file_path)}."
+            files[file_type] = CalibrationFileInfo(
+                file_path=file_path,
+                file_type=file_type,
+                exists=entry is not None,
+                last_modified=entry.last_modified if entry else None,
+                backup_count=sum(1 for backup in backups if backup.file_name.startswith(prefix)),
+                file_size=entry.file_size if entry else 0
+            )
         
-        backup_count = 0
-        if success and stdout.strip().isdigit():
-            backup_count = int(stdout.strip())
-        
-        return CalibrationFileInfo(
-            file_path=file_path,
-            file_type=file_type,
-            exists=exists,
-            last_modified=last_modified,
-            backup_count=backup_count,
-            file_size=file_size
-        )
+        return {
+            "files": files,
+            "head_cali_backups": head_cali_backups,
+            "backups": backups
+        }
     
     async def read_arms_zero_data(self, robot_id: str) -> List[JointData]:
         """读取手臂零点数据"""
         # 如果是模拟器模式，直接返回模拟数据
         if ssh_service.use_simulator:
-            return self._generate_mock_arms_data()
+            return self._generate_mock_arms_data(robot_id)
         
-        # 首先检查文件是否存在
-        success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, f"test -f {self.arms_zero_path} && echo 'ok' || echo 'not_found'"
+        joint_data = await self._read_with_cache(
+            robot_id, self.arms_zero_path, self._parse_arms_zero_content
         )
         
-        if not success or "not_found" in stdout:
+        if joint_data is None:
             # 文件不存在，返回默认数据
             return [
                 JointData(
@@ -145,14 +189,10 @@ class CalibrationFileService:
                 for i in range(2, 16)  # 2-15号电机
             ]
         
-        # 读取YAML文件
-        success, content, stderr = await ssh_service.execute_command(
-            robot_id, f"cat {self.arms_zero_path}"
-        )
-        
-        if not success:
-            raise Exception(f"读取手臂零点文件失败: {stderr}")
-        
+        return joint_data
+    
+    def _parse_arms_zero_content(self, content: str) -> List[JointData]:
+        """解析arms_zero.yaml内容"""
         try:
             yaml_data = yaml.safe_load(content)
             joint_data_list = []
@@ -183,10 +223,69 @@ class CalibrationFileService:
         except yaml.YAMLError as e:
             raise Exception(f"解析手臂零点文件失败: {str(e)}")
     
-    def _generate_mock_arms_data(self) -> List[JointData]:
+    async def _read_with_cache(
+        self,
+        robot_id: str,
+        file_path: str,
+        parser: Callable[[str], List[JointData]]
+    ) -> Optional[List[JointData]]:
+        """
+        带缓存地读取并解析远程标定文件
+        
+        先用一次stat获取文件签名（mtime/size/inode），签名未变化时直接返回
+        缓存的解析结果，不再传输和解析文件内容。
+        
+        Returns:
+            关节数据列表（调用方可自由修改的副本），文件不存在时返回None
+        """
+        cache_key = (robot_id, file_path)
+        
+        success, stdout, stderr = await ssh_service.execute_command(
+            robot_id, f"stat -c '%y|%s|%i' {shlex.quote(file_path)} 2>/dev/null || echo 'not_found'"
+        )
+        signature = stdout.strip()
+        
+        if not success or not signature or "not_found" in signature:
+            self._file_cache.pop(cache_key, None)
+            return None
+        
+        cached = self._file_cache.get(cache_key)
+        if cached and cached.signature == signature:
+            logger.debug(f"标定文件缓存命中: {robot_id} {file_path}")
+            return copy.deepcopy(cached.joint_data)
+        
+        success, content, stderr = await ssh_service.execute_command(
+            robot_id, f"cat {shlex.quote(file_path)}"
+        )
+        
+        if not success:
+            raise Exception(f"读取标定文件失败: {stderr}")
+        
+        joint_data = parser(content)
+        
+        # 缓存未命中说明文件有变化（或首次读取），顺便归档当前版本
+        file_type = self._file_type_for_path(file_path)
+        if file_type:
+            await calibration_archive_service.archive(robot_id, file_type, content, source="read")
+        
+        self._file_cache[cache_key] = CachedCalibrationFile(
+            signature=signature,
+            sha256=hashlib.sha256(content.encode('utf-8')).hexdigest(),
+            joint_data=joint_data
+        )
+        
+        return copy.deepcopy(joint_data)
+    
+    def invalidate_file_cache(self, robot_id: str, file_path: Optional[str] = None):
+        """使标定文件缓存失效，不指定文件时清空该机器人的全部缓存"""
+        for cache_key in list(self._file_cache.keys()):
+            if cache_key[0] == robot_id and (file_path is None or cache_key[1] == file_path):
+                del self._file_cache[cache_key]
+    
+    def _generate_mock_arms_data(self, robot_id: str) -> List[JointData]:
         """生成模拟手臂数据"""
-        import random
-        import math
+        # 使用该模拟机器人的随机数（设置SIMULATOR_SEED后可复现）
+        random = ssh_service.simulator_for(robot_id).rng
         mock_data = []
         
         # 生成更真实的模拟数据（使用弧度值）
@@ -219,9 +318,9 @@ class CalibrationFileService:
         logger.info(f"生成了 {len(mock_data)} 个手臂关节的模拟数据")
         return mock_data
     
-    def _generate_mock_legs_data(self) -> List[JointData]:
+    def _generate_mock_legs_data(self, robot_id: str) -> List[JointData]:
         """生成模拟腿部数据"""
-        import random
+        random = ssh_service.simulator_for(robot_id).rng
         mock_data = []
         
         # 生成更真实的腿部数据（使用弧度值）
@@ -258,14 +357,13 @@ class CalibrationFileService:
         """读取腿部偏移数据"""
         # 如果是模拟器模式，直接返回模拟数据
         if ssh_service.use_simulator:
-            return self._generate_mock_legs_data()
+            return self._generate_mock_legs_data(robot_id)
         
-        # 检查文件是否存在
-        success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, f"test -f {self.legs_offset_path} && echo 'ok' || echo 'not_found'"
+        joint_data = await self._read_with_cache(
+            robot_id, self.legs_offset_path, self._parse_legs_offset_content
         )
         
-        if not success or "not_found" in stdout:
+        if joint_data is None:
             # 文件不存在，返回默认数据
             return [
                 JointData(
@@ -279,14 +377,10 @@ class CalibrationFileService:
                 for i in range(1, 15)
             ]
         
-        # 读取CSV文件
-        success, content, stderr = await ssh_service.execute_command(
-            robot_id, f"cat {self.legs_offset_path}"
-        )
-        
-        if not success:
-            raise Exception(f"读取腿部偏移文件失败: {stderr}")
-        
+        return joint_data
+    
+    def _parse_legs_offset_content(self, content: str) -> List[JointData]:
+        """解析offset.csv内容"""
         try:
             lines = content.strip().split('\n')
             joint_data_list = []
@@ -326,9 +420,6 @@ class CalibrationFileService:
     async def write_arms_zero_data(self, robot_id: str, joint_data: List[JointData]) -> bool:
         """写入手臂零点数据"""
         try:
-            # 先备份原文件
-            await self._backup_file(robot_id, self.arms_zero_path)
-            
             # 构建YAML数据
             yaml_data = {}
             
@@ -344,23 +435,8 @@ class CalibrationFileService:
             # 生成YAML内容
             yaml_content = yaml.dump(yaml_data, default_flow_style=False, allow_unicode=True)
             
-            # 写入临时文件，然后移动到目标位置
-            temp_file = f"{self.arms_zero_path}.tmp"
-            
-            success, stdout, stderr = await ssh_service.execute_command(
-                robot_id, f"cat > {temp_file} << 'EOF'\n{yaml_content}\nEOF"
-            )
-            
-            if not success:
-                raise Exception(f"写入临时文件失败: {stderr}")
-            
-            # 原子性移动文件
-            success, stdout, stderr = await ssh_service.execute_command(
-                robot_id, f"mv {temp_file} {self.arms_zero_path}"
-            )
-            
-            if not success:
-                raise Exception(f"移动文件失败: {stderr}")
+            # 备份、写入、校验、替换在一次远程调用中完成
+            await self._atomic_write_file(robot_id, self.arms_zero_path, yaml_content)
             
             return True
             
@@ -371,9 +447,6 @@ class CalibrationFileService:
     async def write_legs_offset_data(self, robot_id: str, joint_data: List[JointData]) -> bool:
         """写入腿部偏移数据"""
         try:
-            # 先备份原文件
-            await self._backup_file(robot_id, self.legs_offset_path)
-            
             # 构建CSV内容
             csv_lines = []
             for joint in sorted(joint_data, key=lambda x: x.id):
@@ -381,23 +454,8 @@ class CalibrationFileService:
             
             csv_content = '\n'.join(csv_lines)
             
-            # 写入临时文件，然后移动到目标位置
-            temp_file = f"{self.legs_offset_path}.tmp"
-            
-            success, stdout, stderr = await ssh_service.execute_command(
-                robot_id, f"cat > {temp_file} << 'EOF'\n{csv_content}\nEOF"
-            )
-            
-            if not success:
-                raise Exception(f"写入临时文件失败: {stderr}")
-            
-            # 原子性移动文件
-            success, stdout, stderr = await ssh_service.execute_command(
-                robot_id, f"mv {temp_file} {self.legs_offset_path}"
-            )
-            
-            if not success:
-                raise Exception(f"移动文件失败: {stderr}")
+            # 备份、写入、校验、替换在一次远程调用中完成
+            await self._atomic_write_file(robot_id, self.legs_offset_path, csv_content)
             
             return True
             
@@ -405,28 +463,111 @@ class CalibrationFileService:
             logger.error(f"写入腿部偏移文件失败: {str(e)}")
             return False
     
-    async def _backup_file(self, robot_id: str, file_path: str):
-        """备份文件"""
-        if not file_path:
-            return
+    async def write_raw_content(self, robot_id: str, file_type: str, content: str, source: str = "write") -> str:
+        """直接写入文件原始内容（用于版本回滚等场景，内容按原样写入，不补换行）"""
+        return await self._atomic_write_file(
+            robot_id, self._file_path_for_type(file_type), content, source=source, ensure_newline=False
+        )
+    
+    def _file_path_for_type(self, file_type: str) -> str:
+        if file_type == "arms_zero":
+            return self.arms_zero_path
+        elif file_type == "legs_offset":
+            return self.legs_offset_path
+        raise ValueError(f"不支持的文件类型: {file_type}")
+    
+    def _file_type_for_path(self, file_path: str) -> Optional[str]:
+        return {
+            self.arms_zero_path: "arms_zero",
+            self.legs_offset_path: "legs_offset"
+        }.get(file_path)
+    
+    async def _atomic_write_file(
+        self,
+        robot_id: str,
+        file_path: str,
+        content: str,
+        source: str = "write",
+        ensure_newline: bool = True
+    ) -> str:
+        """
+        原子写入远程文件
+        
+        文件内容通过stdin上传，远程脚本依次完成：备份原文件、写入临时文件、
+        fsync、sha256校验、rename替换。整个过程只有一次SSH往返。
+        
+        Args:
+            ensure_newline: 内容末尾没有换行时补上（生成的文件内容使用；回滚归档版本时按原样写入）
+        
+        Returns:
+            写入文件的sha256
+        """
+        if ensure_newline and not content.endswith('\n'):
+            content += '\n'
+        
+        expected_sha = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        backup_path = self._backup_path(file_path)
+        script = self._build_atomic_write_script(file_path, backup_path, expected_sha)
         
-        backup_dir = f"{self.config_dir}/backup"
+        try:
+            success, stdout, stderr = await ssh_service.execute_command_with_input(
+                robot_id, f"sh -c {shlex.quote(script)}", content
+            )
+        finally:
+            # 无论写入是否成功，远程文件都可能已变化
+            self.invalidate_file_cache(robot_id, file_path)
         
-        # 确保备份目录存在
-        await ssh_service.execute_command(robot_id, f"mkdir -p {backup_dir}")
+        result_lines = [line.strip() for line in stdout.splitlines() if line.strip()]
+        if f"OK:{expected_sha}" not in result_lines:
+            mismatch = next((line for line in result_lines if line.startswith("CHECKSUM_MISMATCH:")), None)
+            if mismatch:
+                raise Exception(f"文件校验失败: 期望 {expected_sha}, 实际 {mismatch.split(':', 1)[1]}")
+            raise Exception(f"原子写入失败: {stderr.strip() or stdout.strip() or '未知错误'}")
         
-        # 检查文件是否存在
-        success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, f"test -f {file_path} && echo 'exists' || echo 'not_exists'"
-        )
+        for line in result_lines:
+            if line.startswith("BACKUP:"):
+                logger.info(f"文件已备份: {line.split(':', 1)[1]}")
         
-        if success and "exists" in stdout:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"{os.path.basename(file_path)}.{timestamp}.bak"
-            backup_path = f"{backup_dir}/{backup_name}"
-            
-            await ssh_service.execute_command(robot_id, f"cp {file_path} {backup_path}")
-            logger.info(f"文件已备份: {backup_path}")
+        logger.info(f"文件已原子写入: {file_path} (sha256={expected_sha[:12]})")
+        
+        file_type = self._file_type_for_path(file_path)
+        if file_type:
+            await calibration_archive_service.archive(robot_id, file_type, content, source=source)
+        
+        return expected_sha
+    
+    def _backup_path(self, file_path: str) -> str:
+        """生成带时间戳的备份文件路径"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{self.config_dir}/backup/{os.path.basename(file_path)}.{timestamp}.bak"
+    
+    def _build_atomic_write_script(self, file_path: str, backup_path: str, expected_sha: str) -> str:
+        """构建远程原子写入脚本（内容从stdin读取，不使用heredoc）"""
+        target = shlex.quote(file_path)
+        backup_dir = shlex.quote(os.path.dirname(backup_path))
+        backup = shlex.quote(backup_path)
+        expected = shlex.quote(expected_sha)
+        return f"""{ATOMIC_WRITE_MARKER}
+set -e
+target={target}
+tmp="$target.tmp.$$"
+trap 'rm -f "$tmp"' EXIT
+mkdir -p {backup_dir}
+if [ -f "$target" ]; then
+    cp -p "$target" {backup}
+    echo "BACKUP:"{backup}
+fi
+cat > "$tmp"
+sync "$tmp" 2>/dev/null || sync
+actual=$(sha256sum "$tmp" | cut -d' ' -f1)
+if [ "$actual" != {expected} ]; then
+    echo "CHECKSUM_MISMATCH:$actual"
+    exit 3
+fi
+mv -f "$tmp" "$target"
+sync "$(dirname "$target")" 2>/dev/null || true
+echo "OK:$actual"
+"""
     
     async def get_current_joint_positions(self, robot_id: str) -> Dict[int, float]:
         """获取当前关节位置（从ROS topic或硬件读取）"""
@@ -436,7 +577,7 @@ class CalibrationFileService:
         # 模拟数据，实际实现时需要替换
         if ssh_service.use_simulator:
             # 模拟器模式下返回更真实的模拟数据
-            import random
+            random = ssh_service.simulator_for(robot_id).rng
             positions = {}
             
             # 基于手臂和腿部的典型位置生成当前位置（使用弧度值）
@@ -466,28 +607,21 @@ class CalibrationFileService:
             logger.info(f"模拟器模式：生成了关节位置")
             return positions
         
-        # 实际硬件获取关节位置的命令
-        success, stdout, stderr = await ssh_service.execute_command(
-            robot_id, "rostopic echo -n 1 /joint_states | grep -A 20 'position:'"
-        )
+        # 优先从常驻关节状态流的缓存读取
+        positions = await joint_state_streamer.get_latest_positions(robot_id)
         
-        positions = {}
-        if success and stdout:
-            # 解析关节位置数据
-            # 这里需要根据实际的 ROS topic 格式进行解析
-            try:
-                # 简化的解析逻辑，实际可能需要更复杂的处理
-                lines = stdout.split('\n')
-                position_values = []
-                for line in lines:
-                    if line.strip() and line.strip().replace('-', '').replace('.', '').isdigit():
-                        position_values.append(float(line.strip()))
-                
-                for i, pos in enumerate(position_values[:14], 1):
-                    positions[i] = pos
-                    
-            except Exception as e:
-                logger.warning(f"解析关节位置数据失败: {str(e)}")
+        if not positions:
+            # 状态流不可用时退回单次rostopic读取
+            success, stdout, stderr = await ssh_service.execute_command(
+                robot_id, "rostopic echo -n 1 /joint_states"
+            )
+            
+            positions = {}
+            if success and stdout:
+                try:
+                    positions = parse_joint_state_positions(stdout)
+                except Exception as e:
+                    logger.warning(f"解析关节位置数据失败: {str(e)}")
         
         # 如果没有获取到数据，返回默认值
         if not positions:
@@ -500,22 +634,28 @@ class CalibrationFileService:
     
     async def validate_joint_data(self, joint_data: List[JointData]) -> List[str]:
         """验证关节数据"""
-        warnings = []
-        
-        for joint in joint_data:
-            # 检查数值范围
-            if abs(joint.zero_position) > 10.0:  # 假设零点不应该超过10弧度
-                warnings.append(f"{joint.name}: 零点值异常 ({joint.zero_position:.3f})")
-            
-            if abs(joint.offset) > 5.0:  # 假设偏移不应该超过5弧度
-                warnings.append(f"{joint.name}: 偏移值异常 ({joint.offset:.3f})")
-            
-            # 检查当前位置与零点的差异
-            diff = abs(joint.current_position - joint.zero_position)
-            if diff > 3.0:  # 假设差异不应该超过3弧度
-                warnings.append(f"{joint.name}: 当前位置与零点差异较大 ({diff:.3f})")
-        
-        return warnings
+        return JointTable.from_joint_data(joint_data).sanity_warnings()
+    
+    def validate_joint_data_batch(self, batch: Dict[str, List[JointData]]) -> Dict[str, Dict[str, List[str]]]:
+        """
+        批量验证多台机器人的关节数据
+        
+        Args:
+            batch: {robot_id: joint_data}
+            
+        Returns:
+            {robot_id: {"warnings": [...], "errors": [...]}}
+        """
+        tables = {robot_id: JointTable.from_joint_data(joint_data) for robot_id, joint_data in batch.items()}
+        offset_results = validate_offset_batch(tables)
+        
+        return {
+            robot_id: {
+                "warnings": tables[robot_id].sanity_warnings() + offset_results[robot_id][0],
+                "errors": offset_results[robot_id][1]
+            }
+            for robot_id in tables
+        }
 
 
 # 全局标定文件服务实例
@@ -0,0 +1,139 @@
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Iterable, Optional, Tuple, Any
+
+from app.core.config import settings
+from app.services.calibration_data_parser import calibration_data_parser, SlavePositionData
+
+logger = logging.getLogger(__name__)
+
+
+MAX_RECENT_ISSUES = 50   # 汇总中保留的最近警告/错误行数
+
+
+class CalibrationLogBuffer:
+    """
+    标定日志环形缓冲区
+    
+    按行数和UTF-8字节数双重限制，超出时丢弃最旧的行，长时间运行的会话内存
+    保持平稳。汇总所需的警告/错误计数、标定状态标志和各Slave的最新位置在
+    日志到达时增量维护，获取汇总无需重新拼接和解析全部日志。
+    统计口径与 calibration_data_parser.parse_calibration_summary 一致。
+    """
+    
+    def __init__(self, max_lines: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_lines = max_lines or settings.ZERO_POINT_LOG_MAX_LINES
+        self.max_bytes = max_bytes or settings.ZERO_POINT_LOG_MAX_BYTES
+        
+        self.lines: Deque[Tuple[str, int]] = deque()   # (行, 字节数)
+        self.total_bytes = 0
+        self.received_lines = 0
+        self.dropped_lines = 0
+        self.dropped_bytes = 0
+        
+        # 增量汇总
+        self.warning_count = 0
+        self.error_count = 0
+        self.recent_warnings: Deque[str] = deque(maxlen=MAX_RECENT_ISSUES)
+        self.recent_errors: Deque[str] = deque(maxlen=MAX_RECENT_ISSUES)
+        self.seen_complete = False
+        self.seen_failed = False
+        self.seen_error = False
+        
+        self.position_count = 0
+        self.latest_positions: Dict[int, SlavePositionData] = {}
+        self.duplicate_slaves = set()
+        self.unreasonable_positions: Dict[int, str] = {}
+    
+    def append(self, line: str):
+        """追加一行日志并更新汇总计数"""
+        size = len(line.encode('utf-8'))
+        self.lines.append((line, size))
+        self.total_bytes += size
+        self.received_lines += 1
+        
+        while self.lines and (len(self.lines) > self.max_lines or self.total_bytes > self.max_bytes):
+            _, dropped_size = self.lines.popleft()
+            self.total_bytes -= dropped_size
+            self.dropped_lines += 1
+            self.dropped_bytes += dropped_size
+        
+        line_lower = line.lower()
+        if "calibration complete" in line_lower:
+            self.seen_complete = True
+        if "calibration failed" in line_lower:
+            self.seen_failed = True
+        if "error" in line_lower:
+            self.seen_error = True
+        
+        if "warn" in line_lower:
+            self.warning_count += 1
+            self.recent_warnings.append(line.strip())
+        elif "error" in line_lower or "failed" in line_lower:
+            self.error_count += 1
+            self.recent_errors.append(line.strip())
+    
+    def record_positions(self, positions: Iterable[SlavePositionData]):
+        """记录从日志行中解析出的Slave位置（每个Slave只保留最新一条）"""
+        for pos in positions:
+            if pos.slave_id in self.latest_positions:
+                self.duplicate_slaves.add(pos.slave_id)
+            self.latest_positions[pos.slave_id] = pos
+            self.position_count += 1
+            
+            if calibration_data_parser.is_unreasonable_position(pos.position):
+                self.unreasonable_positions[pos.slave_id] = f"Slave {pos.slave_id}: {pos.position}"
+            else:
+                self.unreasonable_positions.pop(pos.slave_id, None)
+    
+    def summary(self) -> Dict[str, Any]:
+        """标定汇总（格式同 parse_calibration_summary）"""
+        if self.seen_complete:
+            calibration_status = "completed"
+        elif self.seen_failed:
+            calibration_status = "failed"
+        elif self.seen_error:
+            calibration_status = "error"
+        elif self.position_count:
+            calibration_status = "data_collected"
+        else:
+            calibration_status = "unknown"
+        
+        return {
+            "total_slaves": max(self.latest_positions) if self.latest_positions else 0,
+            "successful_readings": self.position_count,
+            "failed_readings": 0,
+            "position_data": [
+                {
+                    "slave_id": pos.slave_id,
+                    "position": pos.position,
+                    "joint_name": pos.joint_name
+                }
+                for _, pos in sorted(self.latest_positions.items())
+            ],
+            "warnings": list(self.recent_warnings),
+            "errors": list(self.recent_errors),
+            "warning_count": self.warning_count,
+            "error_count": self.error_count,
+            "calibration_status": calibration_status
+        }
+    
+    def validation(self) -> Tuple[bool, List[str]]:
+        """位置数据验证（格式同 validate_position_data）"""
+        return calibration_data_parser.validate_position_stats(
+            set(self.latest_positions),
+            self.duplicate_slaves,
+            [self.unreasonable_positions[slave_id] for slave_id in sorted(self.unreasonable_positions)],
+            self.position_count
+        )
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "lines": len(self.lines),
+            "bytes": self.total_bytes,
+            "received_lines": self.received_lines,
+            "dropped_lines": self.dropped_lines,
+            "dropped_bytes": self.dropped_bytes,
+            "max_lines": self.max_lines,
+            "max_bytes": self.max_bytes
+        }
\ No newline at end of file
@@ -1,6 +1,8 @@
 import asyncio
+import codecs
+import inspect
 import paramiko
-from typing import Dict, Optional, Callable, List
+from typing import Dict, Optional, Callable, List, Awaitable, Union
 import logging
 import re
 from datetime import datetime
@@ -8,13 +10,95 @@ import subprocess
 from concurrent.futures import ThreadPoolExecutor
 import os
 import socket
+import threading
+import time
 
-from app.services.ssh_service import ssh_service
+from app.services.ssh_service import ssh_service, INTERACTIVE_BYTES, INTERACTIVE_CHUNKS
 from app.api.websocket import connection_manager
+from app.services.prompt_matcher import (
+    calibration_prompt_matchers, PromptMatcher, PromptEvent, ResponseAck, RESPONSE_ACK_TIMEOUT
+)
+from app.services.session_store import session_store, CALIBRATION_SERVICE
+from app.services.calibration_timeline import calibration_timelines, NULL_TIMELINE, INTERACTION_TRACK
+from app.simulator.sim_clock import simulator_clock
 
 logger = logging.getLogger(__name__)
 
 
+# shell就绪哨兵：回显的命令行是 $((1+1))，只有shell执行后才会输出 _2_，不会被命令回显误判
+SHELL_READY_COMMAND = "echo KUAVO_SHELL_$((1+1))_READY"
+SHELL_READY_SENTINEL = "KUAVO_SHELL_2_READY"
+SHELL_READY_TIMEOUT = 5.0
+
+SNAPSHOT_LOG_LINES = 200  # 会话快照中保留的最近日志行数
+
+CHANNEL_READ_TIMEOUT = 0.1  # 通道读取超时（就绪等待和读取线程据此检查截止时间和连接状态）
+EXIT_STATUS_TIMEOUT = 5.0   # 通道输出结束后等待远端退出码的时间
+
+
+class ChannelStream:
+    """
+    交互式SSH通道的异步读写封装
+    
+    读取线程阻塞在 channel.recv 上，收到的输出通过 call_soon_threadsafe 放入
+    asyncio.Queue，通道关闭或连接断开时放入 None；写入在线程池中执行。
+    事件循环上只剩 await read()，不会被recv超时或轮询等待占用。
+    关闭通道（如取消标定时的 session.cleanup()）后读取线程随之结束。
+    """
+    
+    def __init__(self, channel, executor: ThreadPoolExecutor, name: str):
+        self.channel = channel
+        self.executor = executor
+        self.name = name
+        self.loop = asyncio.get_event_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._reader: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._reader = threading.Thread(target=self._read_loop, name=self.name, daemon=True)
+        self._reader.start()
+    
+    def _read_loop(self):
+        # 增量解码，多字节字符被拆在两次recv之间时不会丢失
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        end: Optional[Exception] = None
+        try:
+            while True:
+                try:
+                    data = self.channel.recv(4096)
+                except socket.timeout:
+                    if self.channel.closed or not self.channel.get_transport().is_active():
+                        break
+                    continue
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    self._offer(text)
+        except Exception as e:
+            if "closed" not in str(e).lower():
+                end = e
+        finally:
+            self._offer(end)
+    
+    def _offer(self, item: Union[str, Exception, None]):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+    
+    async def read(self) -> Optional[str]:
+        """读取下一块输出，通道结束时返回None，读取出错时抛出异常"""
+        item = await self.queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+    
+    async def write(self, text: str):
+        await self.loop.run_in_executor(self.executor, self.channel.sendall, text.encode('utf-8'))
+
+
 class CalibrationSession:
     """标定会话类"""
     
@@ -32,11 +116,15 @@ class CalibrationSession:
         self.user_response_event = asyncio.Event()
         self.user_response = None
         self.simulator_script_id = None  # 用于模拟器
+        self.pending_ack: Optional[ResponseAck] = None  # 等待程序确认的自动响应
+        self.timeline = NULL_TIMELINE  # 各阶段耗时时间线（恢复的会话不记录）
         
     async def cleanup(self):
         """清理资源"""
         if self.monitoring_task:
             self.monitoring_task.cancel()
+        if self.pending_ack:
+            self.pending_ack.close()
         if self.ssh_channel:
             self.ssh_channel.close()
         if self.process_handle:
@@ -45,7 +133,7 @@ class CalibrationSession:
             except:
                 pass
         if self.simulator_script_id and ssh_service.use_simulator:
-            ssh_service.simulator.stop_script(self.simulator_script_id)
+            ssh_service.simulator_for(self.robot_id).stop_script(self.simulator_script_id)
 
 
 class CalibrationService:
@@ -56,36 +144,8 @@ class CalibrationService:
         self.executor = ThreadPoolExecutor(max_workers=5)
         self.active_calibrations = {}  # 用于监控器访问
         
-        # 定义交互点模式
-        self.interaction_patterns = {
-            "zero_point": [
-                (r"是否启动机器人控制系统.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"按.*[oO].*启动机器人", "o"),
-                (r"是否开始标定.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"请确认.*是否正确.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"是否保存标定结果.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                # 增加更多可能的提示格式
-                (r"确认.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"继续.*[\(（][yY]/[nN][\)）][:：]?", "y")
-            ],
-            "head_hand": [
-                (r"是否开始一键标定流程.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"是否启动机器人控制系统.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"请确认机器人已经上电.*回车继续", "\n"),
-                (r"机器人将开始运动.*是否继续.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                (r"是否继续头部标定.*[\(（][yY]/[nN][\)）][:：]?", "y"),
-                # 头部标定完成后的保存确认
-                (r"按下回车键继续保存文件.*ctrl\+c退出", "\n"),
-                # 手臂标定完成后的确认
-                (r"标定已完成.*是否应用新的零点位置", "y"),
-                (r"输入选项.*y/yes.*确认并保存标定结果", "y"),
-                (r"标定完成.*按任意键退出", "\n"),
-                # 通用提示格式
-                (r"按回车键继续", "\n"),
-                (r"按Enter继续", "\n"),
-                (r"Press Enter", "\n")
-            ]
-        }
+        # 各标定类型的交互提示匹配器
+        self.prompt_matchers = calibration_prompt_matchers
     
     async def start_calibration(self, robot_id: str, calibration_type: str) -> CalibrationSession:
         """开始标定"""
@@ -97,6 +157,7 @@ class CalibrationService:
         # 创建新会话
         session_id = f"cal_{robot_id}_{int(datetime.now().timestamp())}"
         session = CalibrationSession(session_id, robot_id, calibration_type)
+        session.timeline = calibration_timelines.start(session_id, robot_id, calibration_type)
         self.sessions[session_id] = session
         
         # 启动标定任务
@@ -148,7 +209,9 @@ class CalibrationService:
     async def _run_simulator_calibration(self, session: CalibrationSession):
         """运行模拟器标定"""
         # 启动模拟器脚本
-        session.simulator_script_id = ssh_service.simulator.start_calibration_script(
+        simulator = ssh_service.simulator_for(session.robot_id)
+        session.timeline.begin("command_launch", script=session.calibration_type)
+        session.simulator_script_id = simulator.start_calibration_script(
             session.calibration_type
         )
         
@@ -160,40 +223,29 @@ class CalibrationService:
         script_finished = False
         no_output_count = 0
         max_no_output_cycles = 50  # 最多等待5秒没有新输出
+        scanner = self.prompt_matchers.get(session.calibration_type, PromptMatcher([])).scanner()
         
         while not script_finished:
-            script_running = ssh_service.simulator.is_script_running(session.simulator_script_id)
+            script_running = simulator.is_script_running(session.simulator_script_id)
             
-            # 获取输出
-            output = ssh_service.simulator.get_script_output(session.simulator_script_id)
+            # 获取输出（模拟器按整行输出）
+            output = simulator.get_script_output(session.simulator_script_id)
             if output:
                 no_output_count = 0  # 重置计数器
-                lines = output.split('\n')
-                for line in lines:
-                    if line.strip():
-                        session.logs.append(line)
-                        await self._broadcast_log(session, line)
-                        
-                        # 检查交互点
-                        for pattern, default_response in self.interaction_patterns.get(session.calibration_type, []):
-                            if re.search(pattern, line, re.IGNORECASE):
-                                session.status = "waiting_for_user"
-                                session.user_prompt = line
-                                await self._broadcast_status(session)
-                                
-                                # 模拟器模式下自动响应，无需等待用户
-                                await asyncio.sleep(0.5)  # 短暂延迟模拟用户思考时间
-                                
-                                # 发送默认响应到模拟器
-                                ssh_service.simulator.send_script_input(
-                                    session.simulator_script_id, 
-                                    default_response
-                                )
-                                
-                                session.status = "running"
-                                session.user_prompt = None
-                                await self._broadcast_status(session)
-                                break
+                session.timeline.first_output()
+                for line in scanner.feed(output + "\n"):
+                    session.logs.append(line.text)
+                    await self._broadcast_log(session, line.text)
+                    
+                    # 检查交互点
+                    if line.prompt:
+                        await self._auto_respond(
+                            session,
+                            line.prompt,
+                            lambda response: simulator.send_script_input(
+                                session.simulator_script_id, response
+                            )
+                        )
             else:
                 no_output_count += 1
             
@@ -205,15 +257,23 @@ class CalibrationService:
                     break
                 # 否则继续等待，可能还有缓冲输出
             
-            await asyncio.sleep(0.1)
+            await simulator_clock.sleep(0.1)
         
         # 检查脚本执行结果
-        execution_success = ssh_service.simulator.get_script_result(session.simulator_script_id)
-        if execution_success:
+        execution_success = simulator.get_script_result(session.simulator_script_id)
+        await self._finish_calibration(session, bool(execution_success), "头手标定失败")
+    
+    async def _finish_calibration(self, session: CalibrationSession, success: bool, error_message: str, **args):
+        """记录标定结果并广播状态（头手标定失败时额外发送专用错误消息）"""
+        session.timeline.end("data_collection")
+        session.timeline.mark("result", success=success, **args)
+        if success:
             session.status = "success"
+            logger.info(f"标定 {session.session_id} 完成，交互提示响应: {session.timeline.prompt_response()}")
         else:
             session.status = "failed"
-            session.error_message = "头手标定失败"
+            session.error_message = error_message
+            logger.warning(f"标定 {session.session_id} 失败: {error_message}")
             
             # 对于头手标定失败，发送特定的错误消息
             if session.calibration_type == "head_hand":
@@ -237,142 +297,159 @@ class CalibrationService:
         else:  # head_hand
             command = "/root/kuavo_ws/src/kuavo-ros-opensource/scripts/joint_cali/One_button_start.sh"
         
-        # 创建交互式SSH通道
-        channel = ssh_client.invoke_shell()
+        session.timeline.begin("command_launch", command=command)
+        
+        # 创建交互式SSH通道（打开通道需要一次网络往返，放到线程池中执行）
+        loop = asyncio.get_event_loop()
+        channel = await loop.run_in_executor(self.executor, ssh_client.invoke_shell)
         session.ssh_channel = channel
         
         # 设置通道参数
-        channel.settimeout(0.1)  # 设置非阻塞模式
+        channel.settimeout(CHANNEL_READ_TIMEOUT)
         channel.set_combine_stderr(True)  # 合并stderr到stdout
         
-        # 等待shell准备就绪
-        await asyncio.sleep(0.5)
+        # 等待shell准备就绪（同时清空登录输出）
+        with session.timeline.span("shell_ready"):
+            await loop.run_in_executor(self.executor, self._wait_for_shell_ready, channel)
         
-        # 清空初始输出
-        try:
-            initial_data = channel.recv(4096)
-            logger.debug(f"清空初始输出: {repr(initial_data)}")
-        except socket.timeout:
-            pass
+        # 就绪后再启动读取线程，登录输出已被就绪等待清空
+        stream = ChannelStream(channel, self.executor, name=f"calibration-reader-{session.session_id}")
+        stream.start()
         
-        # 发送命令
+        # 发送命令（包装后会先输出进程标记，用于取消时按进程组清理）；
+        # exec替换shell进程，程序结束时通道随之关闭并带回程序的退出码
         logger.info(f"发送标定命令: {command}")
-        channel.send(f"{command}\n")
+        await stream.write(f"exec {ssh_service.wrap_tracked_command(command)}\n")
         
-        # 监控输出
-        buffer = ""
-        interaction_patterns = self.interaction_patterns.get(session.calibration_type, [])
-        last_buffer_check = ""
+        # 监控输出，交互提示在增量扫描中检测（包括未换行的提示）
+        scanner = self.prompt_matchers.get(session.calibration_type, PromptMatcher([])).scanner()
         
-        while True:
-            try:
-                # 尝试读取数据
-                data = channel.recv(1024).decode('utf-8', errors='ignore')
-                if data:
-                    logger.debug(f"接收到原始数据: {repr(data)}")
-                    buffer += data
-                    
-                    # 按行处理
-                    lines = buffer.split('\n')
-                    
-                    # 处理完整的行
-                    for line in lines[:-1]:
-                        if line.strip():
-                            session.logs.append(line)
-                            await self._broadcast_log(session, line)
-                            
-                            # 检查交互点
-                            for pattern, default_response in interaction_patterns:
-                                if re.search(pattern, line, re.IGNORECASE):
-                                    logger.info(f"检测到用户提示: {line}")
-                                    session.status = "waiting_for_user"
-                                    session.user_prompt = line
-                                    await self._broadcast_status(session)
-                                    
-                                    # 自动响应，无需等待用户
-                                    await asyncio.sleep(0.5)  # 短暂延迟模拟处理时间
-                                    
-                                    # 发送默认响应
-                                    channel.send(f"{default_response}\n")
-                                    logger.info(f"自动发送响应: {default_response}")
-                                    
-                                    session.status = "running"
-                                    session.user_prompt = None
-                                    await self._broadcast_status(session)
-                                    break
-                    
-                    # 保留未完成的行
-                    buffer = lines[-1]
+        try:
+            while True:
+                data = await stream.read()
+                if data is None:
+                    # 标定程序退出（或连接断开），通道结束
+                    break
+                
+                logger.debug(f"接收到原始数据: {repr(data)}")
+                INTERACTIVE_BYTES.inc(len(data), mode="calibration")
+                INTERACTIVE_CHUNKS.inc(mode="calibration")
+                session.timeline.first_output()
+                if session.pending_ack:
+                    session.pending_ack.on_output(data)
+                
+                for line in scanner.feed(data):
+                    if ssh_service.track_process_marker(session.robot_id, line.text, session.calibration_type):
+                        self._persist(session)
+                        continue
+                    session.logs.append(line.text)
+                    await self._broadcast_log(session, line.text)
                     
-                    # 检查缓冲区中的部分内容是否包含提示
-                    # 处理没有换行符的提示
-                    if buffer and buffer != last_buffer_check:
-                        for pattern, default_response in interaction_patterns:
-                            if re.search(pattern, buffer, re.IGNORECASE):
-                                logger.info(f"在缓冲区检测到用户提示: {buffer}")
-                                session.logs.append(buffer)
-                                await self._broadcast_log(session, buffer)
-                                
-                                session.status = "waiting_for_user"
-                                session.user_prompt = buffer
-                                await self._broadcast_status(session)
-                                
-                                # 自动响应，无需等待用户
-                                await asyncio.sleep(0.5)  # 短暂延迟模拟处理时间
-                                
-                                # 发送默认响应
-                                channel.send(f"{default_response}\n")
-                                logger.info(f"自动发送响应: {default_response}")
-                                
-                                session.status = "running"
-                                session.user_prompt = None
-                                await self._broadcast_status(session)
-                                buffer = ""  # 清空缓冲区
-                                break
-                        last_buffer_check = buffer
-            
+                    # 检查交互点（响应在程序再次输出后才算完成）
+                    if line.prompt:
+                        await self._auto_respond(
+                            session, line.prompt, lambda response: stream.write(f"{response}\n"), acknowledge=True
+                        )
+        finally:
+            if session.pending_ack:
+                session.pending_ack.close()
+        
+        # 按程序退出码判断结果（-1 表示连接断开，没有收到退出码）
+        exit_status = await loop.run_in_executor(self.executor, self._wait_exit_status, channel)
+        if exit_status == -1:
+            error_message = "标定程序未返回退出码（连接已断开）"
+        else:
+            error_message = f"标定程序退出码 {exit_status}"
+        await self._finish_calibration(session, exit_status == 0, error_message, exit_status=exit_status)
+    
+    @staticmethod
+    def _wait_exit_status(channel, timeout: float = EXIT_STATUS_TIMEOUT) -> int:
+        """等待远端退出码，超时或通道异常关闭时返回-1"""
+        if channel.status_event.wait(timeout):
+            return channel.exit_status
+        return -1
+    
+    def _wait_for_shell_ready(self, channel, timeout: float = SHELL_READY_TIMEOUT) -> float:
+        """
+        发送哨兵命令并等待其输出，收到即说明shell已开始处理输入
+        
+        Returns:
+            实际等待的时间（秒），超时也照常返回
+        """
+        started = time.monotonic()
+        channel.send(f"{SHELL_READY_COMMAND}\n")
+        
+        output = ""
+        while time.monotonic() - started < timeout:
+            try:
+                data = channel.recv(4096)
             except socket.timeout:
-                # 超时是正常的，检查缓冲区
-                # 如果缓冲区有内容且超过一定时间没有新数据，也要检查是否是提示
-                if buffer and buffer.strip():
-                    for pattern, default_response in interaction_patterns:
-                        if re.search(pattern, buffer, re.IGNORECASE):
-                            logger.info(f"超时后在缓冲区检测到用户提示: {buffer}")
-                            session.logs.append(buffer)
-                            await self._broadcast_log(session, buffer)
-                            
-                            session.status = "waiting_for_user"
-                            session.user_prompt = buffer
-                            await self._broadcast_status(session)
-                            
-                            # 自动响应，无需等待用户
-                            await asyncio.sleep(0.5)  # 短暂延迟模拟处理时间
-                            
-                            # 发送默认响应
-                            channel.send(f"{default_response}\n")
-                            logger.info(f"自动发送响应: {default_response}")
-                            
-                            session.status = "running"
-                            session.user_prompt = None
-                            await self._broadcast_status(session)
-                            buffer = ""  # 清空缓冲区
-                            break
-            except Exception as e:
-                if "closed" in str(e).lower():
-                    # 通道关闭，标定结束
-                    break
-                else:
-                    logger.error(f"读取输出错误: {str(e)}")
-                    raise
-            
-            # 检查是否结束
-            if not channel.get_transport().is_active():
+                continue
+            if not data:
                 break
-            
-            await asyncio.sleep(0.1)
+            output += data.decode('utf-8', errors='ignore')
+            if SHELL_READY_SENTINEL in output:
+                waited = time.monotonic() - started
+                logger.debug(f"shell已就绪（{waited:.3f}s），清空初始输出: {repr(output)}")
+                return waited
+        
+        logger.warning(f"{timeout:.1f}s 内未收到shell就绪信号，继续执行")
+        return time.monotonic() - started
+    
+    async def _auto_respond(self, session: CalibrationSession, event: PromptEvent,
+                            send: Callable[[str], Optional[Awaitable[None]]], acknowledge: bool = False):
+        """
+        检测到交互提示后自动发送默认响应（send可以是同步函数或协程函数）
         
-        # 标定完成
-        session.status = "success"
+        acknowledge为True时（真实机器人），响应发出后等程序再次输出才结束该交互，
+        期间会话保持等待状态；超时没有输出时广播警告，不重发（重复的输入可能
+        被后续提示读走）。
+        """
+        logger.info(f"检测到用户提示({event.kind.value}): {event.text}")
+        span = session.timeline.begin("prompt", INTERACTION_TRACK, text=event.text, kind=event.kind.value)
+        session.status = "waiting_for_user"
+        session.user_prompt = event.text
+        await self._broadcast_status(session)
+        
+        # 提示已输出说明程序正在等待输入，立即响应
+        ack = None
+        if acknowledge:
+            ack = ResponseAck(event.response)
+            ack.mark_sent()
+            session.pending_ack = ack
+        result = send(event.response)
+        if inspect.isawaitable(result):
+            await result
+        logger.info(f"自动发送响应: {repr(event.response)}")
+        
+        if ack:
+            asyncio.create_task(self._finish_prompt_on_ack(session, ack, span))
+        else:
+            await self._finish_prompt(session, span, response=event.response)
+    
+    async def _finish_prompt_on_ack(self, session: CalibrationSession, ack: ResponseAck, span):
+        """等待程序确认响应后结束交互"""
+        if not await ack.wait(RESPONSE_ACK_TIMEOUT):
+            warning = f"⚠️ 自动响应 {repr(ack.response)} 发出后 {RESPONSE_ACK_TIMEOUT:.0f}s 内程序没有新输出，可能未被读取"
+            logger.warning(f"标定 {session.session_id}: {warning}")
+            session.logs.append(warning)
+            await self._broadcast_log(session, warning)
+            await ack.wait()
+        if session.pending_ack is ack:
+            session.pending_ack = None
+        if ack.confirmed:
+            await self._finish_prompt(session, span, response=ack.response, confirmed=True)
+        else:
+            session.timeline.close(span, response=ack.response, confirmed=False)
+    
+    async def _finish_prompt(self, session: CalibrationSession, span, **args):
+        """结束交互提示：记录响应耗时，恢复运行状态"""
+        session.timeline.close(span, **args)
+        if session.status != "waiting_for_user" or session.pending_ack is not None:
+            # 会话已结束，或已有新的提示在等待确认
+            return
+        session.status = "running"
+        session.user_prompt = None
         await self._broadcast_status(session)
     
     async def send_user_response(self, session_id: str, response: str):
@@ -399,8 +476,50 @@ class CalibrationService:
         
         del self.sessions[session_id]
     
+    def _persist(self, session: CalibrationSession):
+        """登记会话快照，结束的会话删除快照"""
+        if session.status in ["success", "failed"]:
+            session_store.delete(session.session_id)
+            session.timeline.finish(session.status)
+            return
+        
+        def snapshot():
+            return {
+                "session_id": session.session_id,
+                "robot_id": session.robot_id,
+                "calibration_type": session.calibration_type,
+                "status": session.status,
+                "current_step": session.current_step,
+                "user_prompt": session.user_prompt,
+                "logs": session.logs[-SNAPSHOT_LOG_LINES:],
+                "process_groups": list(ssh_service.launched_processes.get(session.robot_id, {}).values())
+            }
+        session_store.save(CALIBRATION_SERVICE, session.session_id, session.robot_id, snapshot)
+    
+    def restore_sessions(self, states: List[dict]) -> int:
+        """
+        从快照恢复会话（后端启动时调用，遗留进程已由调用方清理）
+        
+        标定脚本的终端随后端重启断开，无法继续执行，会话恢复为失败状态，
+        保留日志供查看原因。
+        """
+        restored = 0
+        for state in states:
+            session = CalibrationSession(state["session_id"], state["robot_id"], state["calibration_type"])
+            session.current_step = state.get("current_step", 0)
+            session.logs = state.get("logs", [])
+            session.status = "failed"
+            session.error_message = "后端重启，标定已中断（遗留的标定进程已清理），请重新开始标定"
+            
+            self.sessions[session.session_id] = session
+            self._persist(session)
+            restored += 1
+            logger.info(f"恢复标定会话 {session.session_id}（已中断）")
+        return restored
+    
     async def _broadcast_status(self, session: CalibrationSession):
         """广播状态更新"""
+        self._persist(session)
         message = {
             "type": "calibration_status",
             "data": {
@@ -410,7 +529,8 @@ class CalibrationService:
                 "status": session.status,
                 "current_step": session.current_step,
                 "user_prompt": session.user_prompt,
-                "error_message": getattr(session, 'error_message', None)
+                "error_message": getattr(session, 'error_message', None),
+                "prompt_response": session.timeline.prompt_response()
             }
         }
         await connection_manager.send_to_robot_subscribers(session.robot_id, message)
@@ -464,7 +584,7 @@ def get_calibration_output(self, robot_id: str) -> Optional[str]:
     if robot_id in self.active_calibrations:
         cal = self.active_calibrations[robot_id]
         if cal.get("script_id") and ssh_service.use_simulator:
-            return ssh_service.simulator.get_script_output(cal["script_id"])
+            return ssh_service.simulator_for(robot_id).get_script_output(cal["script_id"])
     return None
 
 def is_calibration_running(self, robot_id: str) -> bool:
@@ -472,7 +592,7 @@ def is_calibration_running(self, robot_id: str) -> bool:
     if robot_id in self.active_calibrations:
         cal = self.active_calibrations[robot_id]
         if cal.get("script_id") and ssh_service.use_simulator:
-            return ssh_service.simulator.is_script_running(cal["script_id"])
+            return ssh_service.simulator_for(robot_id).is_script_running(cal["script_id"])
         return cal.get("is_running", False)
     return False
 
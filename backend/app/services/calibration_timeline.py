@@ -0,0 +1,330 @@
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.services.ssh_service import ssh_service
+from app.simulator.sim_clock import simulator_clock
+
+logger = logging.getLogger(__name__)
+
+
+MAX_TIMELINES = 200          # 保留的会话时间线数量（超出时丢弃最早的）
+PHASE_TRACK = "phase"        # 标定阶段（可嵌套子步骤）
+INTERACTION_TRACK = "interaction"  # 工具确认、交互提示与自动响应
+
+CALIBRATION_PHASE_SECONDS = metrics.histogram(
+    "kuavo_calibration_phase_seconds", "标定各阶段耗时", ["kind", "phase"],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+)
+
+
+class TimelineSpan:
+    """时间线上的一段区间（end为None表示仍在进行）"""
+    __slots__ = ("name", "track", "start", "end", "parent", "args")
+    
+    def __init__(self, name: str, track: str, start: float, parent: Optional["TimelineSpan"], args: Dict[str, Any]):
+        self.name = name
+        self.track = track
+        self.start = start
+        self.end: Optional[float] = None
+        self.parent = parent
+        self.args = args
+    
+    @property
+    def is_open(self) -> bool:
+        return self.end is None
+    
+    def duration(self, now: float) -> float:
+        return (self.end if self.end is not None else now) - self.start
+
+
+class CalibrationTimeline:
+    """
+    单个标定会话的时间线
+    
+    记录工具确认、读取配置、启动命令、首次输出、每次交互提示与自动响应、
+    数据采集、保存、验证等阶段的起止时间。时间取自模拟器虚拟时钟（模拟器
+    模式）或单调时钟，加速运行的模拟器得到的阶段耗时与真实节奏一致。
+    """
+    
+    def __init__(self, session_id: str, robot_id: str, kind: str, clock: Optional[Callable[[], float]] = None):
+        self.session_id = session_id
+        self.robot_id = robot_id
+        self.kind = kind
+        self.clock = clock or (simulator_clock.monotonic if ssh_service.use_simulator else time.monotonic)
+        self.started_at = datetime.now()
+        self.origin = self.clock()
+        self.spans: List[TimelineSpan] = []
+        self.marks: List[Dict[str, Any]] = []
+        self.status: Optional[str] = None
+        self.finished: Optional[float] = None
+        self.first_output_seen = False
+    
+    def now(self) -> float:
+        """距会话开始的秒数"""
+        return self.clock() - self.origin
+    
+    def begin(self, name: str, track: str = PHASE_TRACK, **args) -> TimelineSpan:
+        """开始一段顶层区间（跨越多个调用的阶段，由end()结束）"""
+        return self._open(name, track, None, args)
+    
+    def _open(self, name: str, track: str, parent: Optional[TimelineSpan], args: Dict[str, Any]) -> TimelineSpan:
+        span = TimelineSpan(name, track, self.now(), parent, args)
+        self.spans.append(span)
+        return span
+    
+    def close(self, span: TimelineSpan, **args):
+        if not span.is_open:
+            return
+        span.end = self.now()
+        span.args.update(args)
+        if span.parent is None:
+            CALIBRATION_PHASE_SECONDS.observe(span.end - span.start, kind=self.kind, phase=span.name)
+    
+    def end(self, name: str, **args):
+        """结束最近开始的同名区间（没有进行中的同名区间时忽略）"""
+        span = next((span for span in reversed(self.spans) if span.name == name and span.is_open), None)
+        if span is not None:
+            self.close(span, **args)
+    
+    @contextmanager
+    def span(self, name: str, track: str = PHASE_TRACK, **args):
+        """
+        以上下文方式记录一段区间，嵌套在同一轨道上最近开始且仍在进行的区间内，
+        异常时记录错误信息后继续抛出
+        """
+        parent = next((span for span in reversed(self.spans) if span.track == track and span.is_open), None)
+        span = self._open(name, track, parent, args)
+        try:
+            yield span
+        except BaseException as e:
+            self.close(span, error=str(e) or type(e).__name__)
+            raise
+        self.close(span)
+    
+    def mark(self, name: str, track: str = PHASE_TRACK, **args):
+        """记录一个时间点"""
+        self.marks.append({"name": name, "track": track, "ts": self.now(), "args": args})
+    
+    def first_output(self):
+        """标定程序首次输出：结束命令启动阶段，进入数据采集阶段（只在第一次调用时生效）"""
+        if self.first_output_seen:
+            return
+        self.first_output_seen = True
+        self.mark("first_output")
+        self.end("command_launch")
+        self.begin("data_collection")
+    
+    def finish(self, status: str):
+        """会话结束：关闭仍在进行的区间（之后追加的区间仍会记录，如结束后再执行验证）"""
+        for span in self.spans:
+            if span.is_open:
+                self.close(span, unfinished=True)
+        if self.finished is None:
+            self.status = status
+            self.finished = self.now()
+    
+    @property
+    def wall_time(self) -> float:
+        ends = [span.end for span in self.spans if span.end is not None]
+        return max([self.finished or 0.0] + ends) if self.finished is not None else self.now()
+    
+    def phase_durations(self, track: str = PHASE_TRACK) -> Dict[str, float]:
+        """顶层区间耗时（同名区间累加，如返回步骤2后再次读取配置）"""
+        now = self.now()
+        durations: Dict[str, float] = {}
+        for span in self.spans:
+            if span.parent is None and span.track == track:
+                durations[span.name] = durations.get(span.name, 0.0) + span.duration(now)
+        return durations
+    
+    def prompt_response(self) -> Dict[str, Any]:
+        """交互提示从检测到确认响应的实测耗时"""
+        durations = [span.end - span.start for span in self.spans if span.name == "prompt" and not span.is_open]
+        return {
+            "count": len(durations),
+            "total": round(sum(durations), 3),
+            "max": round(max(durations), 3) if durations else 0.0
+        }
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "robot_id": self.robot_id,
+            "kind": self.kind,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "wall_time": round(self.wall_time, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phase_durations().items()},
+            "prompts": sum(1 for span in self.spans if span.name == "prompt")
+        }
+    
+    def to_trace(self) -> Dict[str, Any]:
+        """
+        Chrome Trace Event格式（chrome://tracing、Perfetto、speedscope可直接打开）
+        
+        阶段和交互分两条轨道，子步骤按时间包含关系嵌套显示为火焰图。
+        """
+        tids = {PHASE_TRACK: 1, INTERACTION_TRACK: 2}
+        now = self.now()
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+             "args": {"name": f"{self.kind} {self.session_id}"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tids[PHASE_TRACK], "args": {"name": "阶段"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tids[INTERACTION_TRACK], "args": {"name": "交互"}}
+        ]
+        for span in self.spans:
+            args = dict(span.args)
+            if span.is_open:
+                args["in_progress"] = True
+            events.append({
+                "name": span.name,
+                "cat": span.track,
+                "ph": "X",
+                "ts": round(span.start * 1e6),
+                "dur": round(span.duration(now) * 1e6),
+                "pid": 1,
+                "tid": tids.get(span.track, 1),
+                "args": args
+            })
+        for mark in self.marks:
+            events.append({
+                "name": mark["name"],
+                "cat": mark["track"],
+                "ph": "i",
+                "s": "t",
+                "ts": round(mark["ts"] * 1e6),
+                "pid": 1,
+                "tid": tids.get(mark["track"], 1),
+                "args": mark["args"]
+            })
+        
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                **self.summary(),
+                "clock": "simulator" if self.clock == simulator_clock.monotonic else "monotonic"
+            }
+        }
+
+
+class _NullTimeline:
+    """未登记时间线的会话（如后端重启后恢复的会话）使用的空实现"""
+    
+    def begin(self, name: str, track: str = PHASE_TRACK, **args):
+        return None
+    
+    def close(self, span, **args):
+        pass
+    
+    def end(self, name: str, **args):
+        pass
+    
+    @contextmanager
+    def span(self, name: str, track: str = PHASE_TRACK, **args):
+        yield None
+    
+    def mark(self, name: str, track: str = PHASE_TRACK, **args):
+        pass
+    
+    def first_output(self):
+        pass
+    
+    def prompt_response(self):
+        return None
+    
+    def finish(self, status: str):
+        pass
+
+
+NULL_TIMELINE = _NullTimeline()
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    data = np.asarray(values, dtype=float)
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {
+        "count": int(data.size),
+        "mean": round(float(data.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(data.max()), 3)
+    }
+
+
+class CalibrationTimelineRecorder:
+    """标定时间线登记处：按会话保存时间线，并汇总多个会话的阶段耗时分布"""
+    
+    def __init__(self, max_timelines: int = MAX_TIMELINES):
+        self.max_timelines = max_timelines
+        self.timelines: "OrderedDict[str, CalibrationTimeline]" = OrderedDict()
+    
+    def start(self, session_id: str, robot_id: str, kind: str) -> CalibrationTimeline:
+        timeline = CalibrationTimeline(session_id, robot_id, kind)
+        self.timelines.pop(session_id, None)
+        self.timelines[session_id] = timeline
+        while len(self.timelines) > self.max_timelines:
+            self.timelines.popitem(last=False)
+        return timeline
+    
+    def get(self, session_id: str) -> Optional[CalibrationTimeline]:
+        return self.timelines.get(session_id)
+    
+    def list(self, kind: Optional[str] = None, robot_id: Optional[str] = None) -> List[CalibrationTimeline]:
+        """按开始时间倒序"""
+        return [
+            timeline for timeline in reversed(self.timelines.values())
+            if (kind is None or timeline.kind == kind) and (robot_id is None or timeline.robot_id == robot_id)
+        ]
+    
+    def stats(self, kind: Optional[str] = None, status: Optional[str] = None) -> Dict[str, Any]:
+        """
+        已结束会话的阶段耗时分布
+        
+        share为该阶段占全部会话总用时的比例，idle为不属于任何阶段的时间
+        （主要是操作员在各步骤之间的停留）。
+        """
+        timelines = [
+            timeline for timeline in self.list(kind)
+            if timeline.finished is not None and (status is None or timeline.status == status)
+        ]
+        result: Dict[str, Any] = {"kind": kind, "status": status, "sessions": len(timelines), "phases": {}}
+        if not timelines:
+            return result
+        
+        wall_times = [timeline.wall_time for timeline in timelines]
+        total_wall = sum(wall_times) or 1.0
+        per_phase: Dict[str, List[float]] = {}
+        prompt_durations: List[float] = []
+        idle: List[float] = []
+        for timeline in timelines:
+            durations = timeline.phase_durations()
+            for name, seconds in durations.items():
+                per_phase.setdefault(name, []).append(seconds)
+            idle.append(max(0.0, timeline.wall_time - sum(durations.values())))
+            prompt_durations.extend(
+                span.duration(timeline.now()) for span in timeline.spans if span.name == "prompt"
+            )
+        per_phase["idle"] = idle
+        
+        phases = {}
+        for name, values in per_phase.items():
+            phases[name] = {**_distribution(values), "share": round(sum(values) / total_wall, 4)}
+        result["phases"] = dict(sorted(phases.items(), key=lambda item: item[1]["share"], reverse=True))
+        result["wall_time"] = _distribution(wall_times)
+        result["dominant_phase"] = next(iter(result["phases"]))
+        if prompt_durations:
+            result["prompt_response"] = _distribution(prompt_durations)
+        return result
+
+
+# 全局标定时间线登记处
+calibration_timelines = CalibrationTimelineRecorder()
\ No newline at end of file
@@ -0,0 +1,306 @@
+import asyncio
+import json
+import shlex
+import socket
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+from app.services.ssh_service import ssh_service
+
+logger = logging.getLogger(__name__)
+
+
+# 远程发布节点名称（模拟器也据此识别该命令）
+PUBLISHER_NODE_NAME = "kuavo_studio_joint_publisher"
+PUBLISH_TOPIC = "/kuavo_arm_traj"
+
+# 远程常驻发布脚本：从stdin逐行读取JSON目标，发布到/kuavo_arm_traj后回显 "ACK <seq>"
+PUBLISHER_SCRIPT = f"""
+import sys, json, rospy
+from sensor_msgs.msg import JointState
+rospy.init_node('{PUBLISHER_NODE_NAME}', anonymous=True, disable_signals=True)
+pub = rospy.Publisher('{PUBLISH_TOPIC}', JointState, queue_size=1)
+deadline = rospy.get_time() + 1.0
+while pub.get_num_connections() == 0 and rospy.get_time() < deadline:
+    rospy.sleep(0.01)
+sys.stdout.write('READY\\n')
+sys.stdout.flush()
+for line in iter(sys.stdin.readline, ''):
+    try:
+        cmd = json.loads(line)
+    except ValueError:
+        continue
+    msg = JointState()
+    msg.header.stamp = rospy.Time.now()
+    msg.name = cmd['name']
+    msg.position = cmd['position']
+    pub.publish(msg)
+    sys.stdout.write('ACK %d\\n' % cmd['seq'])
+    sys.stdout.flush()
+"""
+
+MAX_PUBLISH_RATE = 50.0   # 最大发布频率（Hz）
+ACK_TIMEOUT = 2.0         # 等待发布确认的超时时间（秒）
+READY_TIMEOUT = 5.0       # 等待远程节点就绪的超时时间（秒）
+START_RETRY_INTERVAL = 30.0  # 启动失败后的重试间隔（秒），期间直接视为不可用
+
+
+@dataclass
+class _RobotPublisher:
+    """单个机器人的常驻发布通道"""
+    robot_id: str
+    channel: Any
+    pending: Dict[str, float] = field(default_factory=dict)  # 待发布目标（按关节名合并，后到覆盖先到）
+    submitted: int = 0      # 已提交的目标批次
+    sent: int = 0           # 已发送的最新批次
+    acked: int = 0          # 已确认的最新批次
+    published_count: int = 0
+    coalesced_count: int = 0
+    last_sent_at: float = 0.0
+    ready: threading.Event = field(default_factory=threading.Event)
+    wake: Optional[asyncio.Event] = None
+    sender_task: Optional[asyncio.Task] = None
+    ack_waiters: List[Any] = field(default_factory=list)  # [(batch, future)]
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    running: bool = True
+
+
+class JointCommandPublisher:
+    """
+    关节目标常驻发布服务
+    
+    每台机器人维持一个远程常驻ROS发布节点，关节目标通过SSH通道逐行写入。
+    发送端按最大频率限流，限流期间到达的目标按关节合并，只发布最新值，
+    交互调节时指令可在几十毫秒内到达机器人。
+    """
+    
+    def __init__(self):
+        self.publishers: Dict[str, _RobotPublisher] = {}
+        self._start_locks: Dict[str, asyncio.Lock] = {}
+        self._failed_at: Dict[str, float] = {}
+    
+    async def ensure_started(self, robot_id: str) -> Optional[_RobotPublisher]:
+        """确保机器人的发布通道已启动，启动失败时返回None"""
+        publisher = self.publishers.get(robot_id)
+        if publisher and publisher.running:
+            return publisher
+        
+        if time.time() - self._failed_at.get(robot_id, 0.0) < START_RETRY_INTERVAL:
+            return None
+        
+        lock = self._start_locks.setdefault(robot_id, asyncio.Lock())
+        async with lock:
+            publisher = self.publishers.get(robot_id)
+            if publisher and publisher.running:
+                return publisher
+            
+            try:
+                command = f"python3 -u -c {shlex.quote(PUBLISHER_SCRIPT)}"
+                channel = await ssh_service.open_persistent_channel(robot_id, command)
+            except Exception as e:
+                logger.warning(f"启动关节发布通道失败 {robot_id}: {str(e)}")
+                self._failed_at[robot_id] = time.time()
+                return None
+            
+            publisher = _RobotPublisher(robot_id=robot_id, channel=channel)
+            publisher.loop = asyncio.get_event_loop()
+            publisher.wake = asyncio.Event()
+            threading.Thread(
+                target=self._reader_loop, args=(publisher,),
+                name=f"joint-publisher-{robot_id}", daemon=True
+            ).start()
+            
+            ready = await publisher.loop.run_in_executor(None, publisher.ready.wait, READY_TIMEOUT)
+            if not ready or not publisher.running:
+                logger.warning(f"关节发布通道未就绪: {robot_id}")
+                self._close(publisher)
+                self._failed_at[robot_id] = time.time()
+                return None
+            
+            publisher.sender_task = asyncio.create_task(self._sender_loop(publisher))
+            self.publishers[robot_id] = publisher
+            
+            logger.info(f"关节发布通道已启动: {robot_id}")
+            return publisher
+    
+    async def submit(self, robot_id: str, targets: Dict[str, float]) -> Optional[int]:
+        """
+        提交关节目标（不等待发布）
+        
+        Returns:
+            目标批次号，发布通道不可用时返回None
+        """
+        publisher = await self.ensure_started(robot_id)
+        if not publisher:
+            return None
+        
+        if publisher.submitted > publisher.sent:
+            publisher.coalesced_count += 1
+        publisher.pending.update({name: float(position) for name, position in targets.items()})
+        publisher.submitted += 1
+        publisher.wake.set()
+        return publisher.submitted
+    
+    async def publish(self, robot_id: str, targets: Dict[str, float], timeout: float = ACK_TIMEOUT) -> Optional[bool]:
+        """
+        提交关节目标并等待远程节点确认发布
+        
+        Returns:
+            True: 已确认发布
+            False: 目标已写入通道但未确认（可能已经发布，调用方不应再用其他方式重发）
+            None: 发布通道不可用，目标未发送
+        """
+        batch = await self.submit(robot_id, targets)
+        if batch is None:
+            return None
+        
+        publisher = self.publishers[robot_id]
+        if publisher.acked >= batch:
+            return True
+        
+        future = publisher.loop.create_future()
+        publisher.ack_waiters.append((batch, future))
+        try:
+            if await asyncio.wait_for(future, timeout):
+                return True
+        except asyncio.TimeoutError:
+            logger.warning(f"关节目标发布确认超时: {robot_id} 批次 {batch}")
+            return False
+        
+        # 通道在确认前关闭：目标还没写入通道时可以安全地改用其他方式发送
+        return False if publisher.sent >= batch else None
+    
+    def get_stats(self, robot_id: str) -> Optional[Dict[str, Any]]:
+        """获取发布通道统计信息"""
+        publisher = self.publishers.get(robot_id)
+        if not publisher:
+            return None
+        return {
+            "running": publisher.running,
+            "submitted": publisher.submitted,
+            "published": publisher.published_count,
+            "coalesced": publisher.coalesced_count,
+            "acked": publisher.acked
+        }
+    
+    def stop(self, robot_id: str):
+        """停止机器人的发布通道"""
+        publisher = self.publishers.pop(robot_id, None)
+        self._failed_at.pop(robot_id, None)
+        if publisher:
+            self._close(publisher)
+            logger.info(f"关节发布通道已停止: {robot_id}")
+    
+    def stop_all(self):
+        for robot_id in list(self.publishers.keys()):
+            self.stop(robot_id)
+    
+    async def _sender_loop(self, publisher: _RobotPublisher):
+        """发送任务：限流并合并待发布目标"""
+        min_interval = 1.0 / MAX_PUBLISH_RATE
+        loop = asyncio.get_event_loop()
+        
+        try:
+            while publisher.running:
+                await publisher.wake.wait()
+                publisher.wake.clear()
+                
+                wait = publisher.last_sent_at + min_interval - time.monotonic()
+                if wait > 0:
+                    # 限流等待期间到达的目标会合并进pending
+                    await asyncio.sleep(wait)
+                
+                if not publisher.pending:
+                    continue
+                
+                names = list(publisher.pending.keys())
+                positions = [publisher.pending[name] for name in names]
+                batch = publisher.submitted
+                publisher.pending = {}
+                
+                line = json.dumps({"seq": batch, "name": names, "position": positions}) + "\n"
+                await loop.run_in_executor(None, publisher.channel.sendall, line.encode('utf-8'))
+                
+                publisher.sent = batch
+                publisher.published_count += 1
+                publisher.last_sent_at = time.monotonic()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"关节发布通道写入失败 {publisher.robot_id}: {str(e)}")
+        finally:
+            publisher.running = False
+            if self.publishers.get(publisher.robot_id) is publisher:
+                del self.publishers[publisher.robot_id]
+            self._resolve_waiters(publisher, failed=True)
+    
+    def _reader_loop(self, publisher: _RobotPublisher):
+        """读取线程：处理远程节点的就绪和确认输出"""
+        buffer = ""
+        try:
+            while publisher.running:
+                data = publisher.channel.recv(4096)
+                if not data:
+                    break
+                buffer += data.decode('utf-8', errors='ignore')
+                
+                *lines, buffer = buffer.split('\n')
+                acked = None
+                for line in lines:
+                    line = line.strip()
+                    if line == "READY":
+                        publisher.ready.set()
+                    elif line.startswith("ACK "):
+                        try:
+                            acked = int(line[4:])
+                        except ValueError:
+                            pass
+                    elif line:
+                        logger.debug(f"关节发布通道输出 {publisher.robot_id}: {line}")
+                
+                if acked is not None:
+                    publisher.acked = max(publisher.acked, acked)
+                    publisher.loop.call_soon_threadsafe(self._resolve_waiters, publisher)
+        except (socket.timeout, OSError) as e:
+            logger.warning(f"关节发布通道读取中断 {publisher.robot_id}: {str(e)}")
+        finally:
+            publisher.running = False
+            publisher.ready.set()
+            try:
+                publisher.loop.call_soon_threadsafe(self._close, publisher)
+            except RuntimeError:
+                pass
+    
+    def _resolve_waiters(self, publisher: _RobotPublisher, failed: bool = False):
+        remaining = []
+        for batch, future in publisher.ack_waiters:
+            if future.done():
+                continue
+            if publisher.acked >= batch:
+                future.set_result(True)
+            elif failed:
+                future.set_result(False)
+            else:
+                remaining.append((batch, future))
+        publisher.ack_waiters = remaining
+    
+    def _close(self, publisher: _RobotPublisher):
+        publisher.running = False
+        if publisher.wake:
+            publisher.wake.set()
+        if publisher.sender_task and not publisher.sender_task.done():
+            publisher.sender_task.cancel()
+        try:
+            publisher.channel.close()
+        except Exception:
+            pass
+        if self.publishers.get(publisher.robot_id) is publisher:
+            del self.publishers[publisher.robot_id]
+        self._resolve_waiters(publisher, failed=True)
+
+
+# 全局关节目标发布实例
+joint_command_publisher = JointCommandPublisher()
\ No newline at end of file
@@ -0,0 +1,248 @@
+import asyncio
+import time
+import logging
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+
+import numpy as np
+
+from app.core.joint_limits import OFFSET_ADVISORY_LIMIT, OFFSET_HARD_LIMIT
+from app.services.joint_state_streamer import joint_state_streamer
+from app.services.joint_command_publisher import joint_command_publisher
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_JOG_RATE = 50.0   # 默认发布频率（Hz）
+MAX_JOG_RATE = 100.0
+ECHO_INTERVAL = 0.05      # 实测位置回传间隔（秒）
+
+
+class JointJogSession:
+    """
+    关节连续调节会话
+    
+    客户端持续发送目标位置，会话按固定频率取最新目标发布。每个周期都把
+    目标限制在参考位置的±0.1范围内（超过±0.05给出提示），与标定数据的
+    安全限制一致。
+    """
+    
+    def __init__(self, robot_id: str, joints: List[Dict[str, Any]], rate: float):
+        self.robot_id = robot_id
+        self.rate = rate
+        self.names = [str(joint["name"]) for joint in joints]
+        self.joint_ids = {
+            str(joint["name"]): int(joint["id"]) if joint.get("id") is not None else None
+            for joint in joints
+        }
+        self.index = {name: i for i, name in enumerate(self.names)}
+        
+        # 参考位置（安全限制以此为中心），未知时用NaN表示
+        self.references = np.full(len(self.names), np.nan)
+        self.reference_sources: Dict[str, str] = {}
+        
+        self.pending: Dict[str, float] = {}
+        self.commanded: Dict[str, float] = {}
+        self.tick = 0
+        self.published_ticks = 0
+        self.received_targets = 0
+        self.clamped_count = 0
+        self.started_at = time.time()
+        self.running = True
+    
+    def init_references(self, joints: List[Dict[str, Any]], measured: Optional[Dict[int, float]]) -> List[str]:
+        """
+        确定参考位置：实测位置 > 客户端提供
+        
+        安全限制围绕参考位置计算，有实测值时忽略客户端提供的值，避免客户端移动安全范围；
+        目标本身不能作为参考位置，否则首个目标不受安全限制。
+        
+        Returns:
+            缺少参考位置的关节名称
+        """
+        missing = []
+        for joint in joints:
+            name = str(joint["name"])
+            i = self.index[name]
+            if measured and self.joint_ids[name] in measured:
+                self.references[i] = float(measured[self.joint_ids[name]])
+                self.reference_sources[name] = "measured"
+            elif joint.get("reference") is not None:
+                self.references[i] = float(joint["reference"])
+                self.reference_sources[name] = "client"
+            else:
+                missing.append(name)
+        return missing
+    
+    def set_targets(self, positions: Dict[str, float]) -> List[str]:
+        """
+        更新目标（后到覆盖先到）
+        
+        Returns:
+            未知的关节名称
+        """
+        unknown = []
+        for name, position in positions.items():
+            if name not in self.index:
+                unknown.append(name)
+                continue
+            self.pending[name] = float(position)
+        self.received_targets += 1
+        return unknown
+    
+    def take_limited_targets(self):
+        """
+        取出待发布目标并执行安全限制
+        
+        Returns:
+            (targets, clamped_names, advisory_names)
+        """
+        if not self.pending:
+            return {}, [], []
+        
+        names = list(self.pending.keys())
+        rows = np.array([self.index[name] for name in names])
+        targets = np.array([self.pending[name] for name in names])
+        self.pending = {}
+        
+        # 没有参考位置的关节不发布（开始会话时已拒绝，这里兜底）
+        known = ~np.isnan(self.references[rows])
+        if not known.all():
+            names = [name for name, flag in zip(names, known) if flag]
+            rows, targets = rows[known], targets[known]
+            if not names:
+                return {}, [], []
+        
+        references = self.references[rows]
+        limited = np.clip(targets, references - OFFSET_HARD_LIMIT, references + OFFSET_HARD_LIMIT)
+        clamped = limited != targets
+        advisory = np.abs(limited - references) > OFFSET_ADVISORY_LIMIT
+        
+        self.clamped_count += int(clamped.sum())
+        result = {name: float(value) for name, value in zip(names, limited)}
+        self.commanded.update(result)
+        
+        return (
+            result,
+            [name for name, flag in zip(names, clamped) if flag],
+            [name for name, flag in zip(names, advisory) if flag]
+        )
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "robot_id": self.robot_id,
+            "duration": round(time.time() - self.started_at, 3),
+            "ticks": self.tick,
+            "published_ticks": self.published_ticks,
+            "received_targets": self.received_targets,
+            "clamped_count": self.clamped_count
+        }
+
+
+class JointJogService:
+    """关节连续调节服务（每台机器人同时只允许一个调节会话）"""
+    
+    def __init__(self):
+        self.sessions: Dict[str, JointJogSession] = {}
+    
+    async def start(self, robot_id: str, joints: List[Dict[str, Any]], rate: Optional[float] = None) -> JointJogSession:
+        """开始调节会话"""
+        if robot_id in self.sessions:
+            raise Exception(f"机器人 {robot_id} 已有正在进行的关节调节")
+        
+        if not joints or any("name" not in joint for joint in joints):
+            raise Exception("请提供要调节的关节列表（需包含name）")
+        
+        try:
+            rate = float(DEFAULT_JOG_RATE if rate is None else rate)
+        except (TypeError, ValueError):
+            raise Exception(f"发布频率无效: {rate}")
+        if not rate > 0:
+            raise Exception(f"发布频率必须大于0: {rate}")
+        rate = min(rate, MAX_JOG_RATE)
+        
+        if not await joint_command_publisher.ensure_started(robot_id):
+            raise Exception("关节发布通道不可用")
+        
+        session = JointJogSession(robot_id, joints, rate)
+        
+        # 参考位置使用关节状态流的实测值，没有实测值的关节才使用客户端提供的值
+        measured = await joint_state_streamer.get_latest_positions(robot_id, timeout=1.0)
+        missing = session.init_references(joints, measured)
+        if missing:
+            raise Exception(f"关节 {missing} 缺少参考位置：未收到/joint_states实测位置，请在start消息中提供reference")
+        
+        self.sessions[robot_id] = session
+        logger.info(f"关节调节会话开始: {robot_id}，{len(joints)} 个关节，{rate:.0f}Hz")
+        return session
+    
+    async def run(self, session: JointJogSession, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """固定频率的发布循环：每个周期发布最新目标，并回传实测位置（出错时记录日志后抛出）"""
+        try:
+            await self._run(session, send)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            session.running = False
+            logger.error(f"关节调节发布循环错误 {session.robot_id}: {str(e)}")
+            raise
+    
+    async def _run(self, session: JointJogSession, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        interval = 1.0 / session.rate
+        next_tick = time.monotonic()
+        last_echo = 0.0
+        
+        while session.running:
+            next_tick += interval
+            session.tick += 1
+            
+            targets, clamped, advisory = session.take_limited_targets()
+            if targets:
+                await joint_command_publisher.submit(session.robot_id, targets)
+                session.published_ticks += 1
+            
+            now = time.monotonic()
+            if targets or now - last_echo >= ECHO_INTERVAL:
+                last_echo = now
+                frame = joint_state_streamer.get_cached_frame(session.robot_id)
+                measured = {}
+                if frame:
+                    measured = {
+                        name: frame.positions.get(joint_id)
+                        for name, joint_id in session.joint_ids.items()
+                        if joint_id in frame.positions
+                    }
+                
+                message = {
+                    "type": "jog_state",
+                    "data": {
+                        "tick": session.tick,
+                        "commanded": dict(session.commanded),
+                        "measured": measured,
+                        "measured_seq": frame.seq if frame else None
+                    }
+                }
+                if clamped:
+                    message["data"]["clamped"] = clamped
+                    message["data"]["warnings"] = [
+                        f"关节 {name} 的目标超过安全范围(±{OFFSET_HARD_LIMIT})，已限制" for name in clamped
+                    ]
+                elif advisory:
+                    message["data"]["warnings"] = [
+                        f"关节 {name} 的偏移超过建议范围(±{OFFSET_ADVISORY_LIMIT})，请谨慎操作" for name in advisory
+                    ]
+                await send(message)
+            
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+    
+    def stop(self, robot_id: str) -> Optional[Dict[str, Any]]:
+        """结束调节会话"""
+        session = self.sessions.pop(robot_id, None)
+        if not session:
+            return None
+        session.running = False
+        logger.info(f"关节调节会话结束: {session.summary()}")
+        return session.summary()
+
+
+# 全局关节调节服务实例
+joint_jog_service = JointJogService()
\ No newline at end of file
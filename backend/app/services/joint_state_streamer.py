@@ -0,0 +1,311 @@
+import asyncio
+import re
+import shlex
+import socket
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Any
+
+from app.services.ssh_service import ssh_service
+
+logger = logging.getLogger(__name__)
+
+
+# 远程订阅节点名称（模拟器也据此识别该命令）
+STREAMER_NODE_NAME = "kuavo_studio_js_streamer"
+
+# 远程常驻订阅脚本：订阅/joint_states，限频后每帧输出一行 "JS <stamp> <p1>,<p2>,..."
+STREAMER_SCRIPT = f"""
+import sys, rospy
+from sensor_msgs.msg import JointState
+rospy.init_node('{STREAMER_NODE_NAME}', anonymous=True, disable_signals=True)
+last = [0.0]
+def callback(msg):
+    now = rospy.get_time()
+    if now - last[0] < 0.02:
+        return
+    last[0] = now
+    stamp = msg.header.stamp.to_sec() or now
+    sys.stdout.write('JS %.6f %s\\n' % (stamp, ','.join(repr(float(p)) for p in msg.position)))
+    sys.stdout.flush()
+rospy.Subscriber('/joint_states', JointState, callback, queue_size=1)
+rospy.spin()
+"""
+
+FRAME_MAX_AGE = 1.0          # 缓存帧的最大有效时间（秒）
+STREAM_START_TIMEOUT = 3.0   # 等待首帧的超时时间（秒）
+STREAM_RETRY_INTERVAL = 30.0 # 启动失败后的重试间隔（秒）
+
+# 浮点数（支持科学计数法）
+FLOAT_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+@dataclass
+class JointStateFrame:
+    """关节状态帧"""
+    positions: Dict[int, float]  # 关节ID（从1开始，对应/joint_states中的顺序）-> 位置
+    stamp: float                 # 机器人端时间戳
+    received_at: float           # 本地接收时间
+    seq: int
+
+
+def positions_from_values(values: List[float]) -> Dict[int, float]:
+    """将/joint_states的position数组转换为 关节ID -> 位置"""
+    return {index: value for index, value in enumerate(values, 1)}
+
+
+def parse_joint_state_positions(output: str) -> Dict[int, float]:
+    """
+    解析rostopic echo输出中的position字段
+    
+    同时支持 "position: [0.1, -2.5e-05]" 和逐行 "- 0.1" 两种格式
+    """
+    match = re.search(r'position:(.*?)(?:\n\s*velocity:|\n\s*effort:|\n---|\Z)', output, re.S)
+    if not match:
+        return {}
+    return positions_from_values([float(value) for value in FLOAT_PATTERN.findall(match.group(1))])
+
+
+@dataclass
+class _RobotJointStream:
+    """单个机器人的关节状态流"""
+    robot_id: str
+    channel: Any
+    thread: Optional[threading.Thread] = None
+    latest: Optional[JointStateFrame] = None
+    waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(default_factory=list)  # 等待下一帧的协程
+    subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = field(default_factory=list)
+    frames_received: int = 0
+    running: bool = True
+
+
+class JointStateStreamer:
+    """
+    关节状态流服务
+    
+    每台机器人维持一个远程常驻订阅进程，位置帧通过SSH通道持续推送到本地的
+    最新值缓存。读取当前关节位置不再需要每次启动rostopic。
+    """
+    
+    def __init__(self):
+        self.streams: Dict[str, _RobotJointStream] = {}
+        self._start_locks: Dict[str, asyncio.Lock] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    async def ensure_started(self, robot_id: str) -> Optional[_RobotJointStream]:
+        """确保机器人的关节状态流已启动，启动失败时返回None"""
+        stream = self.streams.get(robot_id)
+        if stream and stream.running:
+            return stream
+        
+        if time.time() - self._failed_at.get(robot_id, 0.0) < STREAM_RETRY_INTERVAL:
+            return None
+        
+        lock = self._start_locks.setdefault(robot_id, asyncio.Lock())
+        async with lock:
+            stream = self.streams.get(robot_id)
+            if stream and stream.running:
+                return stream
+            
+            try:
+                command = f"python3 -u -c {shlex.quote(STREAMER_SCRIPT)}"
+                channel = await ssh_service.open_persistent_channel(robot_id, command)
+            except Exception as e:
+                logger.warning(f"启动关节状态流失败 {robot_id}: {str(e)}")
+                self._failed_at[robot_id] = time.time()
+                return None
+            
+            stream = _RobotJointStream(robot_id=robot_id, channel=channel)
+            stream.thread = threading.Thread(
+                target=self._reader_loop, args=(stream,),
+                name=f"joint-state-{robot_id}", daemon=True
+            )
+            with self._lock:
+                self.streams[robot_id] = stream
+            stream.thread.start()
+            
+            logger.info(f"关节状态流已启动: {robot_id}")
+            return stream
+    
+    def get_cached_frame(self, robot_id: str, max_age: float = FRAME_MAX_AGE) -> Optional[JointStateFrame]:
+        """获取缓存中的最新帧（超过有效期返回None）"""
+        stream = self.streams.get(robot_id)
+        if not stream or not stream.latest:
+            return None
+        if time.time() - stream.latest.received_at > max_age:
+            return None
+        return stream.latest
+    
+    async def get_latest_positions(
+        self,
+        robot_id: str,
+        timeout: float = STREAM_START_TIMEOUT
+    ) -> Optional[Dict[int, float]]:
+        """
+        获取最新关节位置
+        
+        缓存中有有效帧时立即返回；流刚启动时等待首帧，超时返回None
+        """
+        frame = self.get_cached_frame(robot_id)
+        if frame:
+            return dict(frame.positions)
+        
+        stream = await self.ensure_started(robot_id)
+        if not stream:
+            return None
+        
+        # 在事件循环上等待读取线程的通知，不占用线程池
+        loop = asyncio.get_event_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            stream.waiters.append((loop, waiter))
+        try:
+            if stream.running:
+                await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                stream.waiters = [(item_loop, item) for item_loop, item in stream.waiters if item is not waiter]
+        
+        frame = self.get_cached_frame(robot_id)
+        if not frame:
+            logger.warning(f"关节状态流 {timeout:.1f}s 内没有数据: {robot_id}")
+            return None
+        return dict(frame.positions)
+    
+    async def subscribe(self, robot_id: str) -> Optional[asyncio.Queue]:
+        """
+        订阅关节状态帧
+        
+        返回的队列只保留最新一帧，消费方处理不过来时旧帧会被丢弃
+        """
+        stream = await self.ensure_started(robot_id)
+        if not stream:
+            return None
+        
+        queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            stream.subscribers.append((asyncio.get_event_loop(), queue))
+        return queue
+    
+    def unsubscribe(self, robot_id: str, queue: asyncio.Queue):
+        """取消订阅"""
+        stream = self.streams.get(robot_id)
+        if not stream:
+            return
+        with self._lock:
+            stream.subscribers = [(loop, q) for loop, q in stream.subscribers if q is not queue]
+    
+    def stop(self, robot_id: str):
+        """停止机器人的关节状态流"""
+        with self._lock:
+            stream = self.streams.pop(robot_id, None)
+        self._failed_at.pop(robot_id, None)
+        if stream:
+            stream.running = False
+            try:
+                stream.channel.close()
+            except Exception:
+                pass
+            logger.info(f"关节状态流已停止: {robot_id}")
+    
+    def stop_all(self):
+        for robot_id in list(self.streams.keys()):
+            self.stop(robot_id)
+    
+    def _reader_loop(self, stream: _RobotJointStream):
+        """读取线程：解析通道输出并更新最新值缓存"""
+        buffer = ""
+        try:
+            while stream.running:
+                data = stream.channel.recv(4096)
+                if not data:
+                    break
+                buffer += data.decode('utf-8', errors='ignore')
+                
+                *lines, buffer = buffer.split('\n')
+                frame = None
+                for line in lines:
+                    parsed = self._parse_frame_line(line, stream)
+                    if parsed:
+                        frame = parsed
+                    elif line.strip():
+                        logger.debug(f"关节状态流输出 {stream.robot_id}: {line.strip()}")
+                
+                # 一次读取中的多帧只发布最后一帧
+                if frame:
+                    self._publish(stream, frame)
+        except (socket.timeout, OSError) as e:
+            logger.warning(f"关节状态流读取中断 {stream.robot_id}: {str(e)}")
+        finally:
+            stream.running = False
+            self._notify_waiters(stream)
+            with self._lock:
+                if self.streams.get(stream.robot_id) is stream:
+                    del self.streams[stream.robot_id]
+            if stream.frames_received == 0:
+                # 没有收到任何数据，说明远程环境不可用，暂缓重试
+                self._failed_at[stream.robot_id] = time.time()
+            logger.info(f"关节状态流已结束: {stream.robot_id}（共 {stream.frames_received} 帧）")
+    
+    def _parse_frame_line(self, line: str, stream: _RobotJointStream) -> Optional[JointStateFrame]:
+        parts = line.strip().split(' ', 2)
+        if len(parts) < 2 or parts[0] != "JS":
+            return None
+        try:
+            values = [float(value) for value in parts[2].split(',')] if len(parts) == 3 and parts[2] else []
+            stream.frames_received += 1
+            return JointStateFrame(
+                positions=positions_from_values(values),
+                stamp=float(parts[1]),
+                received_at=time.time(),
+                seq=stream.frames_received
+            )
+        except ValueError:
+            return None
+    
+    def _publish(self, stream: _RobotJointStream, frame: JointStateFrame):
+        stream.latest = frame
+        self._notify_waiters(stream)
+        
+        with self._lock:
+            subscribers = list(stream.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer_latest, queue, frame)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.unsubscribe(stream.robot_id, queue)
+    
+    def _notify_waiters(self, stream: _RobotJointStream):
+        """唤醒等待帧的协程（在读取线程中调用）"""
+        with self._lock:
+            waiters, stream.waiters = stream.waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(self._resolve_waiter, waiter)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+    
+    @staticmethod
+    def _resolve_waiter(waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
+    
+    @staticmethod
+    def _offer_latest(queue: asyncio.Queue, frame: JointStateFrame):
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(frame)
+
+
+# 全局关节状态流实例
+joint_state_streamer = JointStateStreamer()
\ No newline at end of file
@@ -0,0 +1,328 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Any, Iterable, Sequence
+
+import numpy as np
+
+from app.core.joint_limits import (
+    OFFSET_SANITY_LIMIT,
+    POSITION_DEVIATION_LIMIT,
+    ZERO_POSITION_LIMIT,
+    offset_limit_masks,
+    offset_limit_messages
+)
+
+logger = logging.getLogger(__name__)
+
+
+class JointTable:
+    """
+    基于NumPy数组的关节数据表
+    
+    id、zero_position、offset、current_position按列存储，范围检查、
+    与原始快照的差值计算都是整列的向量运算，不再逐个关节循环。
+    """
+    
+    def __init__(
+        self,
+        ids: Sequence[int],
+        names: Sequence[str],
+        zero_position: Sequence[float],
+        offset: Sequence[float],
+        current_position: Sequence[float],
+        status: Optional[Sequence[str]] = None
+    ):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = list(names)
+        self.zero_position = np.asarray(zero_position, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.current_position = np.asarray(current_position, dtype=np.float64)
+        self.status = list(status) if status is not None else ["normal"] * len(self.names)
+        
+        self._build_index()
+        
+        # 自上次取出以来发生变化的行（用于只向前端发送变化的关节）
+        self.dirty = set()
+    
+    def _build_index(self):
+        # id -> 行号索引。全身标定中手臂(2-15)与腿部(1-14)的id重叠，重复id沿用原有的两种解析规则：
+        # 单个关节更新按列表顺序查找（取第一行），批量合并修改按 {id: 关节} 字典构建（取最后一行）
+        self._index_ids, self._first_index_rows = np.unique(self.ids, return_index=True)
+        _, first_in_reversed = np.unique(self.ids[::-1], return_index=True)
+        self._last_index_rows = len(self.ids) - 1 - first_in_reversed
+        self._first_rows: Dict[int, int] = dict(zip(self._index_ids.tolist(), self._first_index_rows.tolist()))
+    
+    @classmethod
+    def from_joint_data(cls, joint_data: Iterable[Any]) -> "JointTable":
+        """从JointData/JointDataSchema等带关节属性的对象列表构建"""
+        joint_data = list(joint_data)
+        return cls(
+            ids=[joint.id for joint in joint_data],
+            names=[joint.name for joint in joint_data],
+            zero_position=[joint.zero_position for joint in joint_data],
+            offset=[joint.offset for joint in joint_data],
+            current_position=[joint.current_position for joint in joint_data],
+            status=[getattr(joint, "status", "normal") for joint in joint_data]
+        )
+    
+    def to_joint_data(self) -> List[Any]:
+        """转换回JointData列表"""
+        from app.services.calibration_file_service import JointData
+        
+        return [
+            JointData(
+                id=int(joint_id),
+                name=name,
+                current_position=float(current),
+                zero_position=float(zero),
+                offset=float(offset),
+                status=status
+            )
+            for joint_id, name, current, zero, offset, status in zip(
+                self.ids, self.names, self.current_position,
+                self.zero_position, self.offset, self.status
+            )
+        ]
+    
+    def row_of(self, joint_id: int) -> Optional[int]:
+        """按关节id定位行号（O(1)），不存在时返回None"""
+        return self._first_rows.get(int(joint_id))
+    
+    def set_position(self, joint_id: int, position: float, update_offset: bool = False) -> Optional[int]:
+        """
+        更新单个关节的当前位置
+        
+        Args:
+            joint_id: 关节id
+            position: 实测位置
+            update_offset: 是否同时把偏移值更新为 position - zero_position
+        
+        Returns:
+            更新的行号，关节不存在时返回None
+        """
+        row = self._first_rows.get(int(joint_id))
+        if row is None:
+            return None
+        self.current_position[row] = position
+        if update_offset:
+            self.offset[row] = position - self.zero_position[row]
+        self.dirty.add(row)
+        return row
+    
+    def append_joint(
+        self,
+        joint_id: int,
+        name: str,
+        current_position: float = 0.0,
+        zero_position: float = 0.0,
+        offset: float = 0.0,
+        status: str = "normal"
+    ) -> int:
+        """追加一个关节（需要重建索引，只用于标定中出现的未知关节）"""
+        self.ids = np.append(self.ids, np.int64(joint_id))
+        self.names = self.names + [name]
+        self.zero_position = np.append(self.zero_position, zero_position)
+        self.offset = np.append(self.offset, offset)
+        self.current_position = np.append(self.current_position, current_position)
+        self.status = self.status + [status]
+        self._build_index()
+        
+        row = len(self.ids) - 1
+        self.dirty.add(row)
+        return row
+    
+    def mark_dirty(self, rows: Iterable[int]):
+        self.dirty.update(int(row) for row in rows)
+    
+    def take_dirty(self) -> List[int]:
+        """取出并清空变化的行号"""
+        rows = sorted(self.dirty)
+        self.dirty = set()
+        return rows
+    
+    def snapshot(self, rows: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """
+        导出关节数据字典列表（用于广播）
+        
+        各列整体转换为Python列表后再组装，不逐个读取NumPy标量。
+        """
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+        return [
+            {
+                "id": joint_id,
+                "name": self.names[row],
+                "current_position": current,
+                "zero_position": zero,
+                "offset": offset,
+                "status": self.status[row]
+            }
+            for row, joint_id, current, zero, offset in zip(
+                rows.tolist(), self.ids[rows].tolist(), self.current_position[rows].tolist(),
+                self.zero_position[rows].tolist(), self.offset[rows].tolist()
+            )
+        ]
+    
+    def copy(self) -> "JointTable":
+        return JointTable(
+            self.ids.copy(), self.names, self.zero_position.copy(),
+            self.offset.copy(), self.current_position.copy(), self.status
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def rows_for(self, joint_ids: Sequence[int], last: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        查找关节id对应的行号
+        
+        Args:
+            joint_ids: 关节id列表
+            last: 重复id时取最后一行（与按字典合并一致），默认取第一行（与row_of一致）
+        
+        Returns:
+            (rows, found): 行号数组和是否找到的掩码
+        """
+        joint_ids = np.asarray(joint_ids, dtype=np.int64)
+        if len(self._index_ids) == 0:
+            return np.zeros(len(joint_ids), dtype=np.int64), np.zeros(len(joint_ids), dtype=bool)
+        
+        index_rows = self._last_index_rows if last else self._first_index_rows
+        positions = np.searchsorted(self._index_ids, joint_ids)
+        positions = np.clip(positions, 0, len(self._index_ids) - 1)
+        found = self._index_ids[positions] == joint_ids
+        return index_rows[positions], found
+    
+    def apply_updates(self, modified_joints: List[Dict[str, Any]]) -> int:
+        """
+        批量应用关节修改（重复id时修改最后一行，与按 {id: 关节} 字典合并一致）
+        
+        Args:
+            modified_joints: [{"id": 1, "zero_position": 0.1, "offset": 0.01}, ...]
+        
+        Returns:
+            实际应用的修改条数
+        """
+        applied = 0
+        for field in ("zero_position", "offset", "current_position"):
+            updates = [joint for joint in modified_joints if field in joint and joint.get("id") is not None]
+            if not updates:
+                continue
+            
+            rows, found = self.rows_for([joint["id"] for joint in updates], last=True)
+            values = np.asarray([float(joint[field]) for joint in updates], dtype=np.float64)
+            getattr(self, field)[rows[found]] = values[found]
+            self.mark_dirty(rows[found])
+            applied += int(found.sum())
+        
+        return applied
+    
+    def set_current_positions(self, positions: Dict[int, float]):
+        """按关节id写入当前位置，未提供的关节置0"""
+        self.current_position = np.asarray(
+            [positions.get(int(joint_id), 0.0) for joint_id in self.ids], dtype=np.float64
+        )
+    
+    def offset_limit_masks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        偏移值范围检查
+        
+        Returns:
+            (warning_mask, error_mask): 超过建议范围和超过强制限制的掩码
+        """
+        return offset_limit_masks(self.offset)
+    
+    def offset_limit_messages(
+        self,
+        warning_mask: Optional[np.ndarray] = None,
+        error_mask: Optional[np.ndarray] = None
+    ) -> Tuple[List[str], List[str]]:
+        """生成偏移值超限的警告和错误信息（可传入已计算好的掩码）"""
+        return offset_limit_messages(self.names, self.offset, warning_mask, error_mask)
+    
+    def sanity_warnings(self) -> List[str]:
+        """检查零点、偏移和当前位置偏差是否异常"""
+        zero_mask = np.abs(self.zero_position) > ZERO_POSITION_LIMIT
+        offset_mask = np.abs(self.offset) > OFFSET_SANITY_LIMIT
+        deviation = np.abs(self.current_position - self.zero_position)
+        deviation_mask = deviation > POSITION_DEVIATION_LIMIT
+        
+        warnings = []
+        for row in np.flatnonzero(zero_mask | offset_mask | deviation_mask):
+            name = self.names[row]
+            if zero_mask[row]:
+                warnings.append(f"{name}: 零点值异常 ({self.zero_position[row]:.3f})")
+            if offset_mask[row]:
+                warnings.append(f"{name}: 偏移值异常 ({self.offset[row]:.3f})")
+            if deviation_mask[row]:
+                warnings.append(f"{name}: 当前位置与零点差异较大 ({deviation[row]:.3f})")
+        return warnings
+    
+    def diff(self, original: "JointTable", tolerance: float = 1e-9) -> List[Dict[str, Any]]:
+        """
+        计算相对原始快照的修改
+        
+        Returns:
+            [{"id", "name", "field", "old", "new", "delta"}, ...]，只包含有变化的字段
+        """
+        if np.array_equal(self.ids, original.ids):
+            # 行顺序一致时逐行比较（全身标定中手臂与腿部的id会重复）
+            rows = np.arange(len(self.ids))
+            found = np.ones(len(self.ids), dtype=bool)
+        else:
+            rows, found = original.rows_for(self.ids, last=True)
+        changes = []
+        
+        for field in ("zero_position", "offset"):
+            new_values = getattr(self, field)
+            if len(original):
+                old_values = np.where(found, getattr(original, field)[rows], np.nan)
+            else:
+                old_values = np.full(len(self.ids), np.nan)
+            delta = new_values - old_values
+            changed = ~found | (np.abs(delta) > tolerance)
+            
+            for row in np.flatnonzero(changed):
+                changes.append({
+                    "id": int(self.ids[row]),
+                    "name": self.names[row],
+                    "field": field,
+                    "old": None if not found[row] else float(old_values[row]),
+                    "new": float(new_values[row]),
+                    "delta": None if not found[row] else float(delta[row])
+                })
+        
+        changes.sort(key=lambda change: change["id"])
+        return changes
+
+
+def validate_offset_batch(tables: Dict[str, JointTable]) -> Dict[str, Tuple[List[str], List[str]]]:
+    """
+    批量检查多组关节数据（例如整个机队的标定结果）的偏移值范围
+    
+    所有数据拼接成一个数组后一次完成范围判断。
+    
+    Returns:
+        {key: (warnings, errors)}
+    """
+    keys = list(tables.keys())
+    if not keys:
+        return {}
+    
+    merged = JointTable(
+        ids=np.concatenate([tables[key].ids for key in keys]),
+        names=[name for key in keys for name in tables[key].names],
+        zero_position=np.concatenate([tables[key].zero_position for key in keys]),
+        offset=np.concatenate([tables[key].offset for key in keys]),
+        current_position=np.concatenate([tables[key].current_position for key in keys])
+    )
+    warning_mask, error_mask = merged.offset_limit_masks()
+    
+    boundaries = np.cumsum([len(tables[key]) for key in keys])[:-1]
+    results = {}
+    for key, warning_part, error_part in zip(
+        keys, np.split(warning_mask, boundaries), np.split(error_mask, boundaries)
+    ):
+        results[key] = tables[key].offset_limit_messages(warning_part, error_part)
+    return results
\ No newline at end of file
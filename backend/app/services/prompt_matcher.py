@@ -0,0 +1,264 @@
+import asyncio
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+RESPONSE_ACK_TIMEOUT = 5.0  # 自动响应发出后等待程序新输出的时间（秒），超时给出警告
+
+
+class PromptKind(Enum):
+    """交互提示类型"""
+    CONFIRM = "confirm"          # (y/n) 确认
+    START_ROBOT = "start_robot"  # 按 'o' 启动机器人
+    CONTINUE = "continue"        # 回车/任意键继续
+    INPUT = "input"              # 其他需要输入的提示
+
+
+@dataclass(frozen=True)
+class PromptPattern:
+    """交互提示模式"""
+    pattern: str                    # 按小写文本匹配
+    kind: PromptKind
+    response: Optional[str] = None  # 自动响应（None表示由调用方决定）
+
+
+@dataclass
+class PromptEvent:
+    """检测到的交互提示"""
+    kind: PromptKind
+    response: Optional[str]
+    text: str          # 触发提示的整行（或未换行的部分行）
+    pattern: str
+    partial: bool      # 是否在未换行的部分行中检测到
+
+
+@dataclass
+class OutputLine:
+    """扫描得到的一行输出"""
+    text: str
+    prompt: Optional[PromptEvent] = None
+
+
+class PromptMatcher:
+    """
+    多模式交互提示匹配器
+    
+    所有模式合并成一个正则交替式，整块输出只扫描一遍；只有命中的行才再按
+    列表顺序确定具体模式（与逐个模式匹配的结果一致，列表中靠前的优先）。
+    交替式不带分组和IGNORECASE，re可以用各模式的首字符集合快速跳过无关位置，
+    因此文本统一转小写后匹配，模式中的字母需写成小写。
+    """
+    
+    def __init__(self, patterns: Sequence[PromptPattern]):
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(item.pattern) for item in self.patterns]
+        self._detector = re.compile(
+            "|".join(f"(?:{item.pattern})" for item in self.patterns)
+        ) if self.patterns else None
+    
+    def match(self, text: str, partial: bool = False) -> Optional[PromptEvent]:
+        if not self._detector or not text:
+            return None
+        lowered = text.lower()
+        if not self._detector.search(lowered):
+            return None
+        return self._identify(lowered, text, partial)
+    
+    def match_lines(self, lines: Sequence[str]) -> List[Optional[PromptEvent]]:
+        """
+        一次扫描多行，返回每行的提示事件
+        
+        模式都不跨行匹配，所以整块文本只调用一次finditer，再按位置映射回行。
+        """
+        events: List[Optional[PromptEvent]] = [None] * len(lines)
+        if not self._detector or not lines:
+            return events
+        
+        lowered = [line.lower() for line in lines]
+        starts = []
+        position = 0
+        for line in lowered:
+            starts.append(position)
+            position += len(line) + 1
+        
+        rows = {bisect_right(starts, found.start()) - 1 for found in self._detector.finditer("\n".join(lowered))}
+        for row in sorted(rows):
+            events[row] = self._identify(lowered[row], lines[row], False)
+        return events
+    
+    def _identify(self, lowered: str, text: str, partial: bool) -> Optional[PromptEvent]:
+        for item, regex in zip(self.patterns, self._compiled):
+            if regex.search(lowered):
+                return PromptEvent(
+                    kind=item.kind,
+                    response=item.response,
+                    text=text,
+                    pattern=item.pattern,
+                    partial=partial
+                )
+        return None
+    
+    def scanner(self) -> "PromptScanner":
+        return PromptScanner(self)
+
+
+class PromptScanner:
+    """
+    输出流的增量扫描器
+    
+    按块喂入原始输出，返回完整的行及其提示事件。未换行的尾部（例如
+    "(y/n): " 这类等待输入的提示）只在内容变化时检查一次，命中后作为
+    一行输出并清空。
+    """
+    
+    def __init__(self, matcher: PromptMatcher):
+        self.matcher = matcher
+        self.buffer = ""
+        self._checked_tail = ""
+    
+    def feed(self, chunk: str) -> List[OutputLine]:
+        if not chunk:
+            return []
+        self.buffer += chunk.replace('\r\n', '\n')
+        *lines, self.buffer = self.buffer.split('\n')
+        
+        lines = [line for line in lines if line.strip()]
+        results = [
+            OutputLine(text=line, prompt=event)
+            for line, event in zip(lines, self.matcher.match_lines(lines))
+        ]
+        tail = self.check_tail()
+        if tail:
+            results.append(tail)
+        return results
+    
+    def check_tail(self) -> Optional[OutputLine]:
+        """检查未换行的尾部是否是提示（读取超时时也可调用）"""
+        if not self.buffer.strip() or self.buffer == self._checked_tail:
+            return None
+        self._checked_tail = self.buffer
+        
+        event = self.matcher.match(self.buffer, partial=True)
+        if not event:
+            return None
+        line = OutputLine(text=self.buffer, prompt=event)
+        self.buffer = ""
+        self._checked_tail = ""
+        return line
+    
+    def flush(self) -> Optional[OutputLine]:
+        """取出剩余的未换行内容"""
+        if not self.buffer.strip():
+            self.buffer = ""
+            return None
+        line = OutputLine(text=self.buffer, prompt=self.matcher.match(self.buffer, partial=True))
+        self.buffer = ""
+        self._checked_tail = ""
+        return line
+
+
+class ResponseAck:
+    """
+    自动响应的确认
+    
+    提示出现时程序未必已经开始读取输入，过早发出的响应可能被丢弃。响应发出后，
+    程序的下一次输出（新的提示或普通输出）才说明输入已被读取，交互步骤在此
+    之前不算完成。
+    """
+    
+    def __init__(self, response: str):
+        self.response = response
+        self.sent = False
+        self.confirmed = False
+        self._done = asyncio.Event()
+    
+    def mark_sent(self):
+        self.sent = True
+    
+    def on_output(self, text: str):
+        """
+        收到程序输出时调用
+        
+        伪终端会立即回显输入，不论程序是否读取，只有回显的输出不算确认
+        """
+        if text.strip() == self.response.strip():
+            return
+        if self.sent and not self._done.is_set():
+            self.confirmed = True
+            self._done.set()
+    
+    def close(self):
+        """程序已结束，不再等待确认"""
+        self._done.set()
+    
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待确认或关闭，超时返回False"""
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def _patterns(items: Sequence[Tuple[str, PromptKind, Optional[str]]]) -> List[PromptPattern]:
+    return [PromptPattern(pattern, kind, response) for pattern, kind, response in items]
+
+
+# 标定脚本的交互提示及自动响应
+CALIBRATION_PROMPTS: Dict[str, List[PromptPattern]] = {
+    "zero_point": _patterns([
+        (r"是否启动机器人控制系统.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"按.*[oO].*启动机器人", PromptKind.START_ROBOT, "o"),
+        (r"是否开始标定.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"请确认.*是否正确.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"是否保存标定结果.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        # 增加更多可能的提示格式
+        (r"确认.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"继续.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y")
+    ]),
+    "head_hand": _patterns([
+        (r"是否开始一键标定流程.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"是否启动机器人控制系统.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"请确认机器人已经上电.*回车继续", PromptKind.CONTINUE, "\n"),
+        (r"机器人将开始运动.*是否继续.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        (r"是否继续头部标定.*[\(（][yY]/[nN][\)）][:：]?", PromptKind.CONFIRM, "y"),
+        # 头部标定完成后的保存确认
+        (r"按下回车键继续保存文件.*ctrl\+c退出", PromptKind.CONTINUE, "\n"),
+        # 手臂标定完成后的确认
+        (r"标定已完成.*是否应用新的零点位置", PromptKind.CONFIRM, "y"),
+        (r"输入选项.*y/yes.*确认并保存标定结果", PromptKind.CONFIRM, "y"),
+        (r"标定完成.*按任意键退出", PromptKind.CONTINUE, "\n"),
+        # 通用提示格式
+        (r"按回车键继续", PromptKind.CONTINUE, "\n"),
+        (r"按enter继续", PromptKind.CONTINUE, "\n"),
+        (r"press enter", PromptKind.CONTINUE, "\n")
+    ])
+}
+
+# 零点标定分步流程中需要自动响应的提示（响应由会话根据提示内容决定）
+ZERO_POINT_PROMPTS: List[PromptPattern] = _patterns([
+    (r"\(y/n\)", PromptKind.CONFIRM, None),
+    (r"按 ?'o'|按下 ?'o'|按o键|press 'o'", PromptKind.START_ROBOT, None),
+    (r"输入|input", PromptKind.INPUT, None)
+])
+
+# 模拟器零点标定脚本的提示
+SIMULATOR_ZERO_POINT_PROMPTS: List[PromptPattern] = _patterns([
+    (r"\(y/n\)", PromptKind.CONFIRM, None),
+    (r"按 'o'", PromptKind.START_ROBOT, None)
+])
+
+# 一次性执行的标定命令输出中的提示
+ZERO_POINT_COMMAND_PROMPTS: List[PromptPattern] = _patterns([
+    (r"按|press|input|输入", PromptKind.INPUT, None)
+])
+
+calibration_prompt_matchers: Dict[str, PromptMatcher] = {
+    calibration_type: PromptMatcher(patterns) for calibration_type, patterns in CALIBRATION_PROMPTS.items()
+}
+zero_point_prompt_matcher = PromptMatcher(ZERO_POINT_PROMPTS)
+simulator_zero_point_prompt_matcher = PromptMatcher(SIMULATOR_ZERO_POINT_PROMPTS)
+zero_point_command_prompt_matcher = PromptMatcher(ZERO_POINT_COMMAND_PROMPTS)
\ No newline at end of file
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+from app.core.database import SessionLocal
+from app.models.calibration import CalibrationSessionState
+from app.models.robot import Robot
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_FLUSH_INTERVAL = 0.2   # 快照合并写入的间隔（秒）
+RECOVERY_TIMEOUT = 30.0         # 恢复会话时重连机器人、清理进程的总时限（秒）
+
+# 快照来源服务
+ZERO_POINT_SERVICE = "zero_point"
+CALIBRATION_SERVICE = "calibration"
+
+
+class SessionStore:
+    """
+    标定会话状态持久化存储
+    
+    save() 只登记会话的快照函数并唤醒写入任务，写入任务每隔一小段时间
+    取一次各会话的最新快照，合并成一个事务在线程池中写入数据库。状态广播
+    再频繁，每个会话在一个间隔内也只序列化、写入一次。
+    """
+    
+    def __init__(self):
+        # session_id -> (service, robot_id, 快照函数)，None 表示删除
+        self.pending: Dict[str, Optional[Tuple[str, str, Callable[[], Dict[str, Any]]]]] = {}
+        self._writer_task: Optional[asyncio.Task] = None
+        self.flush_count = 0
+        self.written_count = 0
+    
+    def save(self, service: str, session_id: str, robot_id: str, snapshot: Callable[[], Dict[str, Any]]):
+        """登记会话快照（实际写入延后合并进行）"""
+        self.pending[session_id] = (service, robot_id, snapshot)
+        self._schedule()
+    
+    def delete(self, session_id: str):
+        """会话结束后删除快照"""
+        self.pending[session_id] = None
+        self._schedule()
+    
+    def _schedule(self):
+        if self._writer_task and not self._writer_task.done():
+            return
+        try:
+            self._writer_task = asyncio.get_running_loop().create_task(self._writer())
+        except RuntimeError:
+            # 没有事件循环（例如脚本中直接调用）时同步写入
+            self._write_batch(self._take_batch())
+    
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while self.pending:
+            await asyncio.sleep(SNAPSHOT_FLUSH_INTERVAL)
+            batch = self._take_batch()
+            try:
+                await loop.run_in_executor(None, self._write_batch, batch)
+            except Exception as e:
+                logger.warning(f"写入会话快照失败: {str(e)}")
+    
+    async def flush(self):
+        """立即写入所有待写快照（关闭服务前调用）"""
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+        batch = self._take_batch()
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_batch, batch)
+    
+    def _take_batch(self) -> Dict[str, Optional[Tuple[str, str, str]]]:
+        """在事件循环线程中取出待写快照并序列化（会话对象只在这里读取）"""
+        pending, self.pending = self.pending, {}
+        batch = {}
+        for session_id, item in pending.items():
+            if item is None:
+                batch[session_id] = None
+                continue
+            service, robot_id, snapshot = item
+            try:
+                batch[session_id] = (service, robot_id, json.dumps(snapshot(), ensure_ascii=False, default=str))
+            except Exception as e:
+                logger.warning(f"生成会话快照失败 {session_id}: {str(e)}")
+        return batch
+    
+    def _write_batch(self, batch: Dict[str, Optional[Tuple[str, str, str]]]):
+        if not batch:
+            return
+        
+        db = SessionLocal()
+        try:
+            now = datetime.now()
+            for session_id, item in batch.items():
+                if item is None:
+                    db.query(CalibrationSessionState).filter(
+                        CalibrationSessionState.session_id == session_id
+                    ).delete()
+                    continue
+                service, robot_id, state = item
+                db.merge(CalibrationSessionState(
+                    session_id=session_id,
+                    service=service,
+                    robot_id=robot_id,
+                    state=state,
+                    updated_at=now
+                ))
+            db.commit()
+            self.flush_count += 1
+            self.written_count += len(batch)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def load(self, service: str) -> List[Dict[str, Any]]:
+        """读取某个服务保存的全部会话快照"""
+        db = SessionLocal()
+        try:
+            records = db.query(CalibrationSessionState).filter(
+                CalibrationSessionState.service == service
+            ).all()
+            states = []
+            for record in records:
+                try:
+                    states.append(json.loads(record.state))
+                except ValueError:
+                    logger.warning(f"会话快照损坏，已忽略: {record.session_id}")
+            return states
+        finally:
+            db.close()
+    
+    async def recover_sessions(self) -> Dict[str, Any]:
+        """
+        启动时恢复上次运行中的标定会话
+        
+        交互式标定进程的终端随SSH连接一起断开，无法重新接管其输入输出，
+        因此先重新连接机器人（并发进行，有总时限），清理快照中记录的进程组，再由各服务把会话
+        恢复到最近的检查点（零点标定保留已确认的工装、已读取的配置和
+        标定结果，不必从头重新标定）。
+        """
+        from app.services.ssh_service import ssh_service
+        from app.services.zero_point_calibration_service import zero_point_calibration_service
+        from app.services.calibration_service import calibration_service
+        
+        loop = asyncio.get_running_loop()
+        zero_point_states = await loop.run_in_executor(None, self.load, ZERO_POINT_SERVICE)
+        calibration_states = await loop.run_in_executor(None, self.load, CALIBRATION_SERVICE)
+        if not zero_point_states and not calibration_states:
+            return {"zero_point": 0, "calibration": 0, "cleanup": {}}
+        
+        # 恢复进程组记录并重新连接机器人，清理遗留的标定进程
+        cleanup = {}
+        robot_ids = {state["robot_id"] for state in zero_point_states + calibration_states}
+        for state in zero_point_states + calibration_states:
+            for info in state.get("process_groups", []):
+                ssh_service.launched_processes.setdefault(state["robot_id"], {})[int(info["pgid"])] = info
+        
+        async def recover_robot(robot_id: str):
+            if not await self._reconnect_robot(robot_id):
+                return
+            if not ssh_service.use_simulator and ssh_service.launched_processes.get(robot_id):
+                cleanup[robot_id] = await ssh_service.cleanup_calibration_processes(robot_id)
+        
+        # 各机器人并发重连，总时限内未完成的放弃（遗留进程在下次清理时处理）
+        tasks = {asyncio.create_task(recover_robot(robot_id)): robot_id for robot_id in robot_ids}
+        done, pending = await asyncio.wait(tasks, timeout=RECOVERY_TIMEOUT)
+        for task in pending:
+            task.cancel()
+            logger.warning(f"恢复会话时 {RECOVERY_TIMEOUT:.0f}s 内未能连接机器人 {tasks[task]}")
+        for task in done:
+            if task.exception() is not None:
+                logger.warning(f"恢复会话时处理机器人 {tasks[task]} 失败: {task.exception()}")
+        
+        zero_point_count = zero_point_calibration_service.restore_sessions(zero_point_states)
+        calibration_count = calibration_service.restore_sessions(calibration_states)
+        
+        logger.info(
+            f"已恢复标定会话: 零点标定 {zero_point_count} 个，标定 {calibration_count} 个，"
+            f"清理进程: {cleanup}"
+        )
+        return {"zero_point": zero_point_count, "calibration": calibration_count, "cleanup": cleanup}
+    
+    async def _reconnect_robot(self, robot_id: str) -> bool:
+        """按数据库中的机器人信息重新建立SSH连接"""
+        from app.services.ssh_service import ssh_service
+        
+        if ssh_service.use_simulator:
+            ssh_service.connections[robot_id] = "simulator"
+            ssh_service.simulator_for(robot_id).is_connected = True
+            return True
+        
+        if ssh_service.is_connected(robot_id):
+            return True
+        
+        db = SessionLocal()
+        try:
+            robot = db.query(Robot).filter(Robot.id == robot_id).first()
+            if not robot:
+                logger.warning(f"恢复会话时机器人不存在: {robot_id}")
+                return False
+            
+            success, error = await ssh_service.connect(
+                robot_id,
+                robot.ip_address,
+                robot.port,
+                robot.ssh_user,
+                robot.ssh_password_stored
+            )
+            robot.connection_status = "connected" if success else "disconnected"
+            db.commit()
+            
+            if not success:
+                logger.warning(f"恢复会话时无法连接机器人 {robot_id}: {error}，遗留进程将在下次清理时处理")
+            return success
+        finally:
+            db.close()
+
+
+# 全局会话状态存储实例
+session_store = SessionStore()
\ No newline at end of file
@@ -2,7 +2,9 @@ import paramiko
 import asyncio
 from typing import Optional, Tuple, Dict, Any, Callable, AsyncGenerator
 import json
+import shlex
 import logging
+import re
 from concurrent.futures import ThreadPoolExecutor
 import os
 import socket
@@ -13,9 +15,119 @@ import threading
 import queue
 import select
 
+from app.core.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 
+# 清理标定进程后等待其退出的上限和轮询间隔（秒），超时后强制结束
+PROCESS_EXIT_TIMEOUT = 3.0
+PROCESS_EXIT_POLL_INTERVAL = 0.05
+
+# 启动的标定进程先输出 "KUAVO_PROC <pid> <pgid>"，据此记录进程组
+PROCESS_MARKER = "KUAVO_PROC"
+PROCESS_MARKER_PATTERN = re.compile(rf"{PROCESS_MARKER} (\d+) (\d+)")
+
+# 常驻命令通道等待进程标记的上限（秒）
+PERSISTENT_MARKER_TIMEOUT = 5.0
+
+# 关闭常驻命令通道时结束远程进程组：先SIGTERM，约1s内未退出再SIGKILL
+PERSISTENT_KILL_TEMPLATE = (
+    "kill -TERM -- -{pgid} 2>/dev/null; "
+    "for i in $(seq 10); do kill -0 -- -{pgid} 2>/dev/null || exit 0; sleep 0.1; done; "
+    "kill -KILL -- -{pgid} 2>/dev/null; true"
+)
+
+# 没有记录到进程组时（例如后端重启过）兜底清理的标定进程，只匹配标定专用的启动方式
+CALIBRATION_PROCESS_PATTERNS = [
+    "roslaunch.*load_kuavo_real.*cali:=true",
+    "One_button_start.sh"
+]
+
+# 清理脚本：先SIGTERM各进程组和兜底进程，在上限内轮询退出，超时再SIGKILL，并逐项报告结果
+# 输出: GONE <pgid>（清理前已退出）/ TERM <pgid> / KILL <pgid> / PATTERN_TERM / PATTERN_KILL
+CLEANUP_SCRIPT_TEMPLATE = """
+groups='{groups}'
+pattern='{pattern}'
+alive=''
+for g in $groups; do
+    if kill -0 -- -$g 2>/dev/null; then alive="$alive $g"; kill -TERM -- -$g 2>/dev/null; else echo GONE $g; fi
+done
+pattern_alive=''
+if pgrep -f "$pattern" >/dev/null; then pattern_alive=1; pkill -TERM -f "$pattern"; fi
+for i in $(seq {polls}); do
+    left=''
+    for g in $alive; do kill -0 -- -$g 2>/dev/null && left="$left $g"; done
+    if [ -z "$left" ] && ! pgrep -f "$pattern" >/dev/null; then break; fi
+    sleep {interval}
+done
+for g in $alive; do
+    if kill -0 -- -$g 2>/dev/null; then kill -KILL -- -$g 2>/dev/null; echo KILL $g; else echo TERM $g; fi
+done
+if [ -n "$pattern_alive" ]; then
+    if pgrep -f "$pattern" >/dev/null; then pkill -KILL -f "$pattern"; echo PATTERN_KILL; else echo PATTERN_TERM; fi
+fi
+echo CLEANUP_DONE
+"""
+
+SSH_COMMAND_SECONDS = metrics.histogram(
+    "kuavo_ssh_command_seconds", "SSH命令往返耗时（含线程池排队）", ["target"]
+)
+SSH_COMMANDS = metrics.counter("kuavo_ssh_commands_total", "SSH命令数", ["target", "result"])
+EXECUTOR_WAIT_SECONDS = metrics.histogram("kuavo_ssh_executor_wait_seconds", "SSH线程池排队等待耗时")
+INTERACTIVE_BYTES = metrics.counter("kuavo_interactive_read_bytes_total", "交互式会话读取的输出字节数", ["mode"])
+INTERACTIVE_CHUNKS = metrics.counter("kuavo_interactive_read_chunks_total", "交互式会话读取的输出块数", ["mode"])
+INTERACTIVE_CALLBACK_SECONDS = metrics.histogram(
+    "kuavo_interactive_callback_seconds", "交互式会话每块输出的处理耗时（扫描、解析、广播）", ["mode"]
+)
+
+
+class PersistentChannel:
+    """
+    常驻命令通道
+    
+    远程rospy节点以 disable_signals=True 运行、没有pty，仅关闭SSH通道不会让它
+    退出。命令经 wrap_tracked_command 启动并记下进程组，关闭通道时在后台线程中
+    结束整个进程组；其余属性和方法直接转发给paramiko通道。
+    """
+    
+    def __init__(self, channel: paramiko.Channel, pgid: int, pending: bytes = b""):
+        self.channel = channel
+        self.pgid = pgid
+        self._pending = pending  # 读取进程标记时多读到的输出
+        self._closing = False
+    
+    def __getattr__(self, name):
+        return getattr(self.channel, name)
+    
+    def recv(self, nbytes: int) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending[:nbytes], self._pending[nbytes:]
+            return data
+        return self.channel.recv(nbytes)
+    
+    def close(self):
+        if self._closing:
+            return
+        self._closing = True
+        transport = self.channel.get_transport()
+        self.channel.close()
+        if transport is not None and transport.is_active():
+            threading.Thread(
+                target=self._kill_group, args=(transport,), name=f"persistent-kill-{self.pgid}", daemon=True
+            ).start()
+    
+    def _kill_group(self, transport: paramiko.Transport):
+        try:
+            session = transport.open_session(timeout=PERSISTENT_MARKER_TIMEOUT)
+            session.exec_command(PERSISTENT_KILL_TEMPLATE.format(pgid=self.pgid))
+            session.recv_exit_status()
+            session.close()
+            logger.debug(f"常驻命令进程组已结束: pgid={self.pgid}")
+        except Exception as e:
+            logger.warning(f"结束常驻命令进程组失败 pgid={self.pgid}: {str(e)}")
+
+
 class SSHService:
     """SSH服务封装类，支持机器人和上位机双重连接"""
     
@@ -24,12 +136,56 @@ class SSHService:
         self.connections: Dict[str, paramiko.SSHClient] = {}
         self.upper_connections: Dict[str, paramiko.SSHClient] = {}  # 上位机连接
         self.interactive_sessions: Dict[str, Dict[str, Any]] = {}  # 交互式会话
+        self.launched_processes: Dict[str, Dict[int, Dict[str, Any]]] = {}  # robot_id -> {pgid: 进程信息}
         self.use_simulator = os.getenv("USE_ROBOT_SIMULATOR", "false").lower() == "true"
+        # 机队模式：每个robot_id对应一台独立的模拟机器人
+        self.use_simulator_fleet = os.getenv("SIMULATOR_FLEET", "false").lower() == "true"
         
         if self.use_simulator:
-            from app.simulator.robot_simulator import robot_simulator
+            from app.simulator.robot_simulator import robot_simulator, simulator_fleet
             self.simulator = robot_simulator
-            logger.info("使用机器人模拟器模式")
+            self.simulator_fleet = simulator_fleet
+            logger.info("使用机器人模拟器模式" + ("（机队）" if self.use_simulator_fleet else ""))
+    
+    async def _run_in_executor(self, func: Callable, *args):
+        """在SSH线程池中执行同步调用（记录排队等待耗时）"""
+        loop = asyncio.get_event_loop()
+        if not metrics.enabled:
+            return await loop.run_in_executor(self.executor, func, *args)
+        
+        submitted = time.perf_counter()
+        
+        def run():
+            EXECUTOR_WAIT_SECONDS.observe(time.perf_counter() - submitted)
+            return func(*args)
+        
+        return await loop.run_in_executor(self.executor, run)
+    
+    async def _run_command(self, target: str, func: Callable, *args) -> Tuple[bool, str, str]:
+        """在线程池中执行命令并记录往返耗时（计入当前请求的Server-Timing）"""
+        with SSH_COMMAND_SECONDS.time(timing="ssh", target=target):
+            result = await self._run_in_executor(func, *args)
+        SSH_COMMANDS.inc(target=target, result="ok" if result[0] else "error")
+        return result
+    
+    def _instrument_output_callback(self, output_callback: Optional[Callable], mode: str) -> Optional[Callable]:
+        """包装交互式输出回调，统计读取量和每块输出的处理耗时"""
+        if output_callback is None or not metrics.enabled:
+            return output_callback
+        
+        async def callback(data: str):
+            INTERACTIVE_BYTES.inc(len(data), mode=mode)
+            INTERACTIVE_CHUNKS.inc(mode=mode)
+            with INTERACTIVE_CALLBACK_SECONDS.time(mode=mode):
+                await output_callback(data)
+        
+        return callback
+    
+    def simulator_for(self, robot_id: str):
+        """模拟器模式下机器人对应的模拟器（机队模式下每台机器人独立）"""
+        if self.use_simulator_fleet:
+            return self.simulator_fleet.robot(robot_id)
+        return self.simulator
     
     async def connect(self, robot_id: str, host: str, port: int, 
                      username: str, password: str) -> Tuple[bool, Optional[str]]:
@@ -42,7 +198,7 @@ class SSHService:
             loop = asyncio.get_event_loop()
             success, error = await loop.run_in_executor(
                 self.executor,
-                self.simulator.connect,
+                self.simulator_for(robot_id).connect,
                 host, port, username, password
             )
             if success:
@@ -92,6 +248,12 @@ class SSHService:
         # 清理相关的标定会话
         await self._cleanup_calibration_sessions(robot_id)
         
+        # 停止该机器人的常驻通道
+        from app.services.joint_state_streamer import joint_state_streamer
+        from app.services.joint_command_publisher import joint_command_publisher
+        joint_state_streamer.stop(robot_id)
+        joint_command_publisher.stop(robot_id)
+        
         if self.use_simulator:
             if robot_id in self.connections:
                 del self.connections[robot_id]
@@ -99,7 +261,7 @@ class SSHService:
                 loop = asyncio.get_event_loop()
                 return await loop.run_in_executor(
                     self.executor,
-                    self.simulator.disconnect
+                    self.simulator_for(robot_id).disconnect
                 )
             return True
             
@@ -145,21 +307,10 @@ class SSHService:
         
         if self.use_simulator:
             # 在线程池中执行以避免阻塞
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                self.executor,
-                self.simulator.execute_command,
-                command
-            )
+            return await self._run_command("robot", self.simulator_for(robot_id).execute_command, command)
         
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._sync_execute_command,
-                robot_id, command
-            )
-            return result
+            return await self._run_command("robot", self._sync_execute_command, robot_id, command)
         except Exception as e:
             logger.error(f"执行命令失败: {str(e)}")
             return False, "", str(e)
@@ -175,6 +326,89 @@ class SSHService:
         except Exception as e:
             return False, "", str(e)
     
+    async def execute_command_with_input(self, robot_id: str, command: str, input_data: str) -> Tuple[bool, str, str]:
+        """
+        执行SSH命令并通过stdin传入数据（单次往返）
+        
+        数据不经过命令行拼接，内容中的引号、EOF等不会影响命令解析
+        
+        返回: (成功标志, stdout, stderr)，成功标志以远程退出码为准
+        """
+        if robot_id not in self.connections:
+            return False, "", "未建立连接"
+        
+        if self.use_simulator:
+            return await self._run_command("robot", self.simulator_for(robot_id).execute_command, command, input_data)
+        
+        try:
+            return await self._run_command(
+                "robot", self._sync_execute_command_with_input, robot_id, command, input_data
+            )
+        except Exception as e:
+            logger.error(f"执行带输入的命令失败: {str(e)}")
+            return False, "", str(e)
+    
+    def _sync_execute_command_with_input(self, robot_id: str, command: str, input_data: str) -> Tuple[bool, str, str]:
+        """同步的带stdin输入的命令执行方法"""
+        try:
+            client = self.connections[robot_id]
+            stdin, stdout, stderr = client.exec_command(command)
+            stdin.write(input_data.encode('utf-8'))
+            stdin.flush()
+            stdin.channel.shutdown_write()
+            stdout_data = stdout.read().decode('utf-8')
+            stderr_data = stderr.read().decode('utf-8')
+            exit_status = stdout.channel.recv_exit_status()
+            return exit_status == 0, stdout_data, stderr_data
+        except Exception as e:
+            return False, "", str(e)
+    
+    async def open_persistent_channel(self, robot_id: str, command: str):
+        """
+        打开一个常驻的命令通道（用于关节状态流、持续发布等长期运行的远程进程）
+        
+        返回的通道由调用方负责读取、写入和关闭，关闭时远程进程随之结束；
+        模拟器模式下返回接口一致的模拟通道
+        """
+        if robot_id not in self.connections:
+            raise Exception("未建立连接")
+        
+        if self.use_simulator:
+            return self.simulator_for(robot_id).open_channel(command)
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self._sync_open_persistent_channel,
+            robot_id, command
+        )
+    
+    def _sync_open_persistent_channel(self, robot_id: str, command: str) -> PersistentChannel:
+        """同步打开常驻命令通道（读取进程标记，关闭通道时据此结束远程进程组）"""
+        client = self.connections[robot_id]
+        channel = client.get_transport().open_session()
+        channel.set_combine_stderr(True)  # 远程进程的错误信息一并读取，便于排查
+        channel.exec_command(self.wrap_tracked_command(command))
+        
+        channel.settimeout(PERSISTENT_MARKER_TIMEOUT)
+        output = b""
+        try:
+            while b"\n" not in output:
+                data = channel.recv(4096)
+                if not data:
+                    break
+                output += data
+        except socket.timeout:
+            pass
+        channel.settimeout(None)
+        
+        line, _, rest = output.partition(b"\n")
+        match = PROCESS_MARKER_PATTERN.search(line.decode('utf-8', errors='ignore'))
+        if not match:
+            channel.close()
+            raise Exception(f"常驻命令未输出进程标记: {line.decode('utf-8', errors='ignore')[:200]}")
+        return PersistentChannel(channel, int(match.group(2)), rest)
+    
     async def execute_command_interactive(
         self, 
         robot_id: str, 
@@ -196,8 +430,11 @@ class SSHService:
         """
         if self.use_simulator:
             # 模拟器模式下使用模拟器的交互式执行
+            output_callback = self._instrument_output_callback(output_callback, "simulator")
             return await self._execute_simulator_interactive(robot_id, command, output_callback, session_id)
         
+        output_callback = self._instrument_output_callback(output_callback, "ssh")
+        
         try:
             loop = asyncio.get_event_loop()
             # 在线程池中执行交互式命令
@@ -315,11 +552,13 @@ class SSHService:
             是否成功发送
         """
         if self.use_simulator:
-            # 模拟器模式
-            if hasattr(self.simulator, 'send_script_input'):
-                self.simulator.send_script_input(session_id, input_data)
-                return True
-            return False
+            # 模拟器模式：会话记录了对应的模拟脚本
+            session = self.interactive_sessions.get(session_id)
+            if not session:
+                logger.warning(f"会话 {session_id} 不存在")
+                return False
+            self.simulator_for(session['robot_id']).send_script_input(session['script_id'], input_data)
+            return True
         
         try:
             if session_id not in self.interactive_sessions:
@@ -396,26 +635,86 @@ class SSHService:
             logger.error(f"杀死进程失败: {str(e)}")
             return False, str(e)
     
-    async def cleanup_calibration_processes(self, robot_id: str):
+    def wrap_tracked_command(self, command: str) -> str:
+        """
+        包装要启动的标定命令：先输出进程标记，再exec原命令（pid不变）
+        
+        调用方在输出中遇到标记时调用 track_process_marker 记录进程组
+        （常驻命令通道也用它取得进程组，但不登记到标定进程清理中）
+        """
+        script = f'echo "{PROCESS_MARKER} $$ $(ps -o pgid= -p $$ | tr -d \' \')"; exec {command}'
+        return f"bash -c {shlex.quote(script)}"
+    
+    def track_process_marker(self, robot_id: str, line: str, label: str = "") -> bool:
+        """
+        识别输出中的进程标记并记录进程组
+        
+        Returns:
+            该行是否是进程标记（是则调用方不必再当作普通输出处理）
+        """
+        match = PROCESS_MARKER_PATTERN.search(line)
+        if not match:
+            return False
+        
+        pid, pgid = int(match.group(1)), int(match.group(2))
+        self.launched_processes.setdefault(robot_id, {})[pgid] = {
+            "pid": pid,
+            "pgid": pgid,
+            "label": label,
+            "started_at": time.time()
+        }
+        logger.info(f"记录标定进程: {robot_id} {label} pid={pid} pgid={pgid}")
+        return True
+    
+    async def cleanup_calibration_processes(self, robot_id: str) -> Dict[str, Any]:
         """
         清理标定相关进程
         
+        一次远程调用结束本服务启动的所有进程组（以及兜底匹配到的标定进程），
+        先SIGTERM，上限内未退出再SIGKILL。
+        
         Args:
             robot_id: 机器人ID
+        
+        Returns:
+            清理报告 {"terminated": [...], "killed": [...], "already_exited": [...], "pattern": ...}
         """
-        # 需要清理的进程模式
-        patterns = [
-            "roslaunch.*load_kuavo_real.*cali",
-            "roslaunch.*humanoid_controllers",
-            "python.*calibration",
-            "One_button_start.sh"
-        ]
+        tracked = self.launched_processes.get(robot_id, {})
+        command = CLEANUP_SCRIPT_TEMPLATE.format(
+            groups=" ".join(str(pgid) for pgid in tracked),
+            # 模式首字符写成[x]形式，避免pgrep/pkill匹配到执行该脚本的shell自身
+            pattern="|".join(f"[{pattern[0]}]{pattern[1:]}" for pattern in CALIBRATION_PROCESS_PATTERNS),
+            polls=int(PROCESS_EXIT_TIMEOUT / PROCESS_EXIT_POLL_INTERVAL),
+            interval=PROCESS_EXIT_POLL_INTERVAL
+        )
         
-        for pattern in patterns:
-            await self.kill_process_by_pattern(robot_id, pattern)
+        started = time.time()
+        success, stdout, stderr = await self.execute_command(robot_id, command)
+        report = self._parse_cleanup_output(stdout, tracked)
+        report["duration"] = round(time.time() - started, 3)
         
-        # 等待一下让进程完全退出
-        await asyncio.sleep(0.5)
+        if success and "CLEANUP_DONE" in stdout:
+            self.launched_processes.pop(robot_id, None)
+            logger.info(f"标定进程清理完成: {robot_id} {report}")
+        else:
+            logger.warning(f"标定进程清理未完成: {robot_id} {stderr or stdout}")
+        return report
+    
+    def _parse_cleanup_output(self, stdout: str, tracked: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        report = {"terminated": [], "killed": [], "already_exited": [], "pattern": None}
+        keys = {"TERM": "terminated", "KILL": "killed", "GONE": "already_exited"}
+        
+        for line in stdout.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0] in keys and parts[1].isdigit():
+                pgid = int(parts[1])
+                info = tracked.get(pgid, {})
+                report[keys[parts[0]]].append({"pgid": pgid, "pid": info.get("pid"), "label": info.get("label")})
+            elif line.strip() == "PATTERN_TERM":
+                report["pattern"] = "terminated"
+            elif line.strip() == "PATTERN_KILL":
+                report["pattern"] = "killed"
+        return report
     
     async def _execute_simulator_interactive(
         self,
@@ -427,7 +726,8 @@ class SSHService:
         """模拟器模式下的交互式执行"""
         try:
             # 启动模拟器脚本
-            script_id = self.simulator.start_calibration_script("custom", command)
+            simulator = self.simulator_for(robot_id)
+            script_id = simulator.start_calibration_script("custom", command)
             
             if session_id:
                 self.interactive_sessions[session_id] = {
@@ -438,15 +738,15 @@ class SSHService:
                 }
             
             # 监控脚本执行
-            while self.simulator.is_script_running(script_id):
+            while simulator.is_script_running(script_id):
                 # 检查是否被取消
                 if session_id and session_id in self.interactive_sessions:
                     if not self.interactive_sessions[session_id].get('active', True):
-                        self.simulator.stop_script(script_id)
+                        simulator.stop_script(script_id)
                         break
                 
                 # 获取输出
-                output = self.simulator.get_script_output(script_id)
+                output = simulator.get_script_output(script_id)
                 if output and output_callback:
                     await output_callback(output)
                 
@@ -570,7 +870,7 @@ class SSHService:
             if robot_id in self.connections:
                 return True
             # 如果不在连接列表中，但模拟器显示已连接，也可以认为连接正常
-            return self.simulator.is_connected
+            return self.simulator_for(robot_id).is_connected
         return robot_id in self.connections and self.connections[robot_id].get_transport() is not None
     
     async def connect_to_upper_computer(
@@ -590,7 +890,7 @@ class SSHService:
             loop = asyncio.get_event_loop()
             success, error = await loop.run_in_executor(
                 self.executor,
-                self.simulator.connect_upper_computer,
+                self.simulator_for(robot_id).connect_upper_computer,
                 upper_host, upper_port, upper_username, upper_password
             )
             if success:
@@ -643,7 +943,7 @@ class SSHService:
                 loop = asyncio.get_event_loop()
                 return await loop.run_in_executor(
                     self.executor,
-                    self.simulator.disconnect_upper_computer
+                    self.simulator_for(robot_id).disconnect_upper_computer
                 )
             return True
             
@@ -667,21 +967,10 @@ class SSHService:
         
         if self.use_simulator:
             # 在线程池中执行以避免阻塞
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                self.executor,
-                self.simulator.execute_upper_command,
-                command
-            )
+            return await self._run_command("upper", self.simulator_for(robot_id).execute_upper_command, command)
         
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._sync_execute_upper_command,
-                robot_id, command
-            )
-            return result
+            return await self._run_command("upper", self._sync_execute_upper_command, robot_id, command)
         except Exception as e:
             logger.error(f"执行上位机命令失败: {str(e)}")
             return False, "", str(e)
@@ -700,7 +989,7 @@ class SSHService:
     def is_upper_connected(self, robot_id: str) -> bool:
         """检查上位机是否已连接"""
         if self.use_simulator:
-            return robot_id in self.upper_connections and self.simulator.is_upper_connected
+            return robot_id in self.upper_connections and self.simulator_for(robot_id).is_upper_connected
         return robot_id in self.upper_connections and self.upper_connections[robot_id].get_transport() is not None
     
     async def validate_network_environment(self, robot_host: str, local_host: str = None) -> Tuple[bool, str]:
@@ -868,9 +1157,15 @@ class SSHService:
     
     def cleanup(self):
         """清理所有连接"""
+        from app.services.joint_state_streamer import joint_state_streamer
+        from app.services.joint_command_publisher import joint_command_publisher
+        joint_state_streamer.stop_all()
+        joint_command_publisher.stop_all()
+        
         if self.use_simulator:
             self.simulator.disconnect()
             self.simulator.disconnect_upper_computer()
+            self.simulator_fleet.disconnect_all()
             
         # 清理机器人连接
         for robot_id in list(self.connections.keys()):
@@ -894,4 +1189,12 @@ class SSHService:
 
 
 # 全局SSH服务实例
-ssh_service = SSHService()
\ No newline at end of file
+ssh_service = SSHService()
+
+metrics.gauge("kuavo_ssh_executor_queue_depth", "SSH线程池中排队的任务数", lambda: ssh_service.executor._work_queue.qsize())
+metrics.gauge(
+    "kuavo_ssh_connections", "已建立的SSH连接数",
+    lambda: {("robot",): len(ssh_service.connections), ("upper",): len(ssh_service.upper_connections)},
+    ["target"]
+)
+metrics.gauge("kuavo_interactive_sessions", "进行中的交互式会话数", lambda: len(ssh_service.interactive_sessions))
\ No newline at end of file
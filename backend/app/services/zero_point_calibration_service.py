@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import numpy as np
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from datetime import datetime
@@ -9,6 +10,18 @@ from app.services.ssh_service import ssh_service
 from app.services.calibration_file_service import calibration_file_service, JointData
 from app.api.websocket import connection_manager
 from app.services.calibration_data_parser import calibration_data_parser
+from app.services.calibration_log_buffer import CalibrationLogBuffer, MAX_RECENT_ISSUES
+from app.services.session_store import session_store, ZERO_POINT_SERVICE
+from app.services.calibration_timeline import calibration_timelines, CalibrationTimeline, NULL_TIMELINE, INTERACTION_TRACK
+from app.services.joint_table import JointTable
+from app.simulator.sim_clock import simulator_clock
+from app.services.prompt_matcher import (
+    zero_point_prompt_matcher,
+    simulator_zero_point_prompt_matcher,
+    zero_point_command_prompt_matcher,
+    ResponseAck,
+    RESPONSE_ACK_TIMEOUT
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,15 +62,33 @@ class ZeroPointSession:
     current_step: ZeroPointStep
     status: ZeroPointStatus
     start_time: datetime
-    current_joint_data: List[JointData]
     original_joint_data: List[JointData]
     step_progress: Dict[str, Any]
     error_message: Optional[str] = None
     warnings: List[str] = None
+    log_buffer: CalibrationLogBuffer = None  # 标定日志（有上限的环形缓冲，附带增量汇总）
+    joint_table: JointTable = None           # 当前关节数据（按id索引的数组表，记录变化的关节）
+    timeline: CalibrationTimeline = None     # 各阶段耗时时间线（恢复的会话不记录）
+    pending_ack: Optional[ResponseAck] = None  # 等待程序确认的自动响应（真实模式）
     
     def __post_init__(self):
         if self.warnings is None:
             self.warnings = []
+        if self.timeline is None:
+            self.timeline = NULL_TIMELINE
+        if self.log_buffer is None:
+            self.log_buffer = CalibrationLogBuffer()
+        if self.joint_table is None:
+            self.joint_table = JointTable.from_joint_data([])
+    
+    @property
+    def current_joint_data(self) -> List[JointData]:
+        """当前关节数据（由关节表生成的副本，修改需通过joint_table）"""
+        return self.joint_table.to_joint_data()
+    
+    @current_joint_data.setter
+    def current_joint_data(self, joint_data: List[JointData]):
+        self.joint_table = JointTable.from_joint_data(joint_data)
 
 
 class ZeroPointCalibrationService:
@@ -157,7 +188,7 @@ class ZeroPointCalibrationService:
                 logger.warning(f"模拟器中机器人 {robot_id} 未在SSH连接列表中，尝试重新连接")
                 # 在模拟器模式下，直接设置连接状态
                 ssh_service.connections[robot_id] = "simulator"
-                ssh_service.simulator.is_connected = True
+                ssh_service.simulator_for(robot_id).is_connected = True
         
         # 创建新会话
         session_id = f"zero_point_{robot_id}_{int(datetime.now().timestamp())}"
@@ -169,9 +200,9 @@ class ZeroPointCalibrationService:
             current_step=ZeroPointStep.CONFIRM_TOOLS,
             status=ZeroPointStatus.IN_PROGRESS,
             start_time=datetime.now(),
-            current_joint_data=[],
             original_joint_data=[],
-            step_progress={}
+            step_progress={},
+            timeline=calibration_timelines.start(session_id, robot_id, "zero_point")
         )
         
         self.active_sessions[session_id] = session
@@ -190,6 +221,7 @@ class ZeroPointCalibrationService:
             asdict(tool) for tool in self.tool_confirmations.get(session.calibration_type, [])
         ]
         session.step_progress["all_tools_confirmed"] = False
+        session.timeline.begin("tool_confirmation", tools=len(session.step_progress["tool_confirmations"]))
         
         logger.info(f"会话 {session.session_id} 开始工具确认步骤")
     
@@ -209,6 +241,9 @@ class ZeroPointCalibrationService:
             # 检查是否所有工具都已确认
             all_confirmed = all(tool["confirmed"] for tool in tool_confirmations)
             session.step_progress["all_tools_confirmed"] = all_confirmed
+            session.timeline.mark("tool_confirmed", INTERACTION_TRACK, index=tool_index)
+            if all_confirmed:
+                session.timeline.end("tool_confirmation")
             
             await self._broadcast_session_update(session)
             
@@ -226,41 +261,41 @@ class ZeroPointCalibrationService:
         session.status = ZeroPointStatus.IN_PROGRESS
         session.step_progress["config_loaded"] = False
         
-        # 先广播进入步骤2的状态
+        # 先广播进入步骤2的状态（WebSocket消息按顺序送达，无需再等待前端）
         await self._broadcast_session_update(session)
         
-        # 延迟一下确保前端收到步骤2状态
-        await asyncio.sleep(0.3)
-        
         try:
             # 清空之前的数据
             session.original_joint_data = []
             session.current_joint_data = []
             
-            # 读取当前配置
-            if session.calibration_type in ["full_body", "arms_only"]:
-                arms_data = await calibration_file_service.read_arms_zero_data(session.robot_id)
-                session.original_joint_data.extend(arms_data)
-            
-            if session.calibration_type in ["full_body", "legs_only"]:
-                legs_data = await calibration_file_service.read_legs_offset_data(session.robot_id)
-                session.original_joint_data.extend(legs_data)
-            
-            # 获取当前关节位置
-            current_positions = await calibration_file_service.get_current_joint_positions(session.robot_id)
-            
-            # 更新当前数据
-            session.current_joint_data = []
-            for joint in session.original_joint_data:
-                joint.current_position = current_positions.get(joint.id, 0.0)
-                session.current_joint_data.append(joint)
-            
-            # 数据验证
-            warnings = await calibration_file_service.validate_joint_data(session.current_joint_data)
-            session.warnings = warnings
+            with session.timeline.span("config_read"):
+                # 读取当前配置
+                if session.calibration_type in ["full_body", "arms_only"]:
+                    with session.timeline.span("read_arms_zero"):
+                        arms_data = await calibration_file_service.read_arms_zero_data(session.robot_id)
+                    session.original_joint_data.extend(arms_data)
+                
+                if session.calibration_type in ["full_body", "legs_only"]:
+                    with session.timeline.span("read_legs_offset"):
+                        legs_data = await calibration_file_service.read_legs_offset_data(session.robot_id)
+                    session.original_joint_data.extend(legs_data)
+                
+                # 获取当前关节位置
+                with session.timeline.span("read_current_positions"):
+                    current_positions = await calibration_file_service.get_current_joint_positions(session.robot_id)
+                
+                # 更新当前数据
+                joint_table = JointTable.from_joint_data(session.original_joint_data)
+                joint_table.set_current_positions(current_positions)
+                session.joint_table = joint_table
+                
+                # 数据验证
+                warnings = joint_table.sanity_warnings()
+                session.warnings = warnings
             
             session.step_progress["config_loaded"] = True
-            session.step_progress["joint_count"] = len(session.current_joint_data)
+            session.step_progress["joint_count"] = len(joint_table)
             session.step_progress["warnings_count"] = len(warnings)
             
             logger.info(f"会话 {session.session_id} 完成配置读取，发现 {len(warnings)} 个警告")
@@ -268,9 +303,6 @@ class ZeroPointCalibrationService:
             # 广播步骤2的完成状态（带有数据）
             await self._broadcast_session_update(session)
             
-            # 延迟更长时间，确保前端有时间处理步骤2的数据
-            await asyncio.sleep(1.0)
-            
             # 步骤2完成后，自动调用confirm_config_and_proceed进入步骤3
             logger.info(f"会话 {session.session_id} 准备调用confirm_config_and_proceed，当前步骤: {session.current_step.value}")
             await self.confirm_config_and_proceed(session.session_id)
@@ -296,14 +328,16 @@ class ZeroPointCalibrationService:
         try:
             # 如果用户修改了关节数据，应用修改
             if modified_joints:
-                joint_dict = {joint.id: joint for joint in session.current_joint_data}
-                for mod_joint in modified_joints:
-                    joint_id = mod_joint.get("id")
-                    if joint_id in joint_dict:
-                        if "zero_position" in mod_joint:
-                            joint_dict[joint_id].zero_position = float(mod_joint["zero_position"])
-                        if "offset" in mod_joint:
-                            joint_dict[joint_id].offset = float(mod_joint["offset"])
+                session.joint_table.apply_updates([
+                    {key: mod_joint[key] for key in ("id", "zero_position", "offset") if key in mod_joint}
+                    for mod_joint in modified_joints
+                ])
+                
+                # 记录相对原始配置的修改
+                changes = session.joint_table.diff(JointTable.from_joint_data(session.original_joint_data))
+                session.step_progress["modified_joints"] = changes
+                logger.info(f"会话 {session.session_id} 应用了 {len(changes)} 项关节修改")
+                await self._broadcast_joint_changes(session)
             
             # 只是更新到步骤3，不立即开始标定
             session.current_step = ZeroPointStep.INITIALIZE_ZERO
@@ -344,6 +378,7 @@ class ZeroPointCalibrationService:
                 raise Exception(f"不支持的标定类型: {session.calibration_type}")
             
             logger.info(f"会话 {session.session_id} 执行标定命令: {command}")
+            session.timeline.begin("command_launch", command=command)
             
             # 模拟执行标定流程
             if ssh_service.use_simulator:
@@ -360,41 +395,44 @@ class ZeroPointCalibrationService:
     async def _simulate_zero_point_process(self, session: ZeroPointSession):
         """模拟零点标定流程 - 启动真正的模拟器标定脚本"""
         # 启动模拟器的零点标定脚本
-        script_id = ssh_service.simulator.start_calibration_script("zero_point")
+        simulator = ssh_service.simulator_for(session.robot_id)
+        script_id = simulator.start_calibration_script("zero_point")
         session.step_progress["script_id"] = script_id
         
         logger.info(f"会话 {session.session_id} 启动模拟器标定脚本: {script_id}")
         
         # 监控脚本执行
-        while ssh_service.simulator.is_script_running(script_id):
-            # 获取脚本输出
-            output = ssh_service.simulator.get_script_output(script_id)
+        scanner = simulator_zero_point_prompt_matcher.scanner()
+        while simulator.is_script_running(script_id):
+            # 获取脚本输出（模拟器按整行输出）
+            output = simulator.get_script_output(script_id)
             if output:
-                lines = output.split('\n')
-                for line in lines:
-                    if line.strip():
-                        # 广播日志到前端
-                        await self._broadcast_log(session, line)
+                session.timeline.first_output()
+                for line in scanner.feed(output + '\n'):
+                    # 广播日志到前端
+                    await self._broadcast_log(session, line.text)
+                    
+                    # 检查并解析Slave位置数据
+                    await self._process_calibration_output_line(session, line.text)
+                    
+                    # 检查是否需要用户输入
+                    if line.prompt:
+                        session.timeline.begin("prompt", INTERACTION_TRACK, text=line.text)
+                        session.status = ZeroPointStatus.WAITING_USER
+                        session.step_progress["user_prompt"] = line.text
+                        await self._broadcast_session_update(session)
                         
-                        # 检查并解析Slave位置数据
-                        await self._process_calibration_output_line(session, line)
+                        # 等待用户响应
+                        await self._wait_for_user_response(session, script_id, line.text)
                         
-                        # 检查是否需要用户输入
-                        if any(prompt in line for prompt in ["(y/N)", "(y/n)", "按 'o'"]):
-                            session.status = ZeroPointStatus.WAITING_USER
-                            session.step_progress["user_prompt"] = line
-                            await self._broadcast_session_update(session)
-                            
-                            # 等待用户响应
-                            await self._wait_for_user_response(session, script_id, line)
-                            
-                            session.status = ZeroPointStatus.IN_PROGRESS
-                            await self._broadcast_session_update(session)
+                        session.status = ZeroPointStatus.IN_PROGRESS
+                        await self._broadcast_session_update(session)
             
-            await asyncio.sleep(0.1)
+            await simulator_clock.sleep(0.1)
         
         # 脚本执行完成
         logger.info(f"会话 {session.session_id} 标定脚本执行完成")
+        session.timeline.end("data_collection")
         
         # 保存标定结果
         await self._save_calibration_results(session)
@@ -404,9 +442,7 @@ class ZeroPointCalibrationService:
     
     async def _wait_for_user_response(self, session: ZeroPointSession, script_id: str, prompt: str):
         """自动响应用户交互"""
-        # 直接自动确认，不等待用户
-        await asyncio.sleep(1)  # 短暂延迟模拟响应时间
-        
+        # 提示已输出说明脚本正在等待输入，直接自动确认
         # 根据不同的提示使用不同的默认响应
         if "stand_robot" in script_id or "站立命令" in prompt:
             default_response = "o"  # 发送站立命令
@@ -416,12 +452,14 @@ class ZeroPointCalibrationService:
             default_response = "y"  # 默认确认
         
         # 发送自动响应到模拟器脚本
-        ssh_service.simulator.send_script_input(script_id, default_response)
+        ssh_service.simulator_for(session.robot_id).send_script_input(script_id, default_response)
+        session.timeline.end("prompt", response=default_response)
         await self._broadcast_log(session, f"自动确认: {default_response}")
         logger.info(f"会话 {session.session_id} 自动响应: {default_response}")
     
     async def _broadcast_log(self, session: ZeroPointSession, log_line: str):
-        """广播日志"""
+        """记录并广播日志"""
+        session.log_buffer.append(log_line)
         message = {
             "type": "calibration_log",
             "data": {
@@ -439,6 +477,8 @@ class ZeroPointCalibrationService:
             positions = calibration_data_parser.parse_slave_positions(line)
             
             if positions:
+                session.log_buffer.record_positions(positions)
+                
                 # 处理解析到的位置数据
                 for pos_data in positions:
                     logger.info(f"会话 {session.session_id} 解析到位置数据: Slave {pos_data.slave_id} = {pos_data.position}")
@@ -448,6 +488,9 @@ class ZeroPointCalibrationService:
                     
                     # 广播位置数据更新
                     await self._broadcast_position_data(session, pos_data)
+                
+                # 一行中的所有位置更新合并为一次关节变化广播
+                await self._broadcast_joint_changes(session)
             
             # 检查是否有重要的标定状态信息
             self._check_calibration_status_keywords(session, line)
@@ -456,29 +499,42 @@ class ZeroPointCalibrationService:
             logger.warning(f"处理标定输出行时出错: {line} - {str(e)}")
     
     async def _update_joint_position_data(self, session: ZeroPointSession, pos_data):
-        """更新会话中的关节位置数据"""
-        # 查找对应的关节数据并更新当前位置
-        for joint in session.current_joint_data:
-            if joint.id == pos_data.slave_id:
-                # 更新当前位置为实际测量的位置
-                joint.current_position = pos_data.position
-                # 如果这是标定过程的结果，也可以更新偏移值
-                joint.offset = pos_data.position - joint.zero_position
-                logger.debug(f"更新关节 {joint.name} (ID:{joint.id}) 位置: {pos_data.position}")
-                return
+        """更新会话中的关节位置数据（按id直接定位行）"""
+        # 更新当前位置为实际测量的位置，如果这是标定过程的结果，也更新偏移值
+        row = session.joint_table.set_position(pos_data.slave_id, pos_data.position, update_offset=True)
+        if row is not None:
+            logger.debug(f"更新关节 {session.joint_table.names[row]} (ID:{pos_data.slave_id}) 位置: {pos_data.position}")
+            return
         
         # 如果找不到对应的关节，创建新的关节数据
-        from app.services.calibration_file_service import JointData
-        new_joint = JointData(
-            id=pos_data.slave_id,
-            name=pos_data.joint_name or f"joint_{pos_data.slave_id:02d}",
+        name = pos_data.joint_name or f"joint_{pos_data.slave_id:02d}"
+        session.joint_table.append_joint(
+            pos_data.slave_id,
+            name,
             current_position=pos_data.position,
             zero_position=0.0,
             offset=pos_data.position,
             status="normal"
         )
-        session.current_joint_data.append(new_joint)
-        logger.info(f"创建新关节数据: {new_joint.name} (ID:{new_joint.id})")
+        logger.info(f"创建新关节数据: {name} (ID:{pos_data.slave_id})")
+    
+    async def _broadcast_joint_changes(self, session: ZeroPointSession):
+        """只广播自上次广播以来变化的关节"""
+        rows = session.joint_table.take_dirty()
+        if not rows:
+            return
+        
+        self._persist(session)
+        message = {
+            "type": "zero_point_joint_update",
+            "data": {
+                "session_id": session.session_id,
+                "robot_id": session.robot_id,
+                "joints": session.joint_table.snapshot(rows),
+                "joint_count": len(session.joint_table)
+            }
+        }
+        await connection_manager.send_to_robot_subscribers(session.robot_id, message)
     
     async def _broadcast_position_data(self, session: ZeroPointSession, pos_data):
         """广播位置数据更新"""
@@ -522,6 +578,8 @@ class ZeroPointCalibrationService:
             if "calibration_warnings" not in session.step_progress:
                 session.step_progress["calibration_warnings"] = []
             session.step_progress["calibration_warnings"].append(line.strip())
+            # 只保留最近的警告，避免step_progress随日志无限增长
+            del session.step_progress["calibration_warnings"][:-MAX_RECENT_ISSUES]
             logger.warning(f"会话 {session.session_id} 检测到警告: {line.strip()}")
     
     async def get_calibration_summary(self, session_id: str) -> dict:
@@ -530,15 +588,9 @@ class ZeroPointCalibrationService:
         if not session:
             raise Exception("会话不存在")
         
-        # 收集所有的日志输出用于解析
-        all_output = "\n".join(session.step_progress.get("calibration_logs", []))
-        
-        # 使用解析器获取汇总信息
-        summary = calibration_data_parser.parse_calibration_summary(all_output)
-        
-        # 验证数据完整性
-        positions = calibration_data_parser.parse_slave_positions(all_output)
-        is_valid, validation_messages = calibration_data_parser.validate_position_data(positions)
+        # 汇总和验证由日志缓冲区增量维护，不再重新解析全部日志
+        summary = session.log_buffer.summary()
+        is_valid, validation_messages = session.log_buffer.validation()
         
         # 组合汇总结果
         result = {
@@ -551,8 +603,9 @@ class ZeroPointCalibrationService:
                 "is_valid": is_valid,
                 "messages": validation_messages
             },
-            "joint_count": len(session.current_joint_data),
-            "position_data_count": len(positions),
+            "joint_count": len(session.joint_table),
+            "position_data_count": session.log_buffer.position_count,
+            "log_stats": session.log_buffer.stats(),
             "step_progress": session.step_progress
         }
         
@@ -563,47 +616,61 @@ class ZeroPointCalibrationService:
         try:
             logger.info(f"会话 {session.session_id} 开始执行真实零点标定")
             
+            # 输出按块到达，由扫描器拼接成整行并检测交互提示
+            scanner = zero_point_prompt_matcher.scanner()
+            
             # 创建输出回调函数
             async def output_callback(output: str):
                 if not output:
                     return
                 
-                lines = output.split('\n')
-                for line in lines:
-                    if line.strip():
-                        # 广播日志到前端
-                        await self._broadcast_log(session, line)
+                session.timeline.first_output()
+                if session.pending_ack:
+                    session.pending_ack.on_output(output)
+                for line in scanner.feed(output):
+                    if ssh_service.track_process_marker(session.robot_id, line.text, "zero_point"):
+                        self._persist(session)
+                        continue
+                    
+                    # 广播日志到前端
+                    await self._broadcast_log(session, line.text)
+                    
+                    # 检查并解析Slave位置数据
+                    await self._process_calibration_output_line(session, line.text)
+                    
+                    # 检查是否需要用户输入
+                    if line.prompt:
+                        span = session.timeline.begin("prompt", INTERACTION_TRACK, text=line.text)
+                        await self._broadcast_log(session, f"检测到交互提示: {line.text}")
+                        await self._broadcast_log(session, "自动进行确认...")
                         
-                        # 检查并解析Slave位置数据
-                        await self._process_calibration_output_line(session, line)
+                        # 记录提示信息供自动响应使用
+                        session.step_progress["last_prompt"] = line.text
+                        session.step_progress["auto_response"] = True
+                        await self._broadcast_session_update(session)
                         
-                        # 检查是否需要用户输入
-                        if any(prompt in line.lower() for prompt in ["(y/n)", "按 'o'", "press 'o'", "输入", "input", "按下'o'", "按o键"]):
-                            await self._broadcast_log(session, f"检测到交互提示: {line}")
-                            await self._broadcast_log(session, "自动进行确认...")
-                            
-                            # 记录提示信息供自动响应使用
-                            session.step_progress["last_prompt"] = line
-                            session.step_progress["auto_response"] = True
-                            await self._broadcast_session_update(session)
-                            
-                            # 直接自动响应，不需要等待
-                            asyncio.create_task(self._wait_for_user_response_real(session))
+                        # 直接自动响应，不阻塞输出处理（程序的下一次输出确认响应）
+                        asyncio.create_task(self._wait_for_user_response_real(session, span))
             
             # 使用交互式命令执行
             session_id = f"calibration_{session.session_id}"
-            success, error = await ssh_service.execute_command_interactive(
-                session.robot_id,
-                command,
-                output_callback,
-                session_id
-            )
+            try:
+                success, error = await ssh_service.execute_command_interactive(
+                    session.robot_id,
+                    ssh_service.wrap_tracked_command(command),
+                    output_callback,
+                    session_id
+                )
+            finally:
+                if session.pending_ack:
+                    session.pending_ack.close()
             
             if not success:
                 raise Exception(f"标定命令执行失败: {error}")
             
             # 标定完成
             logger.info(f"会话 {session.session_id} 零点标定执行完成")
+            session.timeline.end("data_collection")
             
             # 保存标定结果
             await self._save_calibration_results(session)
@@ -623,41 +690,62 @@ class ZeroPointCalibrationService:
             
             raise
     
-    async def _wait_for_user_response_real(self, session: ZeroPointSession):
-        """自动响应用户交互（真实模式）"""
-        # 短暂延迟后自动发送响应
-        await asyncio.sleep(2)  # 给系统一些时间准备
+    async def _wait_for_user_response_real(self, session: ZeroPointSession, span):
+        """
+        自动响应用户交互（真实模式）
+        
+        响应发出后等程序再次输出才算完成；超时没有输出时广播警告，不重发
+        （重复的输入可能被后续提示读走）。
+        """
+        last_prompt = session.step_progress.get("last_prompt", "")
         
         # 根据当前上下文确定响应
-        if "等待按键" in session.step_progress.get("last_prompt", "") or "press" in session.step_progress.get("last_prompt", "").lower():
+        if "等待按键" in last_prompt or "press" in last_prompt.lower():
             default_response = "o"  # 站立命令
-        elif "确认" in session.step_progress.get("last_prompt", "") or "save" in session.step_progress.get("last_prompt", "").lower():
+        elif "确认" in last_prompt or "save" in last_prompt.lower():
             default_response = "c"  # 确认保存
         else:
             default_response = "y"  # 默认确认
         
-        # 发送到交互式会话
+        # 提示已输出说明程序正在等待输入，立即发送到交互式会话
+        ack = ResponseAck(default_response)
+        ack.mark_sent()
+        session.pending_ack = ack
         session_id = f"calibration_{session.session_id}"
         await ssh_service.send_input_to_session(session_id, default_response + "\n")
         await self._broadcast_log(session, f"自动响应: {default_response}")
         logger.info(f"会话 {session.session_id} 自动发送响应: {default_response}")
+        
+        if not await ack.wait(RESPONSE_ACK_TIMEOUT):
+            warning = f"⚠️ 自动响应 {default_response} 发出后 {RESPONSE_ACK_TIMEOUT:.0f}s 内程序没有新输出，可能未被读取"
+            logger.warning(f"会话 {session.session_id}: {warning}")
+            await self._broadcast_log(session, warning)
+            await ack.wait()
+        
+        if session.pending_ack is ack:
+            session.pending_ack = None
+        session.timeline.close(span, response=default_response, confirmed=ack.confirmed)
+        if ack.confirmed and session.pending_ack is None:
+            session.step_progress["auto_response"] = False
+            await self._broadcast_session_update(session)
     
     async def _save_calibration_results(self, session: ZeroPointSession):
         """保存标定结果"""
         try:
-            if session.calibration_type in ["full_body", "arms_only"]:
-                # 过滤手臂数据
-                arms_data = [joint for joint in session.current_joint_data if joint.id <= 14]
-                success = await calibration_file_service.write_arms_zero_data(session.robot_id, arms_data)
-                if not success:
-                    raise Exception("保存手臂零点数据失败")
-            
-            if session.calibration_type in ["full_body", "legs_only"]:
-                # 过滤腿部数据
-                legs_data = [joint for joint in session.current_joint_data if joint.id <= 14]
-                success = await calibration_file_service.write_legs_offset_data(session.robot_id, legs_data)
-                if not success:
-                    raise Exception("保存腿部偏移数据失败")
+            with session.timeline.span("save"):
+                if session.calibration_type in ["full_body", "arms_only"]:
+                    # 过滤手臂数据
+                    arms_data = [joint for joint in session.current_joint_data if joint.id <= 14]
+                    success = await calibration_file_service.write_arms_zero_data(session.robot_id, arms_data)
+                    if not success:
+                        raise Exception("保存手臂零点数据失败")
+                
+                if session.calibration_type in ["full_body", "legs_only"]:
+                    # 过滤腿部数据
+                    legs_data = [joint for joint in session.current_joint_data if joint.id <= 14]
+                    success = await calibration_file_service.write_legs_offset_data(session.robot_id, legs_data)
+                    if not success:
+                        raise Exception("保存腿部偏移数据失败")
             
             session.step_progress["calibration_saved"] = True
             logger.info(f"会话 {session.session_id} 标定结果保存成功")
@@ -692,6 +780,7 @@ class ZeroPointCalibrationService:
         session.step_progress["completed_at"] = datetime.now().isoformat()
         
         logger.info(f"会话 {session.session_id} 零点标定完成")
+        self._log_timing(session)
         await self._broadcast_session_update(session)
         
         return True
@@ -751,6 +840,21 @@ class ZeroPointCalibrationService:
         
         return True
     
+    async def fail_session(self, session_id: str, error_message: str):
+        """将会话标记为失败（例如批量标定中步骤超时）"""
+        session = self.active_sessions.get(session_id)
+        if not session:
+            return
+        
+        session.status = ZeroPointStatus.FAILED
+        session.error_message = error_message
+        logger.info(f"会话 {session.session_id} 失败: {error_message}")
+        
+        if not ssh_service.use_simulator:
+            await ssh_service.cancel_interactive_session(f"calibration_{session.session_id}")
+        
+        await self._broadcast_session_update(session)
+    
     async def get_session(self, session_id: str) -> Optional[ZeroPointSession]:
         """获取会话"""
         return self.active_sessions.get(session_id)
@@ -788,6 +892,7 @@ class ZeroPointCalibrationService:
         logger.info(f"会话 {session.session_id} 执行标定命令: {command}")
         session.step_progress["calibration_command"] = command
         session.step_progress["calibration_mode"] = calibration_mode
+        session.timeline.begin("command_launch", command=command)
         
         # 广播开始信息
         await self._broadcast_log(session, f"🚀 启动{calibration_mode}标定系统...")
@@ -800,6 +905,7 @@ class ZeroPointCalibrationService:
         else:
             # 真实执行roslaunch命令
             await self._execute_real_calibration_process(session, command)
+        session.timeline.end("data_collection")
         
         await self._broadcast_session_update(session)
         return True
@@ -807,14 +913,15 @@ class ZeroPointCalibrationService:
     async def _simulate_full_calibration_process(self, session: ZeroPointSession, calibration_mode: str, command: str):
         """模拟完整的标定流程，包括用户交互"""
         # 1. 模拟系统启动
+        session.timeline.first_output()
         await self._broadcast_log(session, "正在启动机器人控制系统...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         await self._broadcast_log(session, "机器人控制系统已启动")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 2. 模拟机器人缩腿
         await self._broadcast_log(session, "机器人开始缩腿动作...")
-        await asyncio.sleep(3)
+        await simulator_clock.sleep(3)
         await self._broadcast_log(session, "机器人缩腿完成")
         
         # 3. 自动发送站立命令
@@ -824,6 +931,7 @@ class ZeroPointCalibrationService:
         
         # 不设置等待状态，直接处理
         session.step_progress["user_prompt"] = "自动确认并发送站立命令"
+        session.timeline.begin("prompt", INTERACTION_TRACK, text="确认机器人状态")
         await self._broadcast_session_update(session)
         
         # 自动响应
@@ -832,15 +940,15 @@ class ZeroPointCalibrationService:
         # 4. 发送站立命令
         session.status = ZeroPointStatus.IN_PROGRESS
         await self._broadcast_log(session, "发送站立命令 'o' 到机器人...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         await self._broadcast_log(session, "机器人开始站立...")
-        await asyncio.sleep(5)
+        await simulator_clock.sleep(5)
         await self._broadcast_log(session, "机器人站立完成")
         
         # 5. 显示关节位置信息
         await self._broadcast_log(session, "")
         await self._broadcast_log(session, "读取当前关节位置...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         
         if calibration_mode == "full_body":
             # 模拟显示真实的关节位置数据
@@ -864,15 +972,13 @@ class ZeroPointCalibrationService:
             # 更新会话中的关节数据，保存标定后的位置值
             for i, (position, encoder, current) in enumerate(calibration_values, 1):
                 await self._broadcast_log(session, f"000000{3040+i*10}1: Slave {i} actual position {position:.7f},Encoder {encoder:.7f}")
-                await asyncio.sleep(0.1)
+                await simulator_clock.sleep(0.1)
                 await self._broadcast_log(session, f"000000{3040+i*10+1}1: Rated current {current:.7f}")
-                await asyncio.sleep(0.1)
+                await simulator_clock.sleep(0.1)
                 
                 # 更新关节数据中的当前位置（这将成为新的零点）
-                for joint in session.current_joint_data:
-                    if joint.id == i:
-                        joint.current_position = position
-                        break
+                session.joint_table.set_position(i, position)
+                await self._broadcast_joint_changes(session)
         
         # 6. 自动确认保存零点
         await self._broadcast_log(session, "")
@@ -881,6 +987,7 @@ class ZeroPointCalibrationService:
         
         # 不设置等待状态
         session.step_progress["user_prompt"] = "自动确认保存零点"
+        session.timeline.begin("prompt", INTERACTION_TRACK, text="确认保存零点")
         await self._broadcast_session_update(session)
         
         # 自动响应
@@ -889,7 +996,7 @@ class ZeroPointCalibrationService:
         # 7. 保存零点数据
         session.status = ZeroPointStatus.IN_PROGRESS
         await self._broadcast_log(session, "保存零点数据到配置文件...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         await self._broadcast_log(session, "零点数据已保存到 ~/.config/lejuconfig/offset.csv")
         await self._broadcast_log(session, " 标定完成！")
         
@@ -910,27 +1017,27 @@ class ZeroPointCalibrationService:
             
             # 处理标定输出
             if stdout:
-                lines = stdout.split('\n')
-                for line in lines:
-                    if line.strip():
-                        await self._broadcast_log(session, line)
+                session.timeline.first_output()
+                for line in zero_point_command_prompt_matcher.scanner().feed(stdout + '\n'):
+                    await self._broadcast_log(session, line.text)
+                    
+                    # 检查并解析Slave位置数据
+                    await self._process_calibration_output_line(session, line.text)
+                    
+                    # 检查是否需要用户输入
+                    if line.prompt:
+                        session.timeline.begin("prompt", INTERACTION_TRACK, text=line.text)
+                        await self._broadcast_log(session, f"检测到交互提示: {line.text}")
+                        await self._broadcast_log(session, "自动进行确认...")
                         
-                        # 检查并解析Slave位置数据
-                        await self._process_calibration_output_line(session, line)
+                        # 记录提示信息
+                        session.step_progress["user_prompt"] = line.text
+                        session.step_progress["last_prompt"] = line.text
+                        session.step_progress["auto_response"] = True
+                        await self._broadcast_session_update(session)
                         
-                        # 检查是否需要用户输入
-                        if any(prompt in line.lower() for prompt in ["按", "press", "input", "输入"]):
-                            await self._broadcast_log(session, f"检测到交互提示: {line}")
-                            await self._broadcast_log(session, "自动进行确认...")
-                            
-                            # 记录提示信息
-                            session.step_progress["user_prompt"] = line
-                            session.step_progress["last_prompt"] = line
-                            session.step_progress["auto_response"] = True
-                            await self._broadcast_session_update(session)
-                            
-                            # 自动响应
-                            await self._wait_for_user_response(session, "user_input", line)
+                        # 自动响应
+                        await self._wait_for_user_response(session, "user_input", line.text)
             
             # 更新会话状态
             session.step_progress["calibration_completed"] = True
@@ -974,31 +1081,35 @@ class ZeroPointCalibrationService:
         
         # 保存到配置文件
         try:
-            # 根据标定类型保存对应的数据
-            if session.calibration_type in ["full_body", "arms_only"]:
-                # 保存手臂零点数据到 arms_zero.yaml
-                arms_data = [j for j in session.current_joint_data if 2 <= j.id <= 15]  # 手臂关节 2-15
-                if arms_data:
-                    await calibration_file_service.write_arms_zero_data(session.robot_id, arms_data)
-                    await self._broadcast_log(session, " 手臂零点数据已保存到 ~/.config/lejuconfig/arms_zero.yaml")
+            with session.timeline.span("save"):
+                # 根据标定类型保存对应的数据
+                if session.calibration_type in ["full_body", "arms_only"]:
+                    # 保存手臂零点数据到 arms_zero.yaml
+                    arms_data = [j for j in session.current_joint_data if 2 <= j.id <= 15]  # 手臂关节 2-15
+                    if arms_data:
+                        await calibration_file_service.write_arms_zero_data(session.robot_id, arms_data)
+                        await self._broadcast_log(session, " 手臂零点数据已保存到 ~/.config/lejuconfig/arms_zero.yaml")
             
-            if session.calibration_type in ["full_body", "legs_only"]:
-                # 保存腿部偏移数据到 offset.csv
-                # 注意：这里保存的是从标定中获取的实际位置值（actual position）
-                legs_data = [j for j in session.current_joint_data if 1 <= j.id <= 14]  # 腿部关节 1-14
-                if legs_data:
-                    # 使用实际位置作为偏移值保存到 offset.csv
-                    for joint in legs_data:
-                        # 将 actual position 值作为偏移量
-                        joint.offset = joint.current_position
+                if session.calibration_type in ["full_body", "legs_only"]:
+                    # 保存腿部偏移数据到 offset.csv
+                    # 注意：这里保存的是从标定中获取的实际位置值（actual position）
+                    joint_table = session.joint_table
+                    legs_rows = self._legs_rows(joint_table)
+                    if len(legs_rows):
+                        # 使用实际位置（actual position）作为偏移值保存到 offset.csv
+                        joint_table.offset[legs_rows] = joint_table.current_position[legs_rows]
+                        joint_table.mark_dirty(legs_rows)
+                        legs_data = [j for j in session.current_joint_data if 1 <= j.id <= 14]
                     
-                    await calibration_file_service.write_legs_offset_data(session.robot_id, legs_data)
-                    await self._broadcast_log(session, " 腿部零点数据已保存到 ~/.config/lejuconfig/offset.csv")
+                        await calibration_file_service.write_legs_offset_data(session.robot_id, legs_data)
+                        await self._broadcast_log(session, " 腿部零点数据已保存到 ~/.config/lejuconfig/offset.csv")
+                        await self._broadcast_joint_changes(session)
             
             await self._broadcast_log(session, " 所有零点数据已保存到配置文件")
             
             # 标记为完成
             session.status = ZeroPointStatus.COMPLETED
+            self._log_timing(session)
             await self._broadcast_session_update(session)
             
             return True
@@ -1007,6 +1118,19 @@ class ZeroPointCalibrationService:
             logger.error(f"保存零点数据失败: {str(e)}")
             raise
     
+    @staticmethod
+    def _legs_rows(joint_table: JointTable) -> np.ndarray:
+        """腿部关节 1-14 的行号"""
+        return np.flatnonzero((joint_table.ids >= 1) & (joint_table.ids <= 14))
+    
+    def joint_table_to_save(self, session: ZeroPointSession) -> JointTable:
+        """按保存规则生成待写入数据的关节表副本（腿部偏移取实测位置），用于保存前检查"""
+        joint_table = session.joint_table.copy()
+        if session.calibration_type in ["full_body", "legs_only"]:
+            legs_rows = self._legs_rows(joint_table)
+            joint_table.offset[legs_rows] = joint_table.current_position[legs_rows]
+        return joint_table
+    
     async def validate_calibration(self, session_id: str) -> bool:
         """执行标定验证（运行roslaunch使机器人缩腿）"""
         session = self.active_sessions.get(session_id)
@@ -1017,25 +1141,26 @@ class ZeroPointCalibrationService:
             raise Exception("只能在移除工装步骤执行验证")
         
         try:
-            validation_command = "roslaunch humanoid_controllers load_kuavo_real.launch"
-            logger.info(f"会话 {session.session_id} 执行验证命令: {validation_command}")
+            with session.timeline.span("validation"):
+                validation_command = "roslaunch humanoid_controllers load_kuavo_real.launch"
+                logger.info(f"会话 {session.session_id} 执行验证命令: {validation_command}")
             
-            await self._broadcast_log(session, f"🚀 执行验证命令: {validation_command}")
-            await self._broadcast_log(session, "⚠️ 注意：机器人将进行缩腿动作，请确保周围环境安全！")
+                await self._broadcast_log(session, f"🚀 执行验证命令: {validation_command}")
+                await self._broadcast_log(session, "⚠️ 注意：机器人将进行缩腿动作，请确保周围环境安全！")
             
-            if ssh_service.use_simulator:
-                # 模拟验证过程
-                await asyncio.sleep(2)
-                await self._broadcast_log(session, "正在启动机器人控制系统...")
-                await asyncio.sleep(1)
-                await self._broadcast_log(session, "机器人开始缩腿...")
-                await asyncio.sleep(2)
-                await self._broadcast_log(session, " 验证完成，机器人已进入零点位置")
-            else:
-                # 真实执行
-                success, stdout, stderr = await ssh_service.execute_command(session.robot_id, validation_command)
-                if not success:
-                    raise Exception(f"验证命令执行失败: {stderr}")
+                if ssh_service.use_simulator:
+                    # 模拟验证过程
+                    await simulator_clock.sleep(2)
+                    await self._broadcast_log(session, "正在启动机器人控制系统...")
+                    await simulator_clock.sleep(1)
+                    await self._broadcast_log(session, "机器人开始缩腿...")
+                    await simulator_clock.sleep(2)
+                    await self._broadcast_log(session, " 验证完成，机器人已进入零点位置")
+                else:
+                    # 真实执行
+                    success, stdout, stderr = await ssh_service.execute_command(session.robot_id, validation_command)
+                    if not success:
+                        raise Exception(f"验证命令执行失败: {stderr}")
             
             session.step_progress["validation_completed"] = True
             await self._broadcast_session_update(session)
@@ -1074,6 +1199,14 @@ class ZeroPointCalibrationService:
         
         return True
     
+    def _log_timing(self, session: ZeroPointSession):
+        """记录会话用时和交互提示的实测响应耗时"""
+        prompt_response = session.timeline.prompt_response()
+        if prompt_response is not None:
+            session.step_progress["prompt_response"] = prompt_response
+        elapsed = (datetime.now() - session.start_time).total_seconds()
+        logger.info(f"会话 {session.session_id} 用时 {elapsed:.1f}s，交互提示响应: {prompt_response}")
+    
     def _cleanup_finished_sessions(self):
         """清理已完成或失败的会话"""
         finished_sessions = []
@@ -1085,8 +1218,84 @@ class ZeroPointCalibrationService:
             logger.info(f"清理已完成的会话: {session_id}")
             del self.active_sessions[session_id]
     
+    def _persist(self, session: ZeroPointSession):
+        """登记会话快照，结束的会话删除快照"""
+        if session.status in [ZeroPointStatus.COMPLETED, ZeroPointStatus.FAILED, ZeroPointStatus.CANCELLED]:
+            session_store.delete(session.session_id)
+            session.timeline.finish(session.status.value)
+        else:
+            session_store.save(ZERO_POINT_SERVICE, session.session_id, session.robot_id, lambda: self._snapshot_state(session))
+    
+    def _snapshot_state(self, session: ZeroPointSession) -> Dict[str, Any]:
+        return {
+            "session_id": session.session_id,
+            "robot_id": session.robot_id,
+            "calibration_type": session.calibration_type,
+            "current_step": session.current_step.value,
+            "status": session.status.value,
+            "start_time": session.start_time.isoformat(),
+            "step_progress": session.step_progress,
+            "warnings": session.warnings,
+            "error_message": session.error_message,
+            "original_joint_data": [asdict(joint) for joint in session.original_joint_data],
+            "joint_data": session.joint_table.snapshot(),
+            "process_groups": list(ssh_service.launched_processes.get(session.robot_id, {}).values())
+        }
+    
+    def restore_sessions(self, states: List[Dict[str, Any]]) -> int:
+        """
+        从快照恢复会话（后端启动时调用，遗留进程已由调用方清理）
+        
+        标定已启动但未完成的会话（无论停在哪个步骤，_proceed_to_initialize_zero
+        在脚本运行前就已进入步骤4）回到步骤3的开始，其余会话按快照原样恢复。
+        """
+        restored = 0
+        for state in states:
+            try:
+                session = ZeroPointSession(
+                    session_id=state["session_id"],
+                    robot_id=state["robot_id"],
+                    calibration_type=state["calibration_type"],
+                    current_step=ZeroPointStep(state["current_step"]),
+                    status=ZeroPointStatus(state["status"]),
+                    start_time=datetime.fromisoformat(state["start_time"]),
+                    original_joint_data=[JointData(**joint) for joint in state["original_joint_data"]],
+                    step_progress=state["step_progress"],
+                    error_message=state.get("error_message"),
+                    warnings=state.get("warnings") or []
+                )
+                session.current_joint_data = [JointData(**joint) for joint in state["joint_data"]]
+            except Exception as e:
+                logger.warning(f"恢复零点标定会话失败 {state.get('session_id')}: {str(e)}")
+                continue
+            
+            progress = session.step_progress
+            if (
+                (progress.get("calibration_started") or progress.get("calibration_command"))
+                and not progress.get("calibration_completed")
+            ):
+                # 标定命令随后端重启中断，回到步骤3等待重新执行（不允许在步骤4保存中断时的部分数据）
+                for key in ("calibration_started", "calibration_command", "calibration_mode", "script_id",
+                            "user_prompt", "last_prompt", "auto_response", "calibration_status",
+                            "ready_to_remove_tools"):
+                    progress.pop(key, None)
+                session.current_step = ZeroPointStep.INITIALIZE_ZERO
+                session.status = ZeroPointStatus.IN_PROGRESS
+                session.warnings.append("后端重启时一键标零正在执行，已中断，请重新执行一键标零")
+            elif session.status == ZeroPointStatus.IN_PROGRESS and session.current_step == ZeroPointStep.READ_CONFIG:
+                session.warnings.append("后端重启时正在读取配置，请返回步骤2重新读取")
+            
+            progress["recovered_at"] = datetime.now().isoformat()
+            self.active_sessions[session.session_id] = session
+            self._persist(session)
+            restored += 1
+            logger.info(f"恢复零点标定会话 {session.session_id}: {session.current_step.value} {session.status.value}")
+        
+        return restored
+    
     async def _broadcast_session_update(self, session: ZeroPointSession):
         """广播会话状态更新"""
+        self._persist(session)
         message = {
             "type": "zero_point_calibration_update",
             "data": {
@@ -1098,7 +1307,7 @@ class ZeroPointCalibrationService:
                 "step_progress": session.step_progress,
                 "warnings": session.warnings,
                 "error_message": session.error_message,
-                "joint_data_count": len(session.current_joint_data)
+                "joint_data_count": len(session.joint_table)
             }
         }
         await connection_manager.send_to_robot_subscribers(session.robot_id, message)
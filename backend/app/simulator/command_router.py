@@ -0,0 +1,105 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+
+
+# 处理函数: (模拟器, 命令, stdin输入) -> (成功标志, stdout, stderr)
+CommandHandler = Callable[[Any, str, Optional[str]], Tuple[bool, str, str]]
+
+
+@dataclass(frozen=True)
+class CommandRoute:
+    """模拟命令路由"""
+    name: str
+    tokens: Tuple[str, ...]             # 命令中必须全部包含的子串
+    handler: CommandHandler
+    pattern: Optional[Pattern] = None   # 额外的正则条件
+    order: int = 0                      # 注册顺序，多条路由同时命中时靠前的优先
+    key: str = ""                       # 先查找的关键子串（取最长的，区分度最高）
+    
+    def matches(self, command: str) -> bool:
+        if not all(token in command for token in self.tokens):
+            return False
+        return self.pattern is None or bool(self.pattern.search(command))
+
+
+MAX_CACHED_COMMANDS = 4096   # 缓存的命令解析结果数量上限
+
+
+class CommandRouter:
+    """
+    模拟命令路由表
+    
+    路由按注册顺序检查，第一条命中的路由生效（与原先if/elif链的优先级一致），
+    同一关键子串在一次解析中只查找一次。解析结果按命令字符串缓存：状态轮询、
+    配置读取等重复命令直接从缓存取得路由，不再逐条匹配。
+    """
+    
+    def __init__(self, default: Optional[CommandHandler] = None):
+        self.routes: List[CommandRoute] = []
+        self.default = default
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Optional[CommandRoute]] = {}
+    
+    def add(
+        self,
+        name: str,
+        tokens: Sequence[str],
+        handler: CommandHandler,
+        pattern: Optional[str] = None
+    ) -> CommandRoute:
+        """注册路由（按注册顺序决定优先级）"""
+        if not tokens:
+            raise ValueError(f"路由 {name} 至少需要一个关键子串")
+        with self._lock:
+            route = CommandRoute(
+                name=name,
+                tokens=tuple(tokens),
+                handler=handler,
+                pattern=re.compile(pattern) if pattern else None,
+                order=len(self.routes),
+                key=max(tokens, key=len)
+            )
+            self.routes.append(route)
+            self._cache = {}
+        return route
+    
+    def route(self, name: str, *tokens: str, pattern: Optional[str] = None):
+        """装饰器形式的注册"""
+        def decorator(handler: CommandHandler) -> CommandHandler:
+            self.add(name, tokens, handler, pattern)
+            return handler
+        return decorator
+    
+    def resolve(self, command: str) -> Optional[CommandRoute]:
+        """找出命令对应的路由（没有命中时返回None）"""
+        cache = self._cache
+        if command in cache:
+            return cache[command]
+        
+        result = None
+        present: Dict[str, bool] = {}
+        for route in self.routes:
+            hit = present.get(route.key)
+            if hit is None:
+                hit = present[route.key] = route.key in command
+            if hit and route.matches(command):
+                result = route
+                break
+        
+        if len(cache) >= MAX_CACHED_COMMANDS:
+            cache.clear()
+        cache[command] = result
+        return result
+    
+    def dispatch(self, simulator: Any, command: str, input_data: Optional[str] = None) -> Tuple[str, Tuple[bool, str, str]]:
+        """执行命令，返回 (路由名, 处理结果)，未命中的命令交给默认处理函数"""
+        route = self.resolve(command)
+        if route:
+            name, handler = route.name, route.handler
+        elif self.default:
+            name, handler = "default", self.default
+        else:
+            name, handler = "default", lambda *_: (False, "", f"不支持的命令: {command}")
+        return name, handler(simulator, command, input_data)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import random
+import threading
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """
+    模拟网络条件
+    
+    每次传输（一条命令的往返、一帧关节状态、一段脚本输出）的耗时 =
+    基础延迟 + 抖动 + 丢包重传停顿 + 数据量/带宽。丢包按TCP的方式建模：
+    丢一次就停顿一个重传超时，超时时间每次翻倍。
+    """
+    name: str = "ideal"
+    latency: float = 0.0                  # 基础延迟（秒）
+    jitter: float = 0.0                   # 抖动（指数分布均值，秒）
+    loss: float = 0.0                     # 每次传输的丢包概率
+    retransmit_timeout: float = 0.2       # 丢包后的首次重传超时（秒）
+    bandwidth: Optional[float] = None     # 吞吐上限（字节/秒），None表示不限
+    disconnect_rate: float = 0.0          # 每条命令导致连接断开的概率
+    
+    @property
+    def is_ideal(self) -> bool:
+        return (
+            not self.latency and not self.jitter and not self.loss
+            and not self.bandwidth and not self.disconnect_rate
+        )
+    
+    def delay(self, rng: random.Random, size: int = 0) -> float:
+        """一次传输的耗时（秒）"""
+        if self.is_ideal:
+            return 0.0
+        seconds = self.latency
+        if self.jitter:
+            seconds += rng.expovariate(1.0 / self.jitter)
+        timeout = self.retransmit_timeout
+        while self.loss and rng.random() < self.loss and timeout < 60:
+            seconds += timeout
+            timeout *= 2
+        if self.bandwidth:
+            seconds += size / self.bandwidth
+        return seconds
+    
+    def drops_connection(self, rng: random.Random) -> bool:
+        return bool(self.disconnect_rate) and rng.random() < self.disconnect_rate
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# 预设网络条件
+NETWORK_PROFILES: Dict[str, NetworkProfile] = {
+    "ideal": NetworkProfile(),
+    "lan": NetworkProfile(name="lan", latency=0.001, jitter=0.0005),
+    "wifi": NetworkProfile(name="wifi", latency=0.01, jitter=0.01, loss=0.005, bandwidth=2_000_000),
+    # 现场多台机器人共用的拥塞Wi-Fi
+    "congested_wifi": NetworkProfile(
+        name="congested_wifi", latency=0.06, jitter=0.08, loss=0.03,
+        retransmit_timeout=0.3, bandwidth=200_000, disconnect_rate=0.002
+    ),
+    "flaky": NetworkProfile(
+        name="flaky", latency=0.03, jitter=0.05, loss=0.1,
+        retransmit_timeout=0.5, bandwidth=100_000, disconnect_rate=0.02
+    )
+}
+
+
+def get_network_profile(profile: Any) -> NetworkProfile:
+    """按名称取预设，或由字典构造（字典可带 base 指定在哪个预设上修改）"""
+    if isinstance(profile, NetworkProfile):
+        return profile
+    if isinstance(profile, str):
+        if profile not in NETWORK_PROFILES:
+            raise ValueError(f"未知的网络条件预设: {profile}")
+        return NETWORK_PROFILES[profile]
+    if isinstance(profile, dict):
+        options = dict(profile)
+        base = get_network_profile(options.pop("base", "ideal"))
+        return replace(base, name=options.pop("name", "custom"), **options)
+    raise ValueError(f"无效的网络条件: {profile}")
+
+
+class NetworkStats:
+    """一台模拟机器人的网络注入统计"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.transfers = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+        self.disconnects = 0
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self.transfers += 1
+            self.total_delay += seconds
+            self.max_delay = max(self.max_delay, seconds)
+    
+    def record_disconnect(self):
+        with self._lock:
+            self.disconnects += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "transfers": self.transfers,
+            "avg_delay": round(self.total_delay / self.transfers, 4) if self.transfers else 0.0,
+            "max_delay": round(self.max_delay, 4),
+            "disconnects": self.disconnects
+        }
\ No newline at end of file
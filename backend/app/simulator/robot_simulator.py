@@ -1,26 +1,149 @@
 import asyncio
 import random
 import json
+import re
 import time
-from typing import Dict, Any, Optional, List, Tuple
+import hashlib
+import itertools
+import logging
+from collections import Counter, deque
+from typing import Dict, Any, Optional, List, Tuple, Callable, Deque
 from datetime import datetime
 import threading
-import queue
+import socket
+from concurrent.futures import Future
 from .mock_config_files import get_mock_arms_zero_yaml, get_mock_offset_csv
+from .sim_clock import simulator_clock
+from .command_router import CommandRouter, CommandHandler
+from .network_profile import NetworkProfile, NetworkStats, get_network_profile
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatorLoop:
+    """
+    模拟器共享事件循环
+    
+    所有模拟脚本和关节状态流都作为任务运行在同一个后台线程的事件循环上，
+    不再每个脚本一个线程，模拟上百台机器人时线程数保持不变。
+    """
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="robot-simulator-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+    
+    def submit(self, coro) -> Future:
+        """在共享循环上运行协程（可从任意线程调用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def call_soon(self, callback, *args):
+        """在共享循环线程中执行回调（可从任意线程调用）"""
+        self.loop.call_soon_threadsafe(callback, *args)
+    
+    def task_count(self) -> int:
+        if self._loop is None:
+            return 0
+        return len(asyncio.all_tasks(self._loop))
+
+
+# 全局模拟器事件循环
+simulator_loop = SimulatorLoop()
+
+_script_counter = itertools.count(1)
+
+
+class SimulatedChannel:
+    """
+    模拟的SSH常驻通道
+    
+    提供与paramiko.Channel一致的常用接口（recv/send/close等），
+    输出由模拟器线程通过feed写入，输入通过on_input回调交给模拟器处理
+    """
+    
+    def __init__(self, on_input=None):
+        self._buffer = bytearray()
+        self._condition = threading.Condition()
+        self._on_input = on_input
+        self._timeout = None
+        self.closed = False
+    
+    def feed(self, text: str):
+        """模拟器侧写入输出"""
+        with self._condition:
+            if self.closed:
+                return
+            self._buffer.extend(text.encode('utf-8'))
+            self._condition.notify_all()
+    
+    def recv(self, nbytes: int) -> bytes:
+        with self._condition:
+            if not self._buffer and not self.closed:
+                if not self._condition.wait_for(lambda: self._buffer or self.closed, self._timeout):
+                    raise socket.timeout()
+            data = bytes(self._buffer[:nbytes])
+            del self._buffer[:nbytes]
+            return data
+    
+    def recv_ready(self) -> bool:
+        with self._condition:
+            return bool(self._buffer)
+    
+    def send(self, data) -> int:
+        if self.closed:
+            raise OSError("通道已关闭")
+        if isinstance(data, bytes):
+            data = data.decode('utf-8', errors='ignore')
+        if self._on_input:
+            self._on_input(data)
+        return len(data)
+    
+    def sendall(self, data):
+        self.send(data)
+    
+    def settimeout(self, timeout: Optional[float]):
+        self._timeout = timeout
+    
+    def exit_status_ready(self) -> bool:
+        return self.closed
+    
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
 
 
 class RobotSimulator:
     """机器人模拟器，用于测试标定功能"""
     
-    def __init__(self):
+    def __init__(self, robot_id: Optional[str] = None, network: Any = None):
+        self.robot_id = robot_id
         self.is_connected = False
         self.is_upper_connected = False  # 上位机连接状态
         self.robot_info = {
             "model": "Kuavo 4 pro",
-            "sn": "qwert3459592sfag",
+            # 机队模式下每台机器人的SN由robot_id确定，重启后保持不变
+            "sn": f"sim{hashlib.sha1(robot_id.encode('utf-8')).hexdigest()[:13]}" if robot_id else "qwert3459592sfag",
             "end_effector": "灵巧手",
             "version": "version 1.2.3"
         }
+        # 模拟的标定配置文件（按文件名存放，原子写入后更新）
+        self.config_files = {
+            "arms_zero.yaml": get_mock_arms_zero_yaml(),
+            "offset.csv": get_mock_offset_csv()
+        }
         self.upper_info = {
             "model": "Upper Computer",
             "python_version": "3.8.10",
@@ -29,13 +152,27 @@ class RobotSimulator:
         }
         self.processes = {}
         self.running_scripts = {}
+        # 各路由的调用次数（测试断言用）
+        self.command_counts: Counter = Counter()
+        # 模拟的关节状态（对应/joint_states的position数组）
+        self.joint_positions = [0.0] * 28
+        self.joint_lock = threading.Lock()
+        # 按机器人分流的随机数（设置SIMULATOR_SEED后可复现）
+        self.rng = simulator_clock.rng(robot_id or "default")
+        # 模拟的网络条件（延迟、抖动、丢包、带宽、断线），使用独立的随机序列，
+        # 不打乱脚本和模拟数据的随机结果
+        self.network: NetworkProfile = get_network_profile(network or settings.SIMULATOR_NETWORK_PROFILE)
+        self.network_rng = simulator_clock.rng(f"{robot_id or 'default'}:network")
+        # 关节状态流的测量噪声按真实时间逐帧抽取，抽取次数取决于流打开的时长，同样使用独立的随机序列
+        self.joint_state_rng = simulator_clock.rng(f"{robot_id or 'default'}:joint_states")
+        self.network_stats = NetworkStats()
         # 添加状态跟踪，用于交替成功/失败模拟
         self.last_head_hand_result = True  # True=成功, False=失败
         
     def connect(self, host: str, port: int, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """模拟SSH连接"""
         # 移除阻塞的sleep，改为立即返回
-        # 如果需要模拟延迟，应该在调用方使用asyncio.sleep
+        # 如果需要模拟延迟，应该在调用方使用simulator_clock.sleep
         
         # 模拟验证
         if password == "wrong_password":
@@ -44,9 +181,28 @@ class RobotSimulator:
         if host == "unreachable.host":
             return False, "连接超时"
         
+        # 握手约三次往返
+        if not self.network.is_ideal:
+            simulator_clock.sleep_sync(sum(self.network_delay(256) for _ in range(3)))
+            if self.network.drops_connection(self.network_rng):
+                self.network_stats.record_disconnect()
+                return False, "连接超时"
+        
         self.is_connected = True
         return True, None
     
+    def set_network(self, profile: Any):
+        """切换网络条件（预设名称、字典或NetworkProfile）"""
+        self.network = get_network_profile(profile)
+    
+    def network_delay(self, size: int = 0) -> float:
+        """按当前网络条件抽取一次传输的耗时（秒）并计入统计"""
+        if self.network.is_ideal:
+            return 0.0
+        seconds = self.network.delay(self.network_rng, size)
+        self.network_stats.record(seconds)
+        return seconds
+    
     def disconnect(self) -> bool:
         """模拟断开机器人连接"""
         self.is_connected = False
@@ -76,125 +232,125 @@ class RobotSimulator:
         self.is_upper_connected = False
         return True
     
-    def execute_command(self, command: str) -> Tuple[bool, str, str]:
-        """模拟在机器人执行命令"""
+    def execute_command(self, command: str, input_data: Optional[str] = None) -> Tuple[bool, str, str]:
+        """模拟在机器人执行命令（按命令路由表分发，见文件末尾的路由注册）"""
         if not self.is_connected:
             return False, "", "未连接"
         
-        # 模拟不同命令的响应
-        if "cat /etc/robot_info.json" in command:
-            return True, json.dumps(self.robot_info), ""
-        
-        elif "rosversion" in command:
-            return True, "version 1.2.3", ""
-        
-        elif "echo $ROBOT_VERSION" in command:
-            return True, "4pro", ""
-        
-        elif "cat /home/lab/kuavo_robot_hardware/version.txt" in command:
-            return True, "version 1.2.3", ""
-        
-        # 模拟ROS服务状态检查
-        elif "rosnode list" in command and "grep -q controller" in command:
-            return True, "正常", ""
-        
-        # 模拟电量查询
-        elif "cat /sys/class/power_supply/BAT0/capacity" in command:
-            return True, "85", ""
-        
-        # 模拟故障码查询
-        elif "cat /var/log/robot/error_code" in command:
-            return True, "", ""
-        
-        # 模拟读取零点配置文件
-        elif "cat" in command and "arms_zero.yaml" in command:
-            return True, get_mock_arms_zero_yaml(), ""
-        
-        elif "cat" in command and "offset.csv" in command:
-            return True, get_mock_offset_csv(), ""
-        
-        # 模拟文件存在检查
-        elif "test -f" in command and "arms_zero.yaml" in command:
-            return True, "ok", ""
+        if self.network.drops_connection(self.network_rng):
+            self.is_connected = False
+            self.network_stats.record_disconnect()
+            return False, "", "网络连接已断开"
         
-        elif "test -f" in command and "offset.csv" in command:
-            return True, "ok", ""
+        name, result = command_router.dispatch(self, command, input_data)
+        self.command_counts[name] += 1
         
-        # 模拟创建目录
-        elif "mkdir -p" in command:
-            return True, "", ""
-        
-        # 模拟文件写入
-        elif "cat >" in command or "mv" in command:
-            return True, "", ""
-        
-        # === 头手标定环境检查命令支持 ===
-        
-        # 1. sudo权限检查
-        elif "sudo -n true" in command:
-            return True, "ok", ""
-        
-        # 2. roscore检查
-        elif "which roscore" in command:
-            return True, "/opt/ros/noetic/bin/roscore", ""
-        
-        # 3. 虚拟环境检查
-        elif "test -d /home/lab/kuavo_venv/joint_cali" in command:
-            return True, "exists", ""
-        
-        # 4. 相机设备检查
-        elif "ls /dev/video*" in command and "wc -l" in command:
-            return True, "2", ""  # 模拟有2个相机设备
-        
-        # 5. AprilTag配置文件检查  
-        elif "test -f" in command and "tags.yaml" in command:
-            return True, "exists", ""
-        
-        # 6. rosbag文件检查
-        elif "ls" in command and "hand_move_demo_*.bag" in command and "wc -l" in command:
-            return True, "2", ""  # 模拟有2个bag文件 (left, right)
-        
-        # 7. 头手标定备份文件检查
-        elif "ls" in command and "arms_zero.yaml*.bak" in command:
-            return True, "/home/lab/.config/lejuconfig/arms_zero.yaml.head_cali.bak", ""
+        # 命令和响应的传输耗时（在线程池中执行，阻塞等待即可）
+        if not self.network.is_ideal:
+            success, stdout, stderr = result
+            size = len(command) + len(input_data or "") + len(stdout) + len(stderr)
+            simulator_clock.sleep_sync(self.network_delay(size))
+        return result
+    
+    def _atomic_write(self, command: str, input_data: Optional[str]) -> Tuple[bool, str, str]:
+        """模拟原子写入脚本（内容通过stdin传入）"""
+        content = input_data or ""
+        target = re.search(r"^target=['\"]?([^'\"\n]+)", command, re.MULTILINE)
+        if target:
+            self.config_files[target.group(1).rsplit("/", 1)[-1]] = content
+        return True, f"OK:{hashlib.sha256(content.encode('utf-8')).hexdigest()}\n", ""
+    
+    def _stat_config_files(self, command: str, input_data: Optional[str]) -> Tuple[bool, str, str]:
+        """模拟标定文件信息批量扫描"""
+        config_dir = "/home/lab/.config/lejuconfig"
+        now = int(simulator_clock.time())
+        lines = [
+            f"{config_dir}/arms_zero.yaml|{now - 3600}|{len(self.config_files['arms_zero.yaml'])}",
+            f"{config_dir}/offset.csv|{now - 3600}|{len(self.config_files['offset.csv'])}",
+            f"{config_dir}/arms_zero.yaml.head_cali.bak|{now - 86400}|{len(get_mock_arms_zero_yaml())}",
+            f"{config_dir}/backup/arms_zero.yaml.20240130_153045.bak|{now - 7200}|{len(get_mock_arms_zero_yaml())}",
+            f"{config_dir}/backup/offset.csv.20240130_153045.bak|{now - 7200}|{len(get_mock_offset_csv())}",
+        ]
+        return True, "\n".join(lines) + "\n", ""
+    
+    def _roslaunch(self, command: str, input_data: Optional[str]) -> Tuple[bool, str, str]:
+        """模拟roslaunch标定命令"""
+        if "cali:=true" not in command:
+            return True, "ROS launch file started", ""
+        
+        output = "[模拟器] 启动机器人标定系统\n"
+        output += "[ INFO] 正在初始化ROS节点...\n"
+        output += "[ INFO] 机器人控制器已启动\n"
+        output += "[ INFO] 等待机器人初始化...\n"
+        
+        if "cali_arm:=true" in command and "cali_leg:=true" in command:
+            output += "[ INFO] 开始全身零点标定...\n"
+            output += "[ INFO] 手臂标定模式已启用\n"
+            output += "[ INFO] 腿部标定模式已启用\n"
+        elif "cali_arm:=true" in command:
+            output += "[ INFO] 开始手臂零点标定...\n"
+            output += "[ INFO] 手臂标定模式已启用\n"
+        elif "cali_leg:=true" in command:
+            output += "[ INFO] 开始腿部零点标定...\n"
+            output += "[ INFO] 腿部标定模式已启用\n"
+        
+        output += "[ INFO] 标定系统已就绪，等待用户指令...\n"
+        return True, output, ""
+    
+    def open_channel(self, command: str) -> SimulatedChannel:
+        """模拟打开常驻命令通道"""
+        if not self.is_connected:
+            raise Exception("未连接")
         
-        # 8. 文件时间戳检查
-        elif "stat -c %y" in command and "head_cali.bak" in command:
-            return True, "2024-01-30 15:30:45.123456789 +0800", ""
+        # 关节目标发布：从stdin读取JSON目标并更新模拟关节状态
+        if "kuavo_studio_joint_publisher" in command:
+            channel = SimulatedChannel(on_input=lambda data: self._handle_joint_commands(channel, data))
+            channel.input_buffer = ""
+            channel.feed("READY\n")
+            return channel
         
-        # 9. expect工具检查和安装
-        elif "which expect" in command:
-            return True, "/usr/bin/expect", ""
-        elif "apt-get update" in command and "apt-get install" in command and "expect" in command:
-            return True, "expect installed successfully", ""
+        channel = SimulatedChannel()
         
-        # === 一键标定命令支持 ===
-        elif "roslaunch" in command and "load_kuavo_real.launch" in command:
-            # 模拟roslaunch标定命令
-            if "cali:=true" in command:
-                output = "[模拟器] 启动机器人标定系统\n"
-                output += "[ INFO] 正在初始化ROS节点...\n"
-                output += "[ INFO] 机器人控制器已启动\n"
-                output += "[ INFO] 等待机器人初始化...\n"
-                
-                if "cali_arm:=true" in command and "cali_leg:=true" in command:
-                    output += "[ INFO] 开始全身零点标定...\n"
-                    output += "[ INFO] 手臂标定模式已启用\n"
-                    output += "[ INFO] 腿部标定模式已启用\n"
-                elif "cali_arm:=true" in command:
-                    output += "[ INFO] 开始手臂零点标定...\n"
-                    output += "[ INFO] 手臂标定模式已启用\n"
-                elif "cali_leg:=true" in command:
-                    output += "[ INFO] 开始腿部零点标定...\n"
-                    output += "[ INFO] 腿部标定模式已启用\n"
-                
-                output += "[ INFO] 标定系统已就绪，等待用户指令...\n"
-                return True, output, ""
-            else:
-                return True, "ROS launch file started", ""
+        # 关节状态流：以50Hz持续输出关节位置帧
+        if "kuavo_studio_js_streamer" in command:
+            simulator_loop.submit(self._stream_joint_states(channel))
         
-        else:
-            return True, f"Robot command executed: {command}", ""
+        return channel
+    
+    def _handle_joint_commands(self, channel: SimulatedChannel, data: str):
+        """处理写入发布通道的关节目标（按关节名末尾的编号映射到/joint_states下标）"""
+        channel.input_buffer += data
+        *lines, channel.input_buffer = channel.input_buffer.split("\n")
+        for line in lines:
+            try:
+                cmd = json.loads(line)
+            except ValueError:
+                continue
+            with self.joint_lock:
+                for name, position in zip(cmd.get("name", []), cmd.get("position", [])):
+                    digits = "".join(ch for ch in str(name) if ch.isdigit())
+                    index = int(digits) - 1 if digits else -1
+                    if 0 <= index < len(self.joint_positions):
+                        self.joint_positions[index] = float(position)
+            channel.feed(f"ACK {cmd.get('seq', 0)}\n")
+    
+    async def _stream_joint_states(self, channel: SimulatedChannel, interval: float = 0.02):
+        """
+        向通道持续写入模拟的关节状态帧（帧率按真实时间，不随虚拟时钟加速）
+        
+        帧内时间戳是采样时刻，网络延迟在采样之后、写入通道之前注入，
+        接收端可以据此看出帧的滞后；丢包停顿会让后续帧一起推迟。
+        """
+        while not channel.closed and self.is_connected:
+            with self.joint_lock:
+                positions = [p + self.joint_state_rng.uniform(-0.001, 0.001) for p in self.joint_positions]
+            frame = f"JS {simulator_clock.time():.6f} {','.join(repr(p) for p in positions)}\n"
+            delay = self.network_delay(len(frame))
+            if delay:
+                await simulator_clock.sleep(delay)
+            channel.feed(frame)
+            await asyncio.sleep(interval)
+        channel.close()
     
     def execute_upper_command(self, command: str) -> Tuple[bool, str, str]:
         """模拟在上位机执行命令"""
@@ -251,23 +407,41 @@ class RobotSimulator:
         else:
             return True, f"Upper computer command executed: {command}", ""
     
-    def start_calibration_script(self, script_type: str) -> str:
-        """启动标定脚本"""
-        script_id = f"{script_type}_{int(time.time())}"
+    @staticmethod
+    def script_type_for_command(command: str) -> Optional[str]:
+        """识别标定命令对应的模拟脚本类型（不是标定命令时返回None）"""
+        if "One_button_start.sh" in command:
+            return "head_hand"
+        if "cali:=true" in command:
+            return "zero_point"
+        return None
+    
+    def start_calibration_script(self, script_type: str, command: Optional[str] = None) -> str:
+        """
+        启动标定脚本
+        
+        Args:
+            script_type: zero_point / head_hand，或custom（按command识别脚本类型）
+            command: 交互式执行的原始命令
+        """
+        if script_type == "custom":
+            script_type = self.script_type_for_command(command or "")
+            if not script_type:
+                raise ValueError(f"模拟器不支持交互式执行该命令: {command}")
+        
+        script_id = f"{script_type}_{int(simulator_clock.time())}_{next(_script_counter)}"
         
         if script_type == "zero_point":
-            script = ZeroPointCalibrationScript()
+            script = ZeroPointCalibrationScript(rng=self.rng, network_delay=self.network_delay)
         elif script_type == "head_hand":
             # 头手标定使用交替成功/失败模式
             should_succeed = not self.last_head_hand_result  # 与上次相反
-            import logging
-            logger = logging.getLogger(__name__)
             logger.info(f"[模拟器] 头手标定: 上次结果={self.last_head_hand_result}, 本次应该={'成功' if should_succeed else '失败'}")
             
             # 直接输出调试信息以便前端看到
             print(f"[调试] 模拟器ID: {id(self)}, 本次标定: {'失败' if not should_succeed else '成功'}, should_succeed={should_succeed}")
             
-            script = HeadHandCalibrationScript(should_succeed=should_succeed)
+            script = HeadHandCalibrationScript(should_succeed=should_succeed, rng=self.rng, network_delay=self.network_delay)
             # 更新状态为相反值，下次会使用相反的结果
             self.last_head_hand_result = should_succeed  # 直接设置为本次的结果
             logger.info(f"[模拟器] 状态更新: 下次结果={not self.last_head_hand_result}")
@@ -276,9 +450,8 @@ class RobotSimulator:
         
         self.running_scripts[script_id] = script
         
-        # 启动脚本线程
-        thread = threading.Thread(target=script.run, daemon=True)
-        thread.start()
+        # 脚本作为任务运行在模拟器共享事件循环上
+        script.start()
         
         return script_id
     
@@ -300,8 +473,9 @@ class RobotSimulator:
             del self.running_scripts[script_id]
     
     def is_script_running(self, script_id: str) -> bool:
-        """检查脚本是否在运行"""
-        return script_id in self.running_scripts and self.running_scripts[script_id].is_running
+        """检查脚本是否在运行（脚本已退出但输出仍在网络传输中时也视为运行中）"""
+        script = self.running_scripts.get(script_id)
+        return script is not None and (script.is_running or script.has_pending_output())
     
     def get_script_result(self, script_id: str) -> bool:
         """获取脚本执行结果"""
@@ -313,79 +487,94 @@ class RobotSimulator:
 class CalibrationScript:
     """标定脚本基类"""
     
-    def __init__(self):
-        self.output_buffer = []
-        self.input_queue = queue.Queue()  # 使用线程安全的队列
+    def __init__(self, rng: Optional[random.Random] = None, network_delay: Optional[Callable[[int], float]] = None):
+        # (送达时间, 行)：送达时间按虚拟时钟计算，未到时的行不会被读取
+        self.output_buffer: Deque[Tuple[float, str]] = deque()
+        self.rng = rng or random.Random()
+        self._network_delay = network_delay
+        self._last_ready_at = 0.0
         self.is_running = False
         self.current_step = 0
         self._lock = threading.Lock()
-        self._loop = None
-        self._async_queue = None
+        self._input_queue: Optional[asyncio.Queue] = None
+        self._early_input: List[str] = []  # 任务开始前收到的输入
+        self._future: Optional[Future] = None
         self.execution_success = True  # 脚本执行结果
         
-    def run(self):
-        """运行脚本的主循环"""
+    def start(self):
+        """在模拟器共享事件循环上启动脚本"""
         self.is_running = True
-        asyncio.run(self._run_with_queue())
-        
-    async def _run_with_queue(self):
-        """创建异步队列并运行"""
-        self._async_queue = asyncio.Queue()
-        self._loop = asyncio.get_running_loop()
+        self._future = simulator_loop.submit(self.run())
         
-        # 启动一个任务来从线程安全队列转移到异步队列
-        transfer_task = asyncio.create_task(self._transfer_input())
+    async def run(self):
+        """运行脚本的主循环"""
+        self._input_queue = asyncio.Queue()
+        for input_data in self._early_input:
+            self._input_queue.put_nowait(input_data)
+        self._early_input = []
         
         try:
             await self._async_run()
+        except asyncio.CancelledError:
+            pass
         finally:
-            transfer_task.cancel()
-            
-    async def _transfer_input(self):
-        """从线程安全队列转移输入到异步队列"""
-        while self.is_running:
-            try:
-                # 非阻塞地检查输入
-                input_data = self.input_queue.get_nowait()
-                await self._async_queue.put(input_data)
-            except queue.Empty:
-                await asyncio.sleep(0.1)
-                
+            self.is_running = False
+    
+    def _put_input(self, input_data: str):
+        """在共享循环线程中把输入放入脚本的异步队列"""
+        if self._input_queue is None:
+            self._early_input.append(input_data)
+        else:
+            self._input_queue.put_nowait(input_data)
+    
     async def _async_run(self):
         """异步运行逻辑，子类需要实现"""
         raise NotImplementedError
         
     def get_output(self) -> Optional[str]:
-        """获取并清空输出缓冲区"""
+        """获取并清空输出缓冲区中已送达的行"""
         with self._lock:
-            if self.output_buffer:
-                output = "\n".join(self.output_buffer)
-                self.output_buffer = []
-                return output
-        return None
+            if not self.output_buffer:
+                return None
+            now = simulator_clock.monotonic()
+            lines = []
+            while self.output_buffer and self.output_buffer[0][0] <= now:
+                lines.append(self.output_buffer.popleft()[1])
+        return "\n".join(lines) if lines else None
+    
+    def has_pending_output(self) -> bool:
+        """是否还有尚未读取的输出"""
+        with self._lock:
+            return bool(self.output_buffer)
     
     def send_input(self, input_data: str):
-        """发送输入"""
-        self.input_queue.put(input_data)
+        """发送输入（直接投递到脚本的异步队列，不再轮询转移）"""
+        simulator_loop.call_soon(self._put_input, input_data)
     
     def stop(self):
         """停止脚本"""
         self.is_running = False
+        if self._future:
+            self._future.cancel()
         
     def _write_output(self, text: str):
-        """写入输出"""
+        """写入输出（按网络条件计算送达时间，输出保持顺序：前一段未送达时后一段也要等待）"""
+        ready_at = simulator_clock.monotonic()
+        if self._network_delay:
+            ready_at = max(self._last_ready_at, ready_at + self._network_delay(len(text.encode('utf-8'))))
+            self._last_ready_at = ready_at
         with self._lock:
             # 按行分割并添加
             lines = text.split('\n')
             for line in lines:
                 if line:  # 忽略空行
-                    self.output_buffer.append(line)
+                    self.output_buffer.append((ready_at, line))
     
     async def _wait_for_input(self, timeout: float = 300) -> str:
         """等待用户输入"""
         try:
-            # 使用 asyncio 的超时机制
-            return await asyncio.wait_for(self._async_queue.get(), timeout=timeout)
+            # 超时按虚拟时钟计算
+            return await simulator_clock.wait_for(self._input_queue.get(), timeout)
         except asyncio.TimeoutError:
             self._write_output("\n等待输入超时")
             return ""
@@ -400,11 +589,11 @@ class ZeroPointCalibrationScript(CalibrationScript):
         self._write_output("===========================================")
         self._write_output("       机器人零点标定程序")
         self._write_output("===========================================")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 步骤2：询问是否启动控制系统
         self._write_output("检查机器人状态...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         self._write_output("是否启动机器人控制系统？(y/N): ")
         
         # 等待用户输入
@@ -418,11 +607,11 @@ class ZeroPointCalibrationScript(CalibrationScript):
         self._write_output("正在启动机器人控制系统...")
         for i in range(5):
             self._write_output(f"初始化子系统 {i+1}/5...")
-            await asyncio.sleep(0.5)
+            await simulator_clock.sleep(0.5)
         
         # 步骤4：电机使能
         self._write_output("\n开始使能电机...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 模拟完整的电机位置输出
         slave_positions = [
@@ -445,11 +634,11 @@ class ZeroPointCalibrationScript(CalibrationScript):
         for slave_id, position, encoder, current in slave_positions:
             timestamp = 3040 + slave_id * 10
             self._write_output(f"{timestamp:010d}1: Slave {slave_id:02d} actual position {position:.7f},Encoder {encoder:.7f}")
-            await asyncio.sleep(0.1)
+            await simulator_clock.sleep(0.1)
             self._write_output(f"{timestamp+5:010d}1: Rated current {current:.7f}")
-            await asyncio.sleep(0.1)
+            await simulator_clock.sleep(0.1)
         
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 步骤5：等待按o启动
         self._write_output("\n电机使能完成！")
@@ -465,11 +654,11 @@ class ZeroPointCalibrationScript(CalibrationScript):
         self._write_output("机器人开始站立...")
         for i in range(3):
             self._write_output(f"站立进度: {(i+1)*33}%")
-            await asyncio.sleep(1)
+            await simulator_clock.sleep(1)
         self._write_output("机器人站立完成！")
         
         # 步骤7：询问是否开始标定
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         self._write_output("\n是否开始标定？(y/n): ")
         
         response = await self._wait_for_input()
@@ -481,18 +670,18 @@ class ZeroPointCalibrationScript(CalibrationScript):
         # 步骤8：执行标定
         self._write_output("\n开始执行标定...")
         self._write_output("请确认机器人关节已摆放到零位")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         
         self._write_output("正在读取当前关节位置...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         self._write_output("标定数据：")
         for i in range(14):
-            position = random.uniform(-10, 10)
+            position = self.rng.uniform(-10, 10)
             self._write_output(f"关节{i+1}: {position:.6f}")
         
         # 步骤9：确认保存
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         self._write_output("\n请确认标定数据是否正确？(y/n): ")
         
         response = await self._wait_for_input()
@@ -507,7 +696,7 @@ class ZeroPointCalibrationScript(CalibrationScript):
         response = await self._wait_for_input()
         if response.lower() == 'y':
             self._write_output("正在保存标定数据到 ~/.config/lejuconfig/offset.csv...")
-            await asyncio.sleep(1)
+            await simulator_clock.sleep(1)
             self._write_output("标定数据保存成功！")
             self._write_output("\n零点标定完成！")
         else:
@@ -519,8 +708,8 @@ class ZeroPointCalibrationScript(CalibrationScript):
 class HeadHandCalibrationScript(CalibrationScript):
     """头手标定脚本模拟"""
     
-    def __init__(self, should_succeed: bool = True):
-        super().__init__()
+    def __init__(self, should_succeed: bool = True, rng: Optional[random.Random] = None, network_delay: Optional[Callable[[int], float]] = None):
+        super().__init__(rng, network_delay)
         self.should_succeed = should_succeed
     
     async def _async_run(self):
@@ -529,39 +718,39 @@ class HeadHandCalibrationScript(CalibrationScript):
         self._write_output("===========================================================")
         self._write_output("           机器人关节标定一键启动脚本")
         self._write_output("===========================================================")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 步骤2：环境检查
         self._write_output("步骤1: 检查环境...")
-        await asyncio.sleep(0.5)
+        await simulator_clock.sleep(0.5)
         self._write_output("✓ Python环境检查通过")
         self._write_output("✓ ROS环境检查通过")
         self._write_output("✓ 标定工具检查通过")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 步骤3：自动开始（模拟自动化）
         self._write_output("\n是否开始一键标定流程？(y/n): ")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         self._write_output("自动响应: y")
         
         # 步骤4：启动下位机
         self._write_output("\n步骤2: 准备启动下位机launch文件...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         self._write_output("编译ROS包...")
         for pkg in ["humanoid_controllers", "motion_capture_ik", "mobile_manipulator_controllers"]:
             self._write_output(f"  编译 {pkg}...")
-            await asyncio.sleep(0.5)
+            await simulator_clock.sleep(0.5)
         self._write_output("✓ 编译完成")
         
         # 步骤5：启动机器人控制系统（自动响应）
         self._write_output("\n步骤2.5: 启动机器人控制系统...")
         self._write_output("是否启动机器人控制系统？(y/N): ")
         self._write_output("自动响应: y")
-        await asyncio.sleep(0.5)
+        await simulator_clock.sleep(0.5)
         
         self._write_output("准备启动机器人控制系统...")
         self._write_output("在后台启动机器人控制系统...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         self._write_output("✓ 机器人控制系统已在后台启动")
         
         # 等待缩腿（自动响应）
@@ -571,29 +760,29 @@ class HeadHandCalibrationScript(CalibrationScript):
         self._write_output("- 等待机器人完成缩腿动作后，需要发送站立命令")
         self._write_output("\n请确认机器人已经上电，按回车继续...")
         self._write_output("自动响应: 回车")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         self._write_output("机器人将开始运动，是否继续？(y/n): ")
         self._write_output("自动响应: y")
-        await asyncio.sleep(0.5)
+        await simulator_clock.sleep(0.5)
         
         # 模拟缩腿和站立
         self._write_output("\n机器人开始缩腿...")
-        await asyncio.sleep(3)
+        await simulator_clock.sleep(3)
         self._write_output("缩腿完成")
         
         self._write_output("\n发送站立命令 'o' 到机器人控制系统...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         self._write_output("机器人开始站立...")
-        await asyncio.sleep(3)
+        await simulator_clock.sleep(3)
         self._write_output("✓ 机器人站立完成")
         
         # 步骤6：启动AprilTag识别
         self._write_output("\n步骤3: 启动上位机AprilTag识别系统...")
         self._write_output("检查Python环境...")
-        await asyncio.sleep(0.5)
+        await simulator_clock.sleep(0.5)
         self._write_output("使用Python脚本启动上位机...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         self._write_output("✓ 上位机AprilTag识别系统启动完成")
         
         # 步骤7：头部标定（自动响应）
@@ -604,22 +793,22 @@ class HeadHandCalibrationScript(CalibrationScript):
         self._write_output("3. 上位机相机正常工作")
         self._write_output("是否继续头部标定？(y/N): ")
         self._write_output("自动响应: y")
-        await asyncio.sleep(0.5)
+        await simulator_clock.sleep(0.5)
         
         self._write_output("\n开始头部标定...")
         self._write_output("激活虚拟环境和设置环境...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         # 模拟头部标定过程
         self._write_output("执行头部标定...")
         self._write_output("移动头部到标定位置1...")
         self._write_output(f"[调试] 本次标定模式: {'失败' if not self.should_succeed else '成功'}")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         
         if not self.should_succeed:
             # 失败分支：AprilTag检测失败
             self._write_output("正在检测AprilTag...")
-            await asyncio.sleep(2)
+            await simulator_clock.sleep(2)
             self._write_output("❌ 错误：未检测到AprilTag!")
             self._write_output("可能原因：")
             self._write_output("  1. AprilTag标签没有正确贴在标定工具上")
@@ -634,16 +823,16 @@ class HeadHandCalibrationScript(CalibrationScript):
         
         # 成功分支
         self._write_output("采集数据点1/5")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         
         for i in range(2, 6):
             self._write_output(f"移动头部到标定位置{i}...")
-            await asyncio.sleep(2)
+            await simulator_clock.sleep(2)
             self._write_output(f"采集数据点{i}/5")
-            await asyncio.sleep(1)
+            await simulator_clock.sleep(1)
         
         self._write_output("\n计算标定参数...")
-        await asyncio.sleep(2)
+        await simulator_clock.sleep(2)
         
         if not self.should_succeed:
             # 失败分支：标定精度不达标（这里实际不会执行，因为前面已经返回）
@@ -664,7 +853,7 @@ class HeadHandCalibrationScript(CalibrationScript):
         
         # 步骤8：手臂标定（仅在头部标定成功时继续）
         self._write_output("\n步骤5: 启动手臂标定...")
-        await asyncio.sleep(1)
+        await simulator_clock.sleep(1)
         self._write_output("执行手臂标定脚本...")
         
         # 模拟手臂标定 - 使用异常处理确保完整执行
@@ -687,7 +876,7 @@ class HeadHandCalibrationScript(CalibrationScript):
                     
                     # 使用更短的sleep避免竞争条件
                     try:
-                        await asyncio.sleep(0.3)
+                        await simulator_clock.sleep(0.3)
                     except asyncio.CancelledError:
                         self._write_output(f"[警告] 异步任务被取消，停在关节{j}")
                         return
@@ -740,5 +929,127 @@ class HeadHandCalibrationScript(CalibrationScript):
         return self.upper_info.copy()
 
 
+class SimulatorFleet:
+    """
+    模拟机器人机队
+    
+    每个robot_id对应一个独立的RobotSimulator（连接状态、SN、关节位置、
+    配置文件和运行中的脚本互不影响），首次访问时创建。所有机器人的脚本
+    共用模拟器事件循环，一个进程内可以模拟上百台机器人。
+    """
+    
+    def __init__(self):
+        self.robots: Dict[str, RobotSimulator] = {}
+        self.networks: Dict[str, NetworkProfile] = {}  # 按robot_id单独指定的网络条件
+        self._lock = threading.Lock()
+    
+    def robot(self, robot_id: str) -> RobotSimulator:
+        with self._lock:
+            simulator = self.robots.get(robot_id)
+            if simulator is None:
+                simulator = RobotSimulator(robot_id, network=self.networks.get(robot_id))
+                self.robots[robot_id] = simulator
+            return simulator
+    
+    def set_network(self, profile: Any, robot_ids: Optional[List[str]] = None):
+        """
+        设置网络条件
+        
+        Args:
+            profile: 预设名称、字典（可带base）或NetworkProfile
+            robot_ids: 指定的机器人（尚未创建的机器人在创建时生效），None表示所有已创建的机器人
+        """
+        network = get_network_profile(profile)
+        with self._lock:
+            for robot_id in robot_ids if robot_ids is not None else list(self.robots):
+                self.networks[robot_id] = network
+                if robot_id in self.robots:
+                    self.robots[robot_id].set_network(network)
+    
+    def remove(self, robot_id: str):
+        with self._lock:
+            simulator = self.robots.pop(robot_id, None)
+        if simulator:
+            for script_id in list(simulator.running_scripts):
+                simulator.stop_script(script_id)
+    
+    def disconnect_all(self):
+        for simulator in list(self.robots.values()):
+            simulator.disconnect()
+    
+    def network_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各机器人的网络条件和注入统计"""
+        return {
+            robot_id: {"profile": simulator.network.name, **simulator.network_stats.to_dict()}
+            for robot_id, simulator in list(self.robots.items())
+        }
+    
+    def stats(self) -> Dict[str, int]:
+        robots = list(self.robots.values())
+        return {
+            "robots": len(robots),
+            "connected": sum(1 for simulator in robots if simulator.is_connected),
+            "running_scripts": sum(
+                1 for simulator in robots
+                for script in list(simulator.running_scripts.values()) if script.is_running
+            ),
+            "loop_tasks": simulator_loop.task_count(),
+            "disconnects": sum(simulator.network_stats.disconnects for simulator in robots)
+        }
+
+
+def _reply(stdout: str = "", success: bool = True) -> CommandHandler:
+    """固定响应的命令处理函数"""
+    return lambda simulator, command, input_data: (success, stdout, "")
+
+
+# 模拟命令路由表：按注册顺序决定优先级（原子写入需在cat/mv等规则之前）
+command_router = CommandRouter(
+    default=lambda simulator, command, input_data: (True, f"Robot command executed: {command}", "")
+)
+
+command_router.add("atomic_write", ("kuavo-atomic-write",), RobotSimulator._atomic_write)
+command_router.add("stat_config_files", ("stat -c '%n|%Y|%s'",), RobotSimulator._stat_config_files)
+
+# 交互式shell就绪哨兵（CalibrationService._wait_for_shell_ready 发送，算术展开后才是哨兵，回显不会误判）
+command_router.add("shell_ready", ("echo KUAVO_SHELL_$((1+1))_READY",), _reply("KUAVO_SHELL_2_READY\n"))
+
+# 机器人信息与状态
+command_router.add("robot_info", ("cat /etc/robot_info.json",), lambda simulator, command, input_data: (True, json.dumps(simulator.robot_info), ""))
+command_router.add("ros_version", ("rosversion",), _reply("version 1.2.3"))
+command_router.add("robot_version", ("echo $ROBOT_VERSION",), _reply("4pro"))
+command_router.add("hardware_version", ("cat /home/lab/kuavo_robot_hardware/version.txt",), _reply("version 1.2.3"))
+command_router.add("ros_status", ("rosnode list", "grep -q controller"), _reply("正常"))
+command_router.add("battery", ("cat /sys/class/power_supply/BAT0/capacity",), _reply("85"))
+command_router.add("error_code", ("cat /var/log/robot/error_code",), _reply(""))
+
+# 零点配置文件读写
+command_router.add("read_arms_zero", ("cat", "arms_zero.yaml"), lambda simulator, command, input_data: (True, simulator.config_files["arms_zero.yaml"], ""))
+command_router.add("read_offset", ("cat", "offset.csv"), lambda simulator, command, input_data: (True, simulator.config_files["offset.csv"], ""))
+command_router.add("test_arms_zero", ("test -f", "arms_zero.yaml"), _reply("ok"))
+command_router.add("test_offset", ("test -f", "offset.csv"), _reply("ok"))
+command_router.add("mkdir", ("mkdir -p",), _reply(""))
+command_router.add("write_file", ("cat >",), _reply(""))
+command_router.add("write_file", ("mv",), _reply(""))
+
+# 头手标定环境检查
+command_router.add("sudo_check", ("sudo -n true",), _reply("ok"))
+command_router.add("roscore_check", ("which roscore",), _reply("/opt/ros/noetic/bin/roscore"))
+command_router.add("venv_check", ("test -d /home/lab/kuavo_venv/joint_cali",), _reply("exists"))
+command_router.add("camera_check", ("ls /dev/video*", "wc -l"), _reply("2"))  # 模拟有2个相机设备
+command_router.add("apriltag_check", ("test -f", "tags.yaml"), _reply("exists"))
+command_router.add("rosbag_check", ("ls", "hand_move_demo_*.bag", "wc -l"), _reply("2"))  # 模拟有2个bag文件 (left, right)
+command_router.add("head_cali_backup", ("ls", "arms_zero.yaml*.bak"), _reply("/home/lab/.config/lejuconfig/arms_zero.yaml.head_cali.bak"))
+command_router.add("head_cali_backup_time", ("stat -c %y", "head_cali.bak"), _reply("2024-01-30 15:30:45.123456789 +0800"))
+command_router.add("expect_check", ("which expect",), _reply("/usr/bin/expect"))
+command_router.add("expect_install", ("apt-get update", "apt-get install", "expect"), _reply("expect installed successfully"))
+
+# 一键标定命令
+command_router.add("roslaunch", ("roslaunch", "load_kuavo_real.launch"), RobotSimulator._roslaunch)
+
+
 # 全局模拟器实例
-robot_simulator = RobotSimulator()
\ No newline at end of file
+robot_simulator = RobotSimulator()
+
+# 全局模拟机队实例
+simulator_fleet = SimulatorFleet()
\ No newline at end of file
@@ -0,0 +1,202 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class SimulatorClock:
+    """
+    模拟器虚拟时钟
+    
+    模拟机器人和各服务的模拟标定流程都通过这个时钟等待，而不是直接
+    asyncio.sleep：
+    - 加速模式：虚拟时间按 speed 倍速流逝（speed=100 时 1 秒的等待只需 10ms）
+    - 手动模式：虚拟时间静止，只有调用 advance()/step() 才前进，到期的等待
+      按到期顺序依次唤醒，测试可以逐步驱动整个标定流程
+    
+    随机数由 rng(name) 按名称分流：设置种子后，每台模拟机器人各自的随机
+    序列固定，不受多台机器人并发交错执行的影响，运行结果可复现。
+    """
+    
+    def __init__(self, speed: float = 1.0, manual: bool = False, seed: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._epoch = time.time()
+        self._virtual = 0.0                    # 锚点处的虚拟经过时间
+        self._real_anchor = time.monotonic()   # 锚点处的真实时间
+        # (到期时间, 序号, 唤醒函数, 是否已结束)
+        self._timers: List[Tuple[float, int, Callable[[], None], Callable[[], bool]]] = []
+        self._sequence = itertools.count()
+        self.speed = 1.0
+        self.manual = False
+        self.seed: Optional[int] = None
+        self.random = random.Random()
+        self.configure(speed=speed, manual=manual, seed=seed)
+    
+    def configure(self, speed: Optional[float] = None, manual: Optional[bool] = None, seed: Any = ...):
+        """调整倍速/手动模式/随机种子（seed=None表示不固定种子）"""
+        with self._lock:
+            self._virtual = self._elapsed()
+            self._real_anchor = time.monotonic()
+            if speed is not None:
+                if speed <= 0:
+                    raise ValueError("模拟时钟倍速必须大于0")
+                self.speed = float(speed)
+            if manual is not None:
+                self.manual = bool(manual)
+            if seed is not ...:
+                self.seed = seed
+                self.random = self.rng("default")
+            # 退出手动模式时，仍在等待的定时器立即唤醒
+            released = [] if self.manual else self._timers
+            if not self.manual:
+                self._timers = []
+        for _, _, wake, _ in released:
+            wake()
+    
+    def _elapsed(self) -> float:
+        if self.manual:
+            return self._virtual
+        return self._virtual + (time.monotonic() - self._real_anchor) * self.speed
+    
+    def monotonic(self) -> float:
+        """虚拟经过时间（秒）"""
+        with self._lock:
+            return self._elapsed()
+    
+    def time(self) -> float:
+        """虚拟的当前时间戳（替代 time.time()）"""
+        return self._epoch + self.monotonic()
+    
+    def rng(self, name: str) -> random.Random:
+        """按名称分流的随机数生成器（未设置种子时不可复现）"""
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{name}")
+    
+    async def sleep(self, seconds: float):
+        """按虚拟时间等待"""
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        
+        with self._lock:
+            if not self.manual:
+                real_seconds = seconds / self.speed
+            else:
+                real_seconds = None
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._push_timer(seconds, lambda: self._wake(loop, future), future.done)
+        
+        if real_seconds is not None:
+            await asyncio.sleep(real_seconds)
+        else:
+            await future
+    
+    def sleep_sync(self, seconds: float):
+        """按虚拟时间阻塞等待（供线程池中执行的同步模拟代码使用）"""
+        if seconds <= 0:
+            return
+        
+        with self._lock:
+            if not self.manual:
+                real_seconds = seconds / self.speed
+            else:
+                real_seconds = None
+                event = threading.Event()
+                self._push_timer(seconds, event.set, event.is_set)
+        
+        if real_seconds is not None:
+            time.sleep(real_seconds)
+        else:
+            event.wait()
+    
+    def _push_timer(self, seconds: float, wake: Callable[[], None], finished: Callable[[], bool]):
+        heapq.heappush(self._timers, (self._virtual + seconds, next(self._sequence), wake, finished))
+    
+    async def wait_for(self, awaitable: Awaitable, timeout: float):
+        """带虚拟时间超时的等待，超时抛出 asyncio.TimeoutError"""
+        task = asyncio.ensure_future(awaitable)
+        timer = asyncio.ensure_future(self.sleep(timeout))
+        try:
+            await asyncio.wait({task, timer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            timer.cancel()
+        if not task.done():
+            task.cancel()
+            raise asyncio.TimeoutError()
+        return task.result()
+    
+    def advance(self, seconds: float) -> int:
+        """
+        手动模式下推进虚拟时间（可从任意线程调用）
+        
+        途经的定时器按到期顺序唤醒，返回唤醒的数量。
+        """
+        if not self.manual:
+            raise RuntimeError("模拟时钟不在手动模式")
+        
+        fired = []
+        with self._lock:
+            target = self._virtual + max(0.0, seconds)
+            while self._timers and self._timers[0][0] <= target:
+                deadline, _, wake, _ = heapq.heappop(self._timers)
+                self._virtual = max(self._virtual, deadline)
+                fired.append(wake)
+            self._virtual = target
+        
+        for wake in fired:
+            wake()
+        return len(fired)
+    
+    def step(self) -> Optional[float]:
+        """手动模式下推进到下一个定时器到期，返回推进的秒数（没有等待中的定时器时返回None）"""
+        with self._lock:
+            self._discard_cancelled()
+            if not self._timers:
+                return None
+            delta = self._timers[0][0] - self._virtual
+        self.advance(delta)
+        return delta
+    
+    def pending_timers(self) -> int:
+        with self._lock:
+            self._discard_cancelled()
+            return len(self._timers)
+    
+    def _discard_cancelled(self):
+        self._timers = [timer for timer in self._timers if not timer[3]()]
+        heapq.heapify(self._timers)
+    
+    @staticmethod
+    def _wake(loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+        try:
+            loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            # 等待方的事件循环已关闭
+            pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "speed": self.speed,
+            "manual": self.manual,
+            "seed": self.seed,
+            "virtual_time": round(self.monotonic(), 3),
+            "pending_timers": self.pending_timers()
+        }
+
+
+# 全局模拟器时钟实例
+simulator_clock = SimulatorClock(
+    speed=settings.SIMULATOR_SPEED,
+    manual=settings.SIMULATOR_MANUAL_CLOCK,
+    seed=settings.SIMULATOR_SEED
+)
\ No newline at end of file
@@ -0,0 +1,412 @@
+import argparse
+import logging
+import re
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import paramiko
+
+from .robot_simulator import RobotSimulator, SimulatedChannel, simulator_fleet
+
+logger = logging.getLogger(__name__)
+
+
+# 常驻通道命令（输入输出双向转发给模拟通道）
+PERSISTENT_COMMAND_MARKERS = ("kuavo_studio_joint_publisher", "kuavo_studio_js_streamer")
+# 需要读取stdin（直到EOF）再执行的命令
+STDIN_COMMAND_MARKERS = ("kuavo-atomic-write",)
+# wrap_tracked_command 包装的命令会先输出进程标记
+TRACKED_MARKER_PATTERN = re.compile(r'echo "(\S+) \$\$')
+
+_host_key: Optional[paramiko.RSAKey] = None
+_host_key_lock = threading.Lock()
+
+
+def _get_host_key() -> paramiko.RSAKey:
+    """进程内所有模拟服务端共用一个临时主机密钥"""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(2048)
+        return _host_key
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    """paramiko服务端接口：密码认证，每个exec/shell请求交给独立线程处理"""
+    
+    def __init__(self, server: "SimulatedSSHServer"):
+        self.server = server
+    
+    def get_allowed_auths(self, username: str) -> str:
+        return "password"
+    
+    def check_auth_password(self, username: str, password: str) -> int:
+        if username == self.server.username and (self.server.password is None or password == self.server.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+    
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+    
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes) -> bool:
+        return True
+    
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        threading.Thread(
+            target=self.server._run_command,
+            args=(channel, command.decode("utf-8", errors="ignore")),
+            daemon=True
+        ).start()
+        return True
+    
+    def check_channel_shell_request(self, channel: paramiko.Channel) -> bool:
+        threading.Thread(target=self.server._run_shell, args=(channel,), daemon=True).start()
+        return True
+
+
+class SimulatedSSHServer:
+    """
+    本地SSH服务端替身
+    
+    在本机端口上运行真实的SSH协议（paramiko服务端），命令交给一台模拟机器人
+    处理，命令集与 RobotSimulator.execute_command 相同。后端关闭模拟器模式、
+    把设备地址指向这里，即可在没有硬件的情况下跑通并压测真实的连接、通道、
+    交互式读取和文件写入代码路径。交互式shell（invoke_shell）逐行读取命令并
+    与exec请求同样处理，输入按pty回显，`exec 命令` 和 `exit` 结束shell。
+    
+    - latency: 每条命令开始响应前的延迟（秒，按真实时间，模拟网络往返）
+    - output_rate: 标定脚本输出的速率（行/秒，None表示产生即发送）
+    """
+    
+    def __init__(
+        self,
+        simulator: Optional[RobotSimulator] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        username: str = "leju_kuavo",
+        password: Optional[str] = "leju_kuavo",
+        latency: float = 0.0,
+        output_rate: Optional[float] = None
+    ):
+        self.simulator = simulator or RobotSimulator()
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.output_rate = output_rate
+        
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._transports: List[paramiko.Transport] = []
+        self._running = False
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "connections": 0,
+            "commands": 0,
+            "scripts": 0,
+            "active_channels": 0,
+            "bytes_sent": 0
+        }
+    
+    def start(self) -> Tuple[str, int]:
+        """开始监听，返回实际的 (host, port)"""
+        _get_host_key()
+        self.simulator.connect(self.host, self.port, self.username, self.password or "")
+        
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(100)
+        self.port = self._socket.getsockname()[1]
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._accept_loop, name=f"sim-ssh-{self.port}", daemon=True)
+        self._thread.start()
+        logger.info(f"模拟SSH服务端已启动: {self.host}:{self.port} (机器人SN {self.simulator.robot_info['sn']})")
+        return self.host, self.port
+    
+    def stop(self):
+        self._running = False
+        if self._socket:
+            self._socket.close()
+        for transport in list(self._transports):
+            transport.close()
+        for script_id in list(self.simulator.running_scripts):
+            self.simulator.stop_script(script_id)
+    
+    def __enter__(self) -> "SimulatedSSHServer":
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def _count(self, key: str, value: int = 1):
+        with self._stats_lock:
+            self.stats[key] += value
+    
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle_connection, args=(client,), daemon=True).start()
+    
+    def _handle_connection(self, client: socket.socket):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(_get_host_key())
+        self._transports.append(transport)
+        self._count("connections")
+        try:
+            transport.start_server(server=_ServerInterface(self))
+            # 通道在exec请求中处理；transport只弱引用通道，这里保持引用直到通道关闭。
+            # 命令处理完只发送EOF，由这里在下一轮关闭通道：exec请求的确认由transport
+            # 线程在请求处理返回后才发出，立即关闭可能抢在确认之前，客户端会报通道已关闭
+            channels = []
+            while self._running and transport.is_active():
+                channel = transport.accept(0.2)
+                for item in channels:
+                    if item.eof_sent and not item.closed:
+                        item.close()
+                channels = [item for item in channels if not item.closed]
+                if channel is not None:
+                    channels.append(channel)
+        except Exception as e:
+            logger.debug(f"模拟SSH连接结束: {str(e)}")
+        finally:
+            transport.close()
+            self._transports.remove(transport)
+    
+    def _send(self, channel: paramiko.Channel, text: str):
+        data = text.encode("utf-8")
+        channel.sendall(data)
+        self._count("bytes_sent", len(data))
+    
+    def _run_command(self, channel: paramiko.Channel, command: str):
+        self._count("commands")
+        self._count("active_channels")
+        try:
+            exit_status = self._dispatch(channel, command)
+            if exit_status is not None:
+                channel.send_exit_status(exit_status)
+        except Exception as e:
+            logger.debug(f"模拟SSH命令处理结束: {str(e)}")
+        finally:
+            self._count("active_channels", -1)
+            if not channel.closed:
+                channel.shutdown_write()
+    
+    def _run_shell(self, channel: paramiko.Channel):
+        """交互式shell：逐行读取命令按exec请求同样处理，输入回显（与pty一致）"""
+        self._count("active_channels")
+        input_buffer = ""
+        exit_status = 0
+        try:
+            while not channel.closed:
+                data = channel.recv(1024)
+                if not data:
+                    break
+                text = data.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+                self._send(channel, text.replace("\n", "\r\n"))
+                input_buffer += text
+                
+                finished = False
+                while "\n" in input_buffer and not finished:
+                    line, input_buffer = input_buffer.split("\n", 1)
+                    command = line.strip()
+                    if not command:
+                        continue
+                    
+                    if command == "exit" or command.startswith("exit "):
+                        argument = command[len("exit"):].strip()
+                        exit_status = int(argument) if argument.isdigit() else exit_status
+                        finished = True
+                        break
+                    
+                    # exec 替换shell进程：命令结束即shell结束，退出码为命令的退出码
+                    replace_shell = command.startswith("exec ")
+                    if replace_shell:
+                        command = command[len("exec "):].strip()
+                    
+                    self._count("commands")
+                    result = self._dispatch(channel, command, input_buffer, echo=True)
+                    input_buffer = ""
+                    exit_status = 0 if result is None else result
+                    if replace_shell:
+                        finished = True
+                
+                if finished:
+                    channel.send_exit_status(exit_status)
+                    break
+        except Exception as e:
+            logger.debug(f"模拟SSH shell结束: {str(e)}")
+        finally:
+            self._count("active_channels", -1)
+            if not channel.closed:
+                channel.shutdown_write()
+    
+    def _dispatch(self, channel: paramiko.Channel, command: str, input_buffer: str = "", echo: bool = False) -> Optional[int]:
+        """
+        处理一条命令（exec请求和shell输入共用）
+        
+        Args:
+            input_buffer: shell中已读入、命令之后的输入（交给标定脚本）
+            echo: 是否回显通道输入（shell的pty）
+        
+        Returns:
+            退出码，常驻通道命令返回None
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        
+        marker = TRACKED_MARKER_PATTERN.search(command)
+        if marker:
+            pid = 40000 + self.stats["commands"]
+            self._send(channel, f"{marker.group(1)} {pid} {pid}\n")
+        
+        if any(name in command for name in PERSISTENT_COMMAND_MARKERS):
+            self._bridge_channel(channel, command)
+            return None
+        
+        if self.simulator.script_type_for_command(command):
+            return self._run_script(channel, command, input_buffer, echo)
+        
+        input_data = None
+        if any(name in command for name in STDIN_COMMAND_MARKERS):
+            input_data = self._read_stdin(channel)
+        success, stdout, stderr = self.simulator.execute_command(command, input_data)
+        if stdout:
+            self._send(channel, stdout.replace("\n", "\r\n") if echo else stdout)
+        if stderr:
+            channel.sendall_stderr(stderr.encode("utf-8"))
+        return 0 if success else 1
+    
+    def _read_stdin(self, channel: paramiko.Channel) -> str:
+        chunks = []
+        while True:
+            data = channel.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+        return b"".join(chunks).decode("utf-8", errors="ignore")
+    
+    def _run_script(self, channel: paramiko.Channel, command: str, input_buffer: str = "", echo: bool = False) -> int:
+        """运行模拟标定脚本：输出按配置速率写入通道，通道输入逐行交给脚本"""
+        self._count("scripts")
+        script_id = self.simulator.start_calibration_script("custom", command)
+        line_interval = 1.0 / self.output_rate if self.output_rate else 0.0
+        
+        try:
+            while True:
+                if channel.closed:
+                    return 1
+                
+                while channel.recv_ready():
+                    data = channel.recv(1024).decode("utf-8", errors="ignore")
+                    if echo:
+                        self._send(channel, data.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "\r\n"))
+                    input_buffer += data
+                *lines, input_buffer = input_buffer.replace("\r", "\n").split("\n")
+                for line in lines:
+                    self.simulator.send_script_input(script_id, line.strip())
+                
+                running = self.simulator.is_script_running(script_id)
+                output = self.simulator.get_script_output(script_id)
+                if output:
+                    for line in output.split("\n"):
+                        self._send(channel, line + "\r\n")
+                        if line_interval:
+                            time.sleep(line_interval)
+                elif not running:
+                    break
+                else:
+                    time.sleep(0.01)
+            
+            return 0 if self.simulator.get_script_result(script_id) else 1
+        finally:
+            self.simulator.stop_script(script_id)
+    
+    def _bridge_channel(self, channel: paramiko.Channel, command: str):
+        """常驻命令：在SSH通道和模拟通道之间双向转发"""
+        simulated: SimulatedChannel = self.simulator.open_channel(command)
+        simulated.settimeout(0.05)
+        try:
+            while not channel.closed and not simulated.closed:
+                while channel.recv_ready():
+                    simulated.send(channel.recv(4096))
+                if channel.eof_received:
+                    break
+                try:
+                    data = simulated.recv(65536)
+                except socket.timeout:
+                    continue
+                if data:
+                    channel.sendall(data)
+                    self._count("bytes_sent", len(data))
+        finally:
+            simulated.close()
+
+
+def start_fleet_servers(
+    count: int,
+    host: str = "127.0.0.1",
+    base_port: int = 0,
+    **options
+) -> List[SimulatedSSHServer]:
+    """启动多台模拟机器人的SSH服务端（base_port为0时使用随机端口，否则依次递增）"""
+    servers = []
+    for index in range(count):
+        server = SimulatedSSHServer(
+            simulator=simulator_fleet.robot(f"sim-ssh-{index + 1}"),
+            host=host,
+            port=base_port + index if base_port else 0,
+            **options
+        )
+        server.start()
+        servers.append(server)
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KUAVO 模拟机器人SSH服务端")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=2222, help="起始端口（多台机器人依次递增）")
+    parser.add_argument("--robots", type=int, default=1, help="模拟机器人数量")
+    parser.add_argument("--username", default="leju_kuavo")
+    parser.add_argument("--password", default="leju_kuavo")
+    parser.add_argument("--latency", type=float, default=0.0, help="每条命令的响应延迟（秒）")
+    parser.add_argument("--rate", type=float, default=None, help="标定脚本输出速率（行/秒）")
+    parser.add_argument("--network", default=None, help="网络条件预设（ideal/lan/wifi/congested_wifi/flaky）")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    if args.network:
+        simulator_fleet.set_network(args.network, [f"sim-ssh-{index + 1}" for index in range(args.robots)])
+    servers = start_fleet_servers(
+        args.robots,
+        host=args.host,
+        base_port=args.port,
+        username=args.username,
+        password=args.password,
+        latency=args.latency,
+        output_rate=args.rate
+    )
+    for server in servers:
+        print(f"{server.simulator.robot_id}: ssh {args.username}@{server.host} -p {server.port}  SN {server.simulator.robot_info['sn']}")
+    
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+KUAVO Studio 后端性能基准
+
+默认在模拟器模式下于同一进程内启动后端（后台线程、独立事件循环、临时数据库），
+然后依次测量：
+- rest:         设备列表/状态接口的吞吐和延迟
+- websocket:    N个客户端 × M台机器人的关节状态扇出（帧率、送达率、帧延迟）
+- log_pipeline: 标定日志从原始输出经扫描、解析、缓冲到WebSocket客户端的端到端吞吐
+- parser:       输出解析相关函数的吞吐
+- files:        标定文件信息/读取/写入/版本接口的延迟
+
+结果为JSON（--output 写入文件），可用 --compare 与上一版本的结果比较，
+吞吐下降或延迟上升超过阈值时返回非零退出码。
+
+用法:
+    python benchmark.py
+    python benchmark.py --only rest,websocket --robots 20 --clients 50 --output bench.json
+    python benchmark.py --network congested_wifi --compare baseline.json
+    python benchmark.py --url http://127.0.0.1:8001 --only rest,files   # 测量已运行的后端（需为模拟器模式）
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ["rest", "websocket", "log_pipeline", "parser", "files"]
+# 只能在同进程后端上运行的场景（需要直接向服务注入数据）
+IN_PROCESS_SCENARIOS = {"log_pipeline"}
+JOINT_STATE_RATE = 50.0   # 模拟器关节状态流的帧率（Hz）
+
+
+def _configure_environment(args: argparse.Namespace):
+    """导入后端模块前设置模拟器环境（已设置的环境变量优先）"""
+    os.environ.setdefault("USE_ROBOT_SIMULATOR", "true")
+    os.environ.setdefault("SIMULATOR_FLEET", "true")
+    os.environ.setdefault("DISABLE_CALIBRATION_MONITOR", "true")
+    if args.network:
+        os.environ["SIMULATOR_NETWORK_PROFILE"] = args.network
+    if "DATABASE_URL" not in os.environ:
+        # 不改动开发数据库
+        db_path = os.path.join(tempfile.mkdtemp(prefix="kuavo-bench-"), "benchmark.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+
+def _latency_stats(samples: Sequence[float]) -> Dict[str, Any]:
+    """延迟分布（秒 -> 毫秒）"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+    
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class BackendServer:
+    """在后台线程中运行后端（独立事件循环），基准客户端通过HTTP/WebSocket访问"""
+    
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self, timeout: float = 30) -> str:
+        import uvicorn
+        from main import app
+        
+        self.port = _free_port(self.host)
+        config = uvicorn.Config(app, host=self.host, port=self.port, log_level="warning", lifespan="on")
+        self._server = uvicorn.Server(config)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_until_complete, args=(self._server.serve(),), name="benchmark-backend", daemon=True
+        )
+        self._thread.start()
+        
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise Exception("后端启动失败")
+            time.sleep(0.05)
+        return f"http://{self.host}:{self.port}"
+    
+    async def run(self, coro: Awaitable) -> Any:
+        """在后端事件循环上执行协程并等待结果"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+    
+    def stop(self):
+        if self._server:
+            self._server.should_exit = True
+        if self._thread:
+            self._thread.join(10)
+
+
+# ---------------------------------------------------------------------------
+# 测试数据
+# ---------------------------------------------------------------------------
+
+def _sample_calibration_output(lines: int, seed: int = 0) -> List[str]:
+    """生成与零点标定输出相近的日志行（约1/4为Slave位置行，少量警告）"""
+    rng = random.Random(seed)
+    output = []
+    for index in range(lines):
+        kind = index % 8
+        if kind in (0, 4):
+            slave = index % 14 + 1
+            output.append(
+                f"000000{3040 + index}1: Slave {slave} actual position {rng.uniform(-0.05, 0.05):.7f},"
+                f"Encoder {rng.uniform(0, 65535):.7f}"
+            )
+        elif kind == 5:
+            output.append(f"000000{3040 + index}1: Rated current {rng.uniform(0, 2):.7f}")
+        elif kind == 7 and index % 64 == 7:
+            output.append(f"[ WARN] [{1700000000 + index}.{index % 1000:03d}]: joint {index % 14 + 1} temperature high")
+        else:
+            output.append(f"[ INFO] [{1700000000 + index}.{index % 1000:03d}]: controller step {index}")
+    return output
+
+
+def _chunked(lines: Sequence[str], chunk_size: int = 4096) -> List[str]:
+    """把行拼接后按固定字节数切块（模拟通道读取）"""
+    text = "\n".join(lines) + "\n"
+    return [text[offset:offset + chunk_size] for offset in range(0, len(text), chunk_size)]
+
+
+async def _prepare_robots(client, count: int) -> List[str]:
+    """添加并连接基准用的模拟机器人，返回robot_id列表"""
+    tag = uuid.uuid4().hex[:6]
+    robot_ids = []
+    for index in range(count):
+        response = await client.post("/api/v1/robots", json={
+            "name": f"bench-{tag}-{index + 1}",
+            "ip_address": f"192.168.26.{index % 250 + 2}",
+            "port": 22,
+            "ssh_user": "leju_kuavo",
+            "ssh_password": "leju_kuavo"
+        })
+        response.raise_for_status()
+        robot_id = response.json()["id"]
+        response = await client.post(f"/api/v1/robots/{robot_id}/connect")
+        response.raise_for_status()
+        robot_ids.append(robot_id)
+    return robot_ids
+
+
+async def _remove_robots(client, robot_ids: Sequence[str]):
+    for robot_id in robot_ids:
+        try:
+            await client.delete(f"/api/v1/robots/{robot_id}")
+        except Exception:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# 场景
+# ---------------------------------------------------------------------------
+
+async def _load(client, paths: Sequence[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    """以固定并发发出GET请求（按顺序轮换路径），统计吞吐和延迟"""
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+    
+    async def worker():
+        nonlocal issued, errors
+        while issued < requests:
+            path = paths[issued % len(paths)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "latency": _latency_stats(latencies)
+    }
+
+
+async def bench_rest(client, robot_ids: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    """设备列表/详情/状态接口"""
+    return {
+        "robot_list": await _load(client, ["/api/v1/robots?page=1&page_size=100"], args.requests, args.concurrency),
+        "robot_detail": await _load(client, [f"/api/v1/robots/{rid}" for rid in robot_ids], args.requests, args.concurrency),
+        "robot_status": await _load(client, [f"/api/v1/robots/{rid}/status" for rid in robot_ids], args.requests, args.concurrency)
+    }
+
+
+async def bench_websocket(base_url: str, robot_ids: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    关节状态扇出：每个客户端订阅全部机器人的关节状态，预热后统计收到的帧
+    
+    帧延迟 = 客户端收到时间 - 模拟机器人端的采样时间戳（SIMULATOR_SPEED=1时有意义）
+    """
+    import websockets
+    
+    ws_url = base_url.replace("http", "ws", 1)
+    latencies: List[float] = []
+    frames = 0
+    failed_clients = 0
+    measure_from = time.time() + args.warmup
+    measure_until = measure_from + args.duration
+    
+    async def run_client(index: int):
+        nonlocal frames, failed_clients
+        try:
+            async with websockets.connect(f"{ws_url}/ws/bench-ws-{index}", max_size=None) as ws:
+                for robot_id in robot_ids:
+                    await ws.send(json.dumps({"type": "subscribe_joint_states", "robot_id": robot_id}))
+                while True:
+                    remaining = measure_until - time.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    now = time.time()
+                    if now < measure_from:
+                        continue
+                    message = json.loads(raw)
+                    if message.get("type") == "joint_states":
+                        frames += 1
+                        latencies.append(now - message["data"]["stamp"])
+        except Exception as e:
+            failed_clients += 1
+            logging.warning(f"WebSocket客户端 {index} 失败: {e}")
+    
+    await asyncio.gather(*(run_client(index) for index in range(args.clients)))
+    
+    subscriptions = args.clients * len(robot_ids)
+    per_subscription = frames / subscriptions / args.duration if subscriptions else 0.0
+    return {
+        "clients": args.clients,
+        "robots": len(robot_ids),
+        "failed_clients": failed_clients,
+        "duration_s": args.duration,
+        "frames": frames,
+        "frames_per_sec": round(frames / args.duration, 1),
+        "frames_per_subscription_per_sec": round(per_subscription, 2),
+        "delivery_ratio": round(per_subscription / JOINT_STATE_RATE, 3),
+        "frame_latency": _latency_stats(latencies)
+    }
+
+
+async def _feed_calibration_output(robot_id: str, chunks: List[str]) -> Dict[str, Any]:
+    """
+    在后端事件循环上按真实标定的输出回调处理日志块
+    （与 _execute_real_zero_point_process 的处理步骤相同：扫描成行、记录并广播日志、解析Slave位置）
+    """
+    from app.services.prompt_matcher import zero_point_prompt_matcher
+    from app.services.zero_point_calibration_service import (
+        zero_point_calibration_service, ZeroPointSession, ZeroPointStep, ZeroPointStatus
+    )
+    
+    service = zero_point_calibration_service
+    session = ZeroPointSession(
+        session_id=f"bench_{uuid.uuid4().hex[:8]}",
+        robot_id=robot_id,
+        calibration_type="full_body",
+        current_step=ZeroPointStep.INITIALIZE_ZERO,
+        status=ZeroPointStatus.IN_PROGRESS,
+        start_time=datetime.now(),
+        original_joint_data=[],
+        step_progress={}
+    )
+    scanner = zero_point_prompt_matcher.scanner()
+    
+    start = time.perf_counter()
+    lines = 0
+    for chunk in chunks:
+        for line in scanner.feed(chunk):
+            await service._broadcast_log(session, line.text)
+            await service._process_calibration_output_line(session, line.text)
+            lines += 1
+        # 与读取循环一样，每块之后让出事件循环
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    
+    session.status = ZeroPointStatus.CANCELLED
+    service._persist(session)
+    return {"lines": lines, "elapsed": elapsed, "log_buffer": session.log_buffer.stats()}
+
+
+async def bench_log_pipeline(server: BackendServer, base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """标定日志端到端吞吐：原始输出块 -> 扫描/解析/缓冲 -> WebSocket订阅客户端"""
+    import websockets
+    
+    ws_url = base_url.replace("http", "ws", 1)
+    robot_id = f"bench-log-{uuid.uuid4().hex[:6]}"
+    lines = _sample_calibration_output(args.log_lines)
+    end_marker = "BENCH-END"
+    chunks = _chunked(lines + [f"[ INFO] {end_marker}"])
+    
+    received: List[int] = []
+    finished_at: List[float] = []
+    subscribed = asyncio.Event()
+    ready = 0
+    
+    async def run_client(index: int):
+        nonlocal ready
+        count = 0
+        async with websockets.connect(f"{ws_url}/ws/bench-log-{index}", max_size=None) as ws:
+            await ws.send(json.dumps({"type": "subscribe", "robot_id": robot_id}))
+            while True:
+                message = json.loads(await asyncio.wait_for(ws.recv(), args.timeout))
+                if message.get("type") == "subscribed":
+                    ready += 1
+                    if ready == args.log_clients:
+                        subscribed.set()
+                elif message.get("type") == "calibration_log":
+                    count += 1
+                    if end_marker in message["data"]["log"]:
+                        finished_at.append(time.perf_counter())
+                        break
+        received.append(count)
+    
+    tasks = [asyncio.create_task(run_client(index)) for index in range(args.log_clients)]
+    await asyncio.wait_for(subscribed.wait(), args.timeout)
+    
+    start = time.perf_counter()
+    produced = await server.run(_feed_calibration_output(robot_id, chunks))
+    await asyncio.wait_for(asyncio.gather(*tasks), args.timeout)
+    end_to_end = max(finished_at) - start
+    
+    return {
+        "clients": args.log_clients,
+        "lines": produced["lines"],
+        "bytes": sum(len(chunk.encode("utf-8")) for chunk in chunks),
+        "process_lines_per_sec": round(produced["lines"] / produced["elapsed"], 1),
+        "end_to_end_s": round(end_to_end, 3),
+        "end_to_end_lines_per_sec": round(produced["lines"] / end_to_end, 1),
+        "delivered_per_client": min(received) if received else 0,
+        "log_buffer": produced["log_buffer"]
+    }
+
+
+def _measure(func: Callable[[], Any], units: int, min_time: float) -> Dict[str, Any]:
+    """重复执行直到累计耗时超过min_time，units为每次执行处理的单位数（行/帧）"""
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or runs < 3:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return {
+        "runs": runs,
+        "units_per_run": units,
+        "per_sec": round(units * runs / elapsed, 1),
+        "us_per_unit": round(elapsed / (units * runs) * 1e6, 3)
+    }
+
+
+def bench_parser(args: argparse.Namespace) -> Dict[str, Any]:
+    """解析吞吐（纯CPU，不经过后端）"""
+    from app.services.calibration_data_parser import calibration_data_parser
+    from app.services.calibration_log_buffer import CalibrationLogBuffer
+    from app.services.prompt_matcher import zero_point_prompt_matcher
+    from app.services.joint_state_streamer import parse_joint_state_positions
+    
+    lines = _sample_calibration_output(args.parser_lines)
+    text = "\n".join(lines)
+    chunks = _chunked(lines)
+    rng = random.Random(0)
+    echo = "\n".join(
+        "header:\n  seq: %d\nname: [%s]\nposition: [%s]\nvelocity: []\neffort: []\n---" % (
+            index,
+            ", ".join(f"joint_{j}" for j in range(1, 29)),
+            ", ".join(f"{rng.uniform(-1, 1):.6f}" for _ in range(28))
+        )
+        for index in range(50)
+    )
+    echo_frames = echo.split("\n---")
+    
+    def scan():
+        scanner = zero_point_prompt_matcher.scanner()
+        for chunk in chunks:
+            scanner.feed(chunk)
+    
+    def parse_lines():
+        for line in lines:
+            calibration_data_parser.parse_slave_positions(line)
+    
+    def buffer_append():
+        log_buffer = CalibrationLogBuffer()
+        for line in lines:
+            log_buffer.append(line)
+    
+    def parse_joint_states():
+        for frame in echo_frames:
+            parse_joint_state_positions(frame)
+    
+    result = {
+        "prompt_scanner": _measure(scan, len(lines), args.min_time),
+        "slave_positions_per_line": _measure(parse_lines, len(lines), args.min_time),
+        "slave_positions_block": _measure(lambda: calibration_data_parser.parse_slave_positions(text), len(lines), args.min_time),
+        "calibration_summary": _measure(lambda: calibration_data_parser.parse_calibration_summary(text), len(lines), args.min_time),
+        "log_buffer_append": _measure(buffer_append, len(lines), args.min_time),
+        "joint_state_echo": _measure(parse_joint_states, len(echo_frames), args.min_time)
+    }
+    result["input_bytes"] = len(text.encode("utf-8"))
+    return result
+
+
+async def bench_files(client, robot_ids: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    """标定文件接口的单请求延迟（顺序执行；写入每次内容不同，会经过原子写入和归档）"""
+    robot_id = robot_ids[0]
+    base = f"/api/v1/robots/{robot_id}/calibration-files"
+    rng = random.Random(0)
+    
+    response = await client.get(f"{base}/legs_offset/data")
+    response.raise_for_status()
+    joint_data = response.json()["joint_data"]
+    
+    async def timed(call: Callable[[], Awaitable]) -> Dict[str, Any]:
+        latencies = []
+        errors = 0
+        for _ in range(args.file_iterations):
+            start = time.perf_counter()
+            try:
+                response = await call()
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        return {"errors": errors, "latency": _latency_stats(latencies)}
+    
+    def write_legs_offset():
+        for joint in joint_data:
+            joint["offset"] = round(rng.uniform(-0.01, 0.01), 6)
+        return client.put(f"{base}/legs_offset/data", json={"joint_data": joint_data})
+    
+    return {
+        "robot_id": robot_id,
+        "info": await timed(lambda: client.get(f"{base}/info")),
+        "read_arms_zero": await timed(lambda: client.get(f"{base}/arms_zero/data")),
+        "read_legs_offset": await timed(lambda: client.get(f"{base}/legs_offset/data")),
+        "write_legs_offset": await timed(write_legs_offset),
+        "list_versions": await timed(lambda: client.get(f"{base}/legs_offset/versions"))
+    }
+
+
+# ---------------------------------------------------------------------------
+# 结果比较
+# ---------------------------------------------------------------------------
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    与基线比较：吞吐（*per_sec）下降、延迟（p50/p95）上升超过阈值记为回退
+    
+    Returns:
+        回退项列表
+    """
+    now = _flatten(current.get("results", {}))
+    before = _flatten(baseline.get("results", {}))
+    regressions = []
+    for name, value in now.items():
+        old = before.get(name)
+        if not old:
+            continue
+        if name.endswith("per_sec"):
+            change = (old - value) / old
+        elif name.endswith("p50_ms") or name.endswith("p95_ms"):
+            change = (value - old) / old
+        else:
+            continue
+        if change > threshold:
+            regressions.append({"metric": name, "baseline": old, "current": value, "change": round(change, 3)})
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# 入口
+# ---------------------------------------------------------------------------
+
+async def run_benchmarks(args: argparse.Namespace, scenarios: List[str]) -> Dict[str, Any]:
+    import httpx
+    
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    
+    if "parser" in scenarios:
+        try:
+            results["parser"] = bench_parser(args)
+        except Exception as e:
+            errors["parser"] = str(e)
+    
+    server_scenarios = [name for name in scenarios if name != "parser"]
+    if not server_scenarios:
+        return {"results": results, "errors": errors}
+    
+    server = None
+    base_url = args.url
+    if not base_url:
+        server = BackendServer()
+        base_url = server.start()
+    
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    robot_ids: List[str] = []
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            robot_ids = await _prepare_robots(client, args.robots)
+            try:
+                for name in server_scenarios:
+                    if name in IN_PROCESS_SCENARIOS and server is None:
+                        errors[name] = "需要同进程后端，使用 --url 时跳过"
+                        continue
+                    try:
+                        if name == "rest":
+                            results[name] = await bench_rest(client, robot_ids, args)
+                        elif name == "websocket":
+                            results[name] = await bench_websocket(base_url, robot_ids, args)
+                        elif name == "log_pipeline":
+                            results[name] = await bench_log_pipeline(server, base_url, args)
+                        elif name == "files":
+                            results[name] = await bench_files(client, robot_ids, args)
+                    except Exception as e:
+                        logging.exception(f"场景 {name} 失败")
+                        errors[name] = str(e) or type(e).__name__
+            finally:
+                await _remove_robots(client, robot_ids)
+    finally:
+        if server:
+            server.stop()
+    
+    return {"results": results, "errors": errors}
+
+
+def _environment(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "target": args.url or "in-process",
+        "simulator": os.environ.get("USE_ROBOT_SIMULATOR"),
+        "simulator_fleet": os.environ.get("SIMULATOR_FLEET"),
+        "simulator_speed": os.environ.get("SIMULATOR_SPEED", "1.0"),
+        "network_profile": os.environ.get("SIMULATOR_NETWORK_PROFILE", "ideal")
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="KUAVO Studio 后端性能基准（模拟器模式）")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help=f"要运行的场景，逗号分隔（{','.join(SCENARIOS)}）")
+    parser.add_argument("--url", default=None, help="已运行的后端地址（默认在本进程内启动）")
+    parser.add_argument("--robots", type=int, default=10, help="模拟机器人数量")
+    parser.add_argument("--requests", type=int, default=2000, help="每个REST接口的请求数")
+    # 状态接口在等待SSH时占用数据库连接，并发数超过连接池上限（默认5+10）会阻塞到连接池超时
+    parser.add_argument("--concurrency", type=int, default=10, help="REST并发数")
+    parser.add_argument("--clients", type=int, default=20, help="关节状态扇出的WebSocket客户端数")
+    parser.add_argument("--duration", type=float, default=5.0, help="关节状态扇出的统计时长（秒）")
+    parser.add_argument("--warmup", type=float, default=1.0, help="关节状态扇出的预热时长（秒）")
+    parser.add_argument("--log-lines", type=int, default=20000, help="日志管线的行数")
+    parser.add_argument("--log-clients", type=int, default=5, help="日志管线的订阅客户端数")
+    parser.add_argument("--parser-lines", type=int, default=5000, help="解析基准的输入行数")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每项解析基准的最短测量时间（秒）")
+    parser.add_argument("--file-iterations", type=int, default=50, help="每个文件接口的请求次数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求/等待的超时（秒）")
+    parser.add_argument("--network", default=None, help="模拟网络条件预设（ideal/lan/wifi/congested_wifi/flaky）")
+    parser.add_argument("--output", default=None, help="结果JSON文件（默认输出到标准输出）")
+    parser.add_argument("--compare", default=None, help="基线结果JSON，与之比较并报告回退")
+    parser.add_argument("--threshold", type=float, default=0.15, help="判定回退的相对变化阈值")
+    args = parser.parse_args()
+    
+    scenarios = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+    
+    _configure_environment(args)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # 后端自身的日志（如标定输出中的警告行）不输出，避免干扰测量
+    logging.getLogger("app").setLevel(logging.ERROR)
+    
+    started = datetime.now()
+    report = asyncio.run(run_benchmarks(args, scenarios))
+    report = {
+        "benchmark": "kuavo-studio-backend",
+        "version": 1,
+        "started_at": started.isoformat(timespec="seconds"),
+        "duration_s": round((datetime.now() - started).total_seconds(), 1),
+        "environment": _environment(args),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        **report
+    }
+    
+    exit_code = 1 if report["errors"] else 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["regressions"] = compare_results(report, json.load(f), args.threshold)
+        if report["regressions"]:
+            exit_code = 1
+    
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"基准结果已写入 {args.output}")
+        for name, error in report["errors"].items():
+            print(f"  场景 {name} 失败: {error}")
+        for item in report.get("regressions", []):
+            print(f"  回退 {item['metric']}: {item['baseline']} -> {item['current']} ({item['change']:.0%})")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -10,15 +10,34 @@ from app.core.config import settings
 from app.core.database import init_db
 from app.api.v1 import api_router
 from app.api.websocket import websocket_router
+from app.api.metrics import metrics_router, event_loop_router
+from app.core.metrics import ServerTimingMiddleware
+from app.core.loop_watchdog import loop_watchdog
 
 logger = logging.getLogger(__name__)
 
 
+async def _recover_sessions(session_store):
+    try:
+        await session_store.recover_sessions()
+    except Exception as e:
+        logger.error(f"恢复标定会话失败: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 事件循环阻塞监测（尽早启动，覆盖启动阶段的阻塞调用）
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+    
     # 启动时初始化数据库
     init_db()
     
+    # 恢复上次运行中的标定会话（清理遗留的标定进程）；在后台进行，
+    # 不可达的机器人不会推迟服务启动
+    from app.services.session_store import session_store
+    recovery_task = asyncio.create_task(_recover_sessions(session_store))
+    
     # 启动后台任务
     monitor_task = None
     if os.getenv("DISABLE_CALIBRATION_MONITOR", "false").lower() != "true":
@@ -34,6 +53,15 @@ async def lifespan(app: FastAPI):
     yield
     
     # 清理资源
+    if not recovery_task.done():
+        recovery_task.cancel()
+        try:
+            await recovery_task
+        except asyncio.CancelledError:
+            pass
+    await session_store.flush()
+    await loop_watchdog.stop()
+    
     if monitor_task:
         monitor_task.cancel()
         try:
@@ -58,9 +86,17 @@ app.add_middleware(
     expose_headers=["*"]  # 添加这行以暴露所有响应头
 )
 
+# 请求分项耗时（Server-Timing响应头）
+if settings.METRICS_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
 # 注册路由
 app.include_router(api_router, prefix="/api/v1")
 app.include_router(websocket_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
+if settings.LOOP_WATCHDOG_ENABLED:
+    app.include_router(event_loop_router)
 
 
 @app.get("/")